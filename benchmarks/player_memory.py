@@ -0,0 +1,93 @@
+"""Memory per suspended session: the slotted Player vs. the original dataclass.
+
+The original Player was a plain dataclass with a __dict__, a backpack dict, a
+fresh list of 17 slate dicts per visit and a dict copy per purchase. It is
+reproduced here as LegacyPlayer. For each layout, N players are built in two
+states and the bytes allocated per player are measured with tracemalloc:
+
+* rolled - stats generated and a potion taken, before the shop
+* shopping - in the shop with the slate written and three items bought
+
+    python benchmarks/player_memory.py --sessions 100000
+"""
+import argparse
+import random
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from forest_of_doom import ui  # noqa: E402
+from forest_of_doom.items import CATALOG, YAZTROMO_SLATE  # noqa: E402
+from forest_of_doom.models import Player, generate_stats  # noqa: E402
+
+PURCHASES = (0, 5, 5)
+
+
+@dataclass
+class LegacyPlayer:
+    skill: int = 0
+    stamina: int = 0
+    luck: int = 0
+    backpack: Dict[str, int] = field(default_factory=lambda: {"gold": 10, "map": 1})
+    potion: Optional[str] = None
+    slate: list = field(default_factory=list)
+    inventory: list = field(default_factory=list)
+
+
+def _legacy_slate() -> list:
+    return [{'name': it.name, 'price': it.price} for it in CATALOG]
+
+
+def build(cls, shopping: bool, rng: random.Random):
+    p = cls()
+    generate_stats(p, rng=rng)
+    p.potion = 'fortune'
+    if shopping:
+        if cls is LegacyPlayer:
+            p.slate = _legacy_slate()
+            for i in PURCHASES:
+                p.inventory.append(dict(p.slate[i]))
+        else:
+            p.slate = YAZTROMO_SLATE
+            for i in PURCHASES:
+                ui.buy_from_slate(p, i)
+    return p
+
+
+def bytes_per_session(cls, shopping: bool, sessions: int) -> float:
+    rng = random.Random(0)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    players = [build(cls, shopping, rng) for _ in range(sessions)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del players
+    return used / sessions
+
+
+def measure(sessions: int) -> dict:
+    return {
+        (state, cls.__name__): bytes_per_session(cls, state == 'shopping', sessions)
+        for state in ('rolled', 'shopping') for cls in (LegacyPlayer, Player)
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=100_000)
+    args = parser.parse_args()
+    results = measure(args.sessions)
+    for state in ('rolled', 'shopping'):
+        legacy = results[(state, 'LegacyPlayer')]
+        compact = results[(state, 'Player')]
+        print(f"{state}:")
+        print(f"  legacy dataclass: {legacy:8.0f} bytes/session")
+        print(f"  slotted Player  : {compact:8.0f} bytes/session ({compact / legacy:.0%} of legacy)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Connection-rate and sessions-per-core benchmark for the preforked server.
+
+For each worker count, starts ``python -m forest_of_doom.main --serve ... --fast``
+in a subprocess, then hammers it from several client processes. Every client
+connects, plays a short session (yes, ready, fortune, attack) and disconnects.
+Reports completed sessions/s, sessions/s per worker (core), and the median
+time from connect to the first prompt.
+
+    python benchmarks/prefork_bench.py --workers 0 1 2 4 --seconds 5
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRIPT = [(b'You dare enter', b'yes'), (b'"ready"', b'ready'), (b'Which potion', b'fortune'), (b'(follow/attack)', b'attack')]
+
+
+async def _expect(reader, text, seen):
+    while text not in seen:
+        chunk = await reader.read(65536)
+        if not chunk:
+            raise ConnectionError('closed')
+        seen += chunk
+    return seen[seen.index(text) + len(text):]
+
+
+async def _session(port):
+    t0 = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    seen = b''
+    first = None
+    for prompt, answer in SCRIPT:
+        seen = await _expect(reader, prompt, seen)
+        if first is None:
+            first = time.perf_counter() - t0
+        writer.write(answer + b'\r\n')
+    await _expect(reader, b'Goodbye', seen)
+    writer.close()
+    return first
+
+
+async def _client_loop(port, concurrency, seconds):
+    deadline = time.perf_counter() + seconds
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            try:
+                latencies.append(await _session(port))
+            except (ConnectionError, OSError):
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def _client_process(args):
+    port, concurrency, seconds = args
+    return asyncio.run(_client_loop(port, concurrency, seconds))
+
+
+def start_server(workers):
+    cmd = [sys.executable, '-m', 'forest_of_doom.main', '--serve', '127.0.0.1:0', '--fast', '--workers', str(workers)]
+    proc = subprocess.Popen(cmd, cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline()
+    if 'Serving' not in line:
+        proc.kill()
+        raise RuntimeError(f'server failed to start: {line!r}')
+    port = int(line.split(' on ')[1].split()[0].rsplit(':', 1)[1])
+    return proc, port
+
+
+def run(workers, clients, concurrency, seconds):
+    proc, port = start_server(workers)
+    try:
+        with multiprocessing.Pool(clients) as pool:
+            t0 = time.perf_counter()
+            results = pool.map(_client_process, [(port, concurrency, seconds)] * clients)
+            elapsed = time.perf_counter() - t0
+    finally:
+        proc.terminate()
+        proc.wait()
+    latencies = [lat for lats, _ in results for lat in lats]
+    errors = sum(err for _, err in results)
+    rate = len(latencies) / elapsed
+    return {
+        'workers': workers,
+        'sessions': len(latencies),
+        'errors': errors,
+        'sessions_per_s': rate,
+        'sessions_per_s_per_core': rate / max(workers, 1),
+        'first_prompt_ms_p50': statistics.median(latencies) * 1000 if latencies else float('nan'),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, os.cpu_count() or 1],
+                        help='worker counts to try (0 = single-process asyncio server)')
+    parser.add_argument('--clients', type=int, default=max(2, (os.cpu_count() or 2) // 2), help='client processes')
+    parser.add_argument('--concurrency', type=int, default=32, help='concurrent sessions per client process')
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+    print(f"{'workers':>7} {'sessions':>9} {'errors':>6} {'sess/s':>9} {'sess/s/core':>11} {'p50 ms':>8}")
+    for workers in args.workers:
+        r = run(workers, args.clients, args.concurrency, args.seconds)
+        print(f"{r['workers']:>7} {r['sessions']:>9} {r['errors']:>6} {r['sessions_per_s']:>9.0f} "
+              f"{r['sessions_per_s_per_core']:>11.0f} {r['first_prompt_ms_p50']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
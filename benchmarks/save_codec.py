@@ -0,0 +1,73 @@
+"""Save size and encode/decode throughput: indented JSON vs. the binary codec.
+
+Builds a shopping player (stats, potion, Yaztromo's slate, three purchases)
+and times the two save paths in memory, without file I/O:
+
+* json   - player_to_dict + json.dumps(indent=2), json.loads + player_from_dict
+* binary - savecodec.encode / savecodec.decode
+
+    python benchmarks/save_codec.py --number 20000
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from forest_of_doom import savecodec, ui  # noqa: E402
+from forest_of_doom.items import YAZTROMO_SLATE  # noqa: E402
+from forest_of_doom.models import Player, generate_stats, player_from_dict, player_to_dict  # noqa: E402
+
+
+def sample_player() -> Player:
+    p = Player()
+    generate_stats(p, rng=random.Random(0))
+    p.potion = 'fortune'
+    p.slate = YAZTROMO_SLATE
+    for i in (0, 5, 5):
+        ui.buy_from_slate(p, i)
+    return p
+
+
+def json_encode(p: Player) -> bytes:
+    return json.dumps(player_to_dict(p), ensure_ascii=False, indent=2).encode('utf-8')
+
+
+def json_decode(data: bytes) -> Player:
+    return player_from_dict(json.loads(data.decode('utf-8')))
+
+
+CODECS = {
+    'json': (json_encode, json_decode),
+    'binary': (savecodec.encode, savecodec.decode),
+}
+
+
+def measure(number: int) -> dict:
+    p = sample_player()
+    results = {}
+    for name, (enc, dec) in CODECS.items():
+        data = enc(p)
+        assert player_to_dict(dec(data)) == player_to_dict(p)
+        results[name] = {
+            'bytes': len(data),
+            'encode_per_s': number / min(timeit.repeat(lambda: enc(p), number=number, repeat=3)),
+            'decode_per_s': number / min(timeit.repeat(lambda: dec(data), number=number, repeat=3)),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000, help='encodes/decodes per timing run')
+    args = parser.parse_args()
+    print(f"{'codec':>7} {'bytes':>6} {'encode/s':>10} {'decode/s':>10}")
+    for name, r in measure(args.number).items():
+        print(f"{name:>7} {r['bytes']:>6} {r['encode_per_s']:>10.0f} {r['decode_per_s']:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
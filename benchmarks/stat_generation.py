@@ -0,0 +1,48 @@
+"""Characters rolled per second: generate_stats in a loop vs. characters.generate_batch.
+
+    python benchmarks/stat_generation.py --count 1000000
+
+generate_batch needs NumPy; without it only the loop is timed.
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from forest_of_doom import characters  # noqa: E402
+from forest_of_doom.models import Player, generate_stats  # noqa: E402
+
+
+def loop(n: int) -> float:
+    rng = random.Random(0)
+    started = time.perf_counter()
+    for _ in range(n):
+        p = Player()
+        generate_stats(p, rng=rng)
+    return n / (time.perf_counter() - started)
+
+
+def batch(n: int) -> float:
+    started = time.perf_counter()
+    for _ in characters.iter_batches(n, seed=0, potion='random'):
+        pass
+    return n / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=1_000_000, help='characters to roll with generate_batch')
+    args = parser.parse_args()
+    # the loop is timed on fewer characters; its rate doesn't depend on the count
+    print(f"{'generate_stats loop':>20}: {loop(min(args.count, 200_000)):>12,.0f} characters/s")
+    if characters.np is None:
+        print(f"{'generate_batch':>20}: needs NumPy")
+    else:
+        print(f"{'generate_batch':>20}: {batch(args.count):>12,.0f} characters/s")
+
+
+if __name__ == '__main__':
+    main()
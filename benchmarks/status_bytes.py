@@ -0,0 +1,87 @@
+"""Compare bytes sent for status updates: full reprint vs. the differential StatusPanel.
+
+Two measurements:
+
+* status only - the status block refreshed after every state change (stats,
+  potion, three purchases, one use), via display_status vs. StatusPanel.
+* whole shop session - the same scripted shop commands, for context. 'list'
+  skips gold and inventory when the panel shows them, but the slate listing is
+  most of what a shop session prints, so the whole session is only a few
+  percent smaller; the panel's savings are in the status refreshes.
+
+    python benchmarks/status_bytes.py
+"""
+import builtins
+import contextlib
+import io
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from forest_of_doom import ui  # noqa: E402
+from forest_of_doom.items import YAZTROMO_SLATE  # noqa: E402
+from forest_of_doom.models import Player, generate_stats  # noqa: E402
+
+SHOP_SCRIPT = ['list', 'buy 0', 'yes', 'list', 'buy 7', 'yes', 'list', 'buy 13', 'yes', 'list', 'use 0', 'list', 'exit']
+
+
+def scripted_session(use_panel: bool) -> int:
+    """Run the scripted session and return the bytes written to stdout."""
+    buf = io.StringIO()
+    panel = ui.StatusPanel(stream=buf, ansi=True, width=120) if use_panel else None
+    player = Player()
+    answers = iter(SHOP_SCRIPT)
+    real_input = builtins.input
+    builtins.input = lambda prompt='': next(answers)
+    try:
+        with contextlib.redirect_stdout(buf):
+            generate_stats(player, rng=random.Random(0))
+            ui.display_status(player, panel)
+            player.potion = 'fortune'
+            player.luck += 1
+            ui.display_status(player, panel)
+            player.slate = YAZTROMO_SLATE
+            ui.shop_loop(player, panel=panel)
+    finally:
+        builtins.input = real_input
+    return len(buf.getvalue().encode('utf-8'))
+
+
+def status_only(use_panel: bool) -> int:
+    """Refresh the status after each state change; return bytes written."""
+    buf = io.StringIO()
+    panel = ui.StatusPanel(stream=buf, ansi=True, width=120) if use_panel else None
+    player = Player()
+    player.slate = YAZTROMO_SLATE
+    steps = [
+        lambda: generate_stats(player, rng=random.Random(0)),
+        lambda: (setattr(player, 'potion', 'fortune'), setattr(player, 'luck', player.luck + 1)),
+        lambda: ui.buy_from_slate(player, 0),
+        lambda: ui.buy_from_slate(player, 7),
+        lambda: ui.buy_from_slate(player, 13),
+        lambda: ui.use_item(player, 0),
+    ]
+    with contextlib.redirect_stdout(buf):
+        for change in steps:
+            change()
+            if panel is not None:
+                panel.render(player)
+            else:
+                ui.display_status(player)
+                print('Inventory: ' + ', '.join(it['name'] for it in player.inventory))
+    return len(buf.getvalue().encode('utf-8'))
+
+
+def main() -> None:
+    for label, fn in (('status only', status_only), ('whole shop session', scripted_session)):
+        full = fn(use_panel=False)
+        diff = fn(use_panel=True)
+        print(f'{label}:')
+        print(f'  full reprint : {full:6d} bytes')
+        print(f'  status panel : {diff:6d} bytes ({diff / full:.0%} of full)')
+
+
+if __name__ == '__main__':
+    main()
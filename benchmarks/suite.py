@@ -0,0 +1,286 @@
+"""Timing suite for the game's hot paths, with baseline comparison.
+
+Each benchmark times one operation (best of several runs, in seconds per op):
+
+* run_game_fast         - run_game(fast=True) end to end, output to a null sink
+* slow_print            - slow_print of a paragraph through the frame-clocked
+                          typewriter on a null terminal, with a fake clock (no sleeping)
+* get_valid_input       - one prompt: an invalid line, a 'save <slot>' handler, then a valid answer
+* shop_loop             - shop_loop over a scripted stream, per command
+* buy_use               - buy_from_slate followed by use_item
+* combat_odds           - an exact combat odds query, memo warm
+* combat_odds_cold      - the same query with the memo cleared first
+* save_json_N / load_json_N, save_binary_N / load_binary_N
+                        - save_player/load_player with N items in the inventory
+
+Results are written as JSON. Given a baseline (an earlier results file), every
+metric slower than the baseline by more than --threshold is reported and the
+exit code is 1::
+
+    python benchmarks/suite.py --output benchmarks/baseline.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json --output results.json
+
+Baselines are machine-specific: record one on the machine that runs the gate.
+"""
+import argparse
+import builtins
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from forest_of_doom import combat, game, ui  # noqa: E402
+from forest_of_doom.items import YAZTROMO_SLATE  # noqa: E402
+from forest_of_doom.models import Player, generate_stats, load_player, save_player  # noqa: E402
+
+RESULTS_VERSION = 1
+INVENTORY_SIZES = (0, 10, 100, 1000)
+PARAGRAPH = ('Only the foolhardy or the very brave would willingly risk a journey into Darkwood Forest, '
+             'where strange, twisting paths wind their way into the eerie depths. ') * 4
+SHOP_SCRIPT = ['list', 'view 3', 'buy 1', 'yes', 'buy 6', 'no', 'use 1', 'view 99', 'frobnicate', 'save', 'exit']
+
+
+class NullSink(io.TextIOBase):
+    """A stream that discards everything; tty=True makes the typewriter animate into it."""
+
+    def __init__(self, tty: bool = False):
+        self.tty = tty
+
+    def write(self, s: str) -> int:
+        return len(s)
+
+    def isatty(self) -> bool:
+        return self.tty
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, s: float) -> None:
+        self.now += s
+
+
+@contextlib.contextmanager
+def scripted_input(lines):
+    """Answer input() from lines, starting again at the top once they run out."""
+    script = list(lines)
+    pos = 0
+
+    def fake_input(prompt=''):
+        nonlocal pos
+        line = script[pos % len(script)]
+        pos += 1
+        return line
+
+    saved = builtins.input
+    builtins.input = fake_input
+    try:
+        yield
+    finally:
+        builtins.input = saved
+
+
+def shopper(gold: int = 10 ** 6) -> Player:
+    p = Player()
+    generate_stats(p, rng=random.Random(0))
+    p.potion = 'fortune'
+    p.slate = YAZTROMO_SLATE
+    p.backpack['gold'] = gold
+    return p
+
+
+def player_with_items(n: int) -> Player:
+    p = shopper()
+    for i in range(n):
+        # a mix of repeated and distinct purchases, as real inventories have
+        ui.buy_from_slate(p, (i * 7) % len(YAZTROMO_SLATE))
+    return p
+
+
+# Each benchmark takes a context (an ExitStack for patches, a temp dir) and
+# returns (op, ops): op() performs ops operations.
+
+def bench_run_game_fast(ctx):
+    ctx['stack'].enter_context(scripted_input(['yes', 'ready', 'fortune', 'follow']))
+    return (lambda: game.run_game(fast=True, seed=0)), 1
+
+
+def bench_slow_print(ctx):
+    clock = FakeClock()
+    renderer = ui.TypewriterRenderer(cps=2000, fps=60, stream=NullSink(tty=True), clock=clock, sleep=clock.sleep)
+    saved, ui._typewriter = ui._typewriter, renderer
+    ctx['stack'].callback(setattr, ui, '_typewriter', saved)
+
+    def op():
+        # from zero each time: far from it, a wait can be too small to move the clock
+        clock.now = 0.0
+        ui.slow_print(PARAGRAPH, pause=False)
+
+    return op, 1
+
+
+def bench_get_valid_input(ctx):
+    ctx['stack'].enter_context(scripted_input(['maybe', 'save slot2', 'YES']))
+    handlers = {'save*': lambda line: None}
+    return (lambda: ui.get_valid_input('Enter? ', ['yes', 'no'], handlers)), 1
+
+
+def bench_shop_loop(ctx):
+    ctx['stack'].enter_context(scripted_input(SHOP_SCRIPT))
+    p = shopper()
+    return (lambda: ui.shop_loop(p, save_handler=lambda player, slot=None: None)), len(SHOP_SCRIPT)
+
+
+def bench_buy_use(ctx):
+    p = shopper()
+
+    def op():
+        ui.buy_from_slate(p, 0)
+        ui.use_item(p, 0)
+
+    return op, 1
+
+
+def bench_combat_odds(ctx):
+    return (lambda: combat.odds_for(9, 20, 9, 8, 12, 'optimal')), 1
+
+
+def bench_combat_odds_cold(ctx):
+    def op():
+        combat._state.cache_clear()
+        combat.odds_for(9, 20, 9, 8, 12, 'optimal')
+
+    return op, 1
+
+
+def _bench_save(n: int, fmt: str):
+    def bench(ctx):
+        p = player_with_items(n)
+        path = ctx['tmp'] / f'save_{fmt}_{n}.{"sav" if fmt == "binary" else "json"}'
+        return (lambda: save_player(p, path, fmt=fmt)), 1
+    return bench
+
+
+def _bench_load(n: int, fmt: str):
+    def bench(ctx):
+        path = ctx['tmp'] / f'load_{fmt}_{n}.{"sav" if fmt == "binary" else "json"}'
+        save_player(player_with_items(n), path, fmt=fmt)
+        return (lambda: load_player(path)), 1
+    return bench
+
+
+BENCHMARKS = {
+    'run_game_fast': bench_run_game_fast,
+    'slow_print': bench_slow_print,
+    'get_valid_input': bench_get_valid_input,
+    'shop_loop': bench_shop_loop,
+    'buy_use': bench_buy_use,
+    'combat_odds': bench_combat_odds,
+    'combat_odds_cold': bench_combat_odds_cold,
+}
+for _n in INVENTORY_SIZES:
+    for _fmt in ('json', 'binary'):
+        BENCHMARKS[f'save_{_fmt}_{_n}'] = _bench_save(_n, _fmt)
+        BENCHMARKS[f'load_{_fmt}_{_n}'] = _bench_load(_n, _fmt)
+
+
+def time_op(op, min_time: float = 0.05, repeat: int = 5) -> tuple:
+    """Return (best seconds per call of op, calls per run), growing the run until it takes min_time."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            op()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            op()
+        best = min(best, time.perf_counter() - started)
+    return best / number, number
+
+
+def run(names, min_time: float = 0.05, repeat: int = 5) -> dict:
+    """Run the named benchmarks; return a results dict (see compare)."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            with contextlib.ExitStack() as stack:
+                # the game and the shop print; none of that is being measured
+                stack.enter_context(contextlib.redirect_stdout(NullSink()))
+                op, ops = BENCHMARKS[name]({'stack': stack, 'tmp': Path(tmp)})
+                seconds, number = time_op(op, min_time, repeat)
+            results[name] = {'seconds_per_op': seconds / ops, 'ops_per_s': ops / seconds, 'calls_per_run': number}
+    return {
+        'version': RESULTS_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'results': results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Return (name, baseline s/op, current s/op, ratio) for every metric slower than
+    baseline * (1 + threshold). Metrics missing from either side are ignored."""
+    regressions = []
+    for name, now in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None or base['seconds_per_op'] <= 0:
+            continue
+        ratio = now['seconds_per_op'] / base['seconds_per_op']
+        if ratio > 1 + threshold:
+            regressions.append((name, base['seconds_per_op'], now['seconds_per_op'], ratio))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', help=f"benchmarks to run (default all): {', '.join(BENCHMARKS)}")
+    parser.add_argument('--output', metavar='FILE', help='write the results as JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='fraction slower than the baseline that counts as a regression (default 0.25)')
+    parser.add_argument('--min-time', type=float, default=0.05, help='seconds each timing run lasts at least')
+    parser.add_argument('--repeat', type=int, default=5, help='timing runs per benchmark (the best one counts)')
+    args = parser.parse_args(argv)
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+
+    current = run(args.names or list(BENCHMARKS), args.min_time, args.repeat)
+    base_results = baseline['results'] if baseline else {}
+    print(f"{'benchmark':<18} {'us/op':>10} {'ops/s':>11} {'vs base':>8}")
+    for name, r in current['results'].items():
+        base = base_results.get(name)
+        vs = f"{r['seconds_per_op'] / base['seconds_per_op']:>7.2f}x" if base else ''
+        print(f"{name:<18} {r['seconds_per_op'] * 1e6:>10.1f} {r['ops_per_s']:>11.0f} {vs:>8}")
+    if args.output:
+        Path(args.output).write_text(json.dumps(current, indent=2) + '\n')
+
+    if baseline is None:
+        return 0
+    regressions = compare(current, baseline, args.threshold)
+    for name, base, now, ratio in regressions:
+        print(f"REGRESSION {name}: {base * 1e6:.1f} -> {now * 1e6:.1f} us/op ({ratio:.2f}x)")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""Content-addressed save backups with a retention policy.
+
+FileSaveStore keeps the previous version of a slot here instead of as one
+``.bak`` file per save. The layout under a backup root (``.backups`` next to
+the save files)::
+
+    objects/ab/abcdef...   zlib-compressed file contents, named by SHA-256
+    history/<slot file>    one JSON line per backup: {"hash": ..., "at": ...}
+    lock                   flock()ed around every history update and gc
+
+A state saved many times is stored once, and a backup identical to the one
+before it adds no history line. After each backup the slot's history is
+thinned by the RetentionPolicy. Objects no history points at any more are
+removed by gc(), which scans every history and so runs only every gc_every
+prunes that dropped something.
+
+Several processes (forked server workers, say) can share one backup root:
+history updates and gc hold an exclusive lock on the lock file, and gc never
+removes an object written or reused within the last gc_grace seconds. Where
+fcntl is missing (Windows) there is no lock and only the grace period applies.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - platform dependent
+    fcntl = None
+
+BACKUP_DIR = '.backups'
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    """Which backups survive pruning: the newest keep_last, plus the newest one in
+    each of the last `hourly` hours and each of the last `daily` days."""
+    keep_last: int = 10
+    hourly: int = 24
+    daily: int = 7
+
+    def select(self, entries: list, now: float) -> list:
+        """Return the entries (oldest first, each with an 'at' time) to keep."""
+        keep = set(range(max(0, len(entries) - self.keep_last), len(entries)))
+        for period, count in ((3600, self.hourly), (86400, self.daily)):
+            seen = set()
+            for i in range(len(entries) - 1, -1, -1):
+                bucket = int(entries[i]['at'] // period)
+                if bucket in seen or bucket <= int(now // period) - count:
+                    continue
+                seen.add(bucket)
+                keep.add(i)
+        return [e for i, e in enumerate(entries) if i in keep]
+
+
+class BackupStore:
+    def __init__(self, root: str | Path, policy: Optional[RetentionPolicy] = None, gc_every: int = 20,
+                 gc_grace: float = 3600.0):
+        self.root = Path(root)
+        self.policy = policy or RetentionPolicy()
+        self.gc_every = max(1, gc_every)
+        # seconds an object is safe from gc after it was written or reused
+        self.gc_grace = gc_grace
+        self._dropped = 0
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the root's lock file exclusively (across processes) for the with block."""
+        if fcntl is None:
+            yield
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / 'lock', 'a+b') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _object(self, digest: str) -> Path:
+        return self.root / 'objects' / digest[:2] / digest
+
+    def _history_file(self, name: str) -> Path:
+        return self.root / 'history' / name
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + f'.{os.getpid()}.tmp')
+        tmp.write_bytes(data)
+        tmp.replace(path)
+
+    def add(self, name: str, data: bytes, at: Optional[float] = None) -> str:
+        """Back up data as the newest version of the file called name; return its hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        obj = self._object(digest)
+        with self._locked():
+            try:
+                # reusing an object restarts its grace period
+                os.utime(obj)
+            except FileNotFoundError:
+                self._write_atomic(obj, zlib.compress(data, 6))
+            entries = self.history(name)
+            if not entries or entries[-1]['hash'] != digest:
+                entries.append({'hash': digest, 'at': time.time() if at is None else at})
+                kept = self.policy.select(entries, entries[-1]['at'])
+                self._save_history(name, kept)
+                if len(kept) < len(entries):
+                    self._dropped += 1
+                    if self._dropped >= self.gc_every:
+                        self._gc()
+        return digest
+
+    def history(self, name: str) -> list:
+        """Return the backups of name, oldest first, as {'hash', 'at'} dicts."""
+        try:
+            lines = self._history_file(name).read_text(encoding='utf-8').splitlines()
+        except FileNotFoundError:
+            return []
+        return [json.loads(line) for line in lines if line.strip()]
+
+    def _save_history(self, name: str, entries: list) -> None:
+        text = ''.join(json.dumps(e, separators=(',', ':')) + '\n' for e in entries)
+        self._write_atomic(self._history_file(name), text.encode('utf-8'))
+
+    def read(self, digest: str) -> bytes:
+        return zlib.decompress(self._object(digest).read_bytes())
+
+    def gc(self) -> int:
+        """Remove objects no history refers to and older than gc_grace; return how many were removed."""
+        with self._locked():
+            return self._gc()
+
+    def _gc(self) -> int:
+        self._dropped = 0
+        hist_dir = self.root / 'history'
+        live = set()
+        if hist_dir.exists():
+            for h in hist_dir.iterdir():
+                if not h.name.endswith('.tmp'):
+                    live.update(e['hash'] for e in self.history(h.name))
+        removed = 0
+        cutoff = time.time() - self.gc_grace
+        obj_dir = self.root / 'objects'
+        if obj_dir.exists():
+            for obj in obj_dir.glob('*/*'):
+                if obj.name in live or obj.name.endswith('.tmp'):
+                    continue
+                try:
+                    if obj.stat().st_mtime > cutoff:
+                        continue
+                except FileNotFoundError:
+                    continue
+                obj.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def disk_usage(self) -> int:
+        """Bytes used by stored objects."""
+        obj_dir = self.root / 'objects'
+        return sum(p.stat().st_size for p in obj_dir.glob('*/*')) if obj_dir.exists() else 0
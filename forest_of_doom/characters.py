@@ -0,0 +1,116 @@
+"""Characters in bulk: vectorised stat rolls and exact stat distributions.
+
+generate_stats rolls one player at a time. generate_batch rolls N at once into
+a structured NumPy array (skill, stamina, luck, potion) from a seeded
+numpy.random.Generator, so the same seed always gives the same characters;
+iter_batches does the same in chunks for counts that shouldn't be in memory at
+once. NumPy is optional and only these two need it; install it with
+``pip install numpy`` (or the ``batch`` extra, ``poetry install -E batch``).
+Without it they raise ImportError.
+
+The distribution tables need nothing: each stat is a sum of six-sided dice
+plus a base, so its distribution is computed exactly (as Fractions) when the
+module is imported. distribution(), percentile() and quantile() look things
+up in them without sampling.
+"""
+from fractions import Fraction
+from typing import Dict, Iterator, Optional
+
+from .models import LUCK_BASE, SKILL_BASE, STAMINA_BASE, Player
+
+try:  # optional; only generate_batch and iter_batches need it
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+# stat -> (number of d6 rolled, base added), as in models.generate_stats
+STAT_DICE = {
+    'skill': (1, SKILL_BASE),
+    'stamina': (2, STAMINA_BASE),
+    'luck': (1, LUCK_BASE),
+}
+# potion codes in the batch array, in the binary save format's order
+POTIONS = (None, 'skill', 'strength', 'fortune')
+# the Potion of Fortune adds 1 to initial luck when it is chosen
+FORTUNE_LUCK = 1
+
+CHARACTER_DTYPE = [('skill', 'i1'), ('stamina', 'i1'), ('luck', 'i1'), ('potion', 'u1')]
+
+
+def _dice_table(dice: int, base: int) -> Dict[int, Fraction]:
+    table = {0: Fraction(1)}
+    for _ in range(dice):
+        rolled: Dict[int, Fraction] = {}
+        for total, p in table.items():
+            for face in range(1, 7):
+                rolled[total + face] = rolled.get(total + face, 0) + p / 6
+        table = rolled
+    return {total + base: p for total, p in sorted(table.items())}
+
+
+_TABLES = {stat: _dice_table(*spec) for stat, spec in STAT_DICE.items()}
+
+
+def distribution(stat: str, potion: Optional[str] = None) -> Dict[int, Fraction]:
+    """Exact probability of each value of stat for a new character who took potion."""
+    table = _TABLES[stat]
+    if stat == 'luck' and potion == 'fortune':
+        return {v + FORTUNE_LUCK: p for v, p in table.items()}
+    return dict(table)
+
+
+def percentile(stat: str, value: int, potion: Optional[str] = None) -> Fraction:
+    """Probability that a new character's stat is value or lower."""
+    return sum((p for v, p in distribution(stat, potion).items() if v <= value), Fraction(0))
+
+
+def quantile(stat: str, q: float, potion: Optional[str] = None) -> int:
+    """The lowest value of stat that at least a fraction q of new characters are at or below."""
+    total = Fraction(0)
+    table = distribution(stat, potion)
+    for value, p in table.items():
+        total += p
+        if total >= q:
+            return value
+    return max(table)
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError('Rolling characters in bulk needs NumPy (pip install numpy)')
+
+
+def generate_batch(n: int, seed=None, potion: Optional[str] = None):
+    """Roll n characters as a CHARACTER_DTYPE array.
+
+    seed is an int (or None) for numpy.random.default_rng, or a Generator to
+    draw from. potion is None, one of the potion names for every character, or
+    'random' for an even pick of the three potions a player is offered.
+    """
+    _require_numpy()
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    dice = rng.integers(1, 7, size=(4, n), dtype=np.int8)
+    out = np.empty(n, dtype=CHARACTER_DTYPE)
+    out['skill'] = dice[0] + SKILL_BASE
+    out['stamina'] = dice[1] + dice[2] + STAMINA_BASE
+    out['luck'] = dice[3] + LUCK_BASE
+    if potion == 'random':
+        out['potion'] = rng.integers(1, len(POTIONS), size=n, dtype=np.uint8)
+    else:
+        out['potion'] = POTIONS.index(potion)
+    out['luck'] += (out['potion'] == POTIONS.index('fortune')) * np.int8(FORTUNE_LUCK)
+    return out
+
+
+def iter_batches(n: int, seed=None, potion: Optional[str] = None, chunk: int = 1_000_000) -> Iterator:
+    """Yield n characters as arrays of up to chunk, all drawn from one Generator for seed."""
+    _require_numpy()
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+    for start in range(0, n, chunk):
+        yield generate_batch(min(chunk, n - start), rng, potion)
+
+
+def to_players(batch) -> list:
+    """Player objects for the rows of a batch (for handing a few to the game)."""
+    return [Player(skill=int(row['skill']), stamina=int(row['stamina']), luck=int(row['luck']),
+                   potion=POTIONS[row['potion']]) for row in batch]
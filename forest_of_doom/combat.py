@@ -0,0 +1,241 @@
+"""Fighting Fantasy combat, and its exact odds.
+
+A round: both sides roll 2d6 and add their SKILL (the attack strength); the
+higher one wounds the other for 2 STAMINA, and a tie wounds nobody. After a
+wound the player may Test their Luck (2d6 at or under LUCK is lucky; LUCK goes
+down by 1 either way): a lucky wound to the monster does 4 instead of 2, an
+unlucky one 1; a lucky wound to the player does 1, an unlucky one 3. The fight
+ends when either side's STAMINA reaches 0.
+
+Combat runs a fight on a models.Player and a Monster. odds() computes, for a
+luck policy, the probability of winning, the expected STAMINA left and the
+expected number of rounds by dynamic programming over (player stamina, monster
+stamina, luck); every state is memoised, so repeat queries for the same skills
+are dictionary lookups. Luck policies:
+
+* never     - never test luck
+* attack    - test after wounding the monster, unless the wound kills anyway
+* defend    - test after being wounded
+* always    - both
+* optimal   - test whenever it raises the chance of winning
+"""
+import functools
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+from .luck import luck_chance as _exact_luck_chance
+from .models import Player
+
+POLICIES = ('never', 'attack', 'defend', 'always', 'optimal')
+WOUND = 2
+LUCKY_HIT, UNLUCKY_HIT = 4, 1
+LUCKY_WOUND, UNLUCKY_WOUND = 1, 3
+
+
+def _two_dice() -> dict:
+    return {total: (6 - abs(total - 7)) / 36 for total in range(2, 13)}
+
+
+_2D6 = _two_dice()
+# P(player's 2d6 - monster's 2d6 == d)
+_DIFF = {}
+for _a, _pa in _2D6.items():
+    for _b, _pb in _2D6.items():
+        _DIFF[_a - _b] = _DIFF.get(_a - _b, 0.0) + _pa * _pb
+
+
+@functools.lru_cache(maxsize=None)
+def round_odds(player_skill: int, monster_skill: int) -> tuple:
+    """(P(player wounds monster), P(monster wounds player), P(tie)) for one round."""
+    edge = player_skill - monster_skill
+    win = sum(p for d, p in _DIFF.items() if d + edge > 0)
+    lose = sum(p for d, p in _DIFF.items() if d + edge < 0)
+    return win, lose, 1.0 - win - lose
+
+
+def luck_chance(luck: int) -> float:
+    """Probability that a Luck test with this LUCK is lucky (luck.luck_chance as a float)."""
+    return float(_exact_luck_chance(luck))
+
+
+@dataclass(frozen=True)
+class Monster:
+    name: str
+    skill: int
+    stamina: int
+
+
+@dataclass(frozen=True)
+class Odds:
+    win: float
+    # the player's STAMINA at the end, counting a lost fight as 0
+    expected_stamina: float
+    expected_rounds: float
+
+    @property
+    def expected_stamina_if_won(self) -> float:
+        return self.expected_stamina / self.win if self.win else 0.0
+
+
+@dataclass(frozen=True)
+class Round:
+    player_strength: int
+    monster_strength: int
+    # 'player', 'monster' or None for a tie
+    wounded: Optional[str]
+    damage: int = 0
+    # None if luck wasn't tested
+    lucky: Optional[bool] = None
+
+
+# --- Exact odds -----------------------------------------------------------------
+
+def _combine(parts) -> tuple:
+    """Weighted sum of (win, stamina, rounds) values."""
+    win = stamina = rounds = 0.0
+    for p, (w, s, r) in parts:
+        win += p * w
+        stamina += p * s
+        rounds += p * r
+    return win, stamina, rounds
+
+
+def _value(ps: int, ms: int, luck: int, skills: tuple, policy: str) -> tuple:
+    if ms <= 0:
+        return 1.0, float(ps), 0.0
+    if ps <= 0:
+        return 0.0, 0.0, 0.0
+    return _state(ps, ms, luck, skills, policy)
+
+
+def _after_hit(ps: int, ms: int, luck: int, skills: tuple, policy: str, test: bool) -> tuple:
+    if not test:
+        return _value(ps, ms - WOUND, luck, skills, policy)
+    q = luck_chance(luck)
+    return _combine(((q, _value(ps, ms - LUCKY_HIT, luck - 1, skills, policy)),
+                     (1 - q, _value(ps, ms - UNLUCKY_HIT, luck - 1, skills, policy))))
+
+
+def _after_wound(ps: int, ms: int, luck: int, skills: tuple, policy: str, test: bool) -> tuple:
+    if not test:
+        return _value(ps - WOUND, ms, luck, skills, policy)
+    q = luck_chance(luck)
+    return _combine(((q, _value(ps - LUCKY_WOUND, ms, luck - 1, skills, policy)),
+                     (1 - q, _value(ps - UNLUCKY_WOUND, ms, luck - 1, skills, policy))))
+
+
+def _choose(after, ps: int, ms: int, luck: int, skills: tuple, policy: str, wants: bool) -> tuple:
+    if policy == 'optimal':
+        plain = after(ps, ms, luck, skills, policy, False)
+        if luck <= 0:
+            return plain
+        tested = after(ps, ms, luck, skills, policy, True)
+        return tested if tested[0] > plain[0] else plain
+    return after(ps, ms, luck, skills, policy, wants and luck > 0)
+
+
+@functools.lru_cache(maxsize=1 << 20)
+def _state(ps: int, ms: int, luck: int, skills: tuple, policy: str) -> tuple:
+    win, lose, tie = round_odds(*skills)
+    hit = _choose(_after_hit, ps, ms, luck, skills, policy,
+                  policy in ('attack', 'always') and (policy == 'always' or ms > WOUND))
+    wound = _choose(_after_wound, ps, ms, luck, skills, policy, policy in ('defend', 'always'))
+    # a tie leaves the state as it was, so only decisive rounds count (plus the ties before them)
+    w, s, r = _combine(((win, hit), (lose, wound)))
+    decisive = win + lose
+    return w / decisive, s / decisive, (1 + r) / decisive
+
+
+def odds_for(player_skill: int, player_stamina: int, player_luck: int, monster_skill: int, monster_stamina: int,
+             policy: str = 'never') -> Odds:
+    """Exact odds of a fight from these numbers with the given luck policy."""
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown luck policy {policy!r}; choose from {', '.join(POLICIES)}")
+    win, stamina, rounds = _value(player_stamina, monster_stamina, max(0, player_luck),
+                                  (player_skill, monster_skill), policy)
+    return Odds(win, stamina, rounds)
+
+
+def odds(player: Player, monster: Monster, policy: str = 'never', monster_stamina: Optional[int] = None) -> Odds:
+    """Exact odds of player beating monster (at monster_stamina, if it is already wounded)."""
+    stamina = monster.stamina if monster_stamina is None else monster_stamina
+    return odds_for(player.skill, player.stamina, player.luck, monster.skill, stamina, policy)
+
+
+def cache_info():
+    """Memo statistics for the odds calculator."""
+    return _state.cache_info()
+
+
+# --- Fighting -------------------------------------------------------------------
+
+class Combat:
+    """A fight between player and monster; round() plays one, fight() plays it out.
+
+    The player's STAMINA and LUCK change as the fight goes on; the monster's
+    STAMINA is kept here, since Monster stat blocks are shared.
+    """
+
+    def __init__(self, player: Player, monster: Monster, rng=None):
+        self.player = player
+        self.monster = monster
+        self.monster_stamina = monster.stamina
+        self.rng = rng or random
+        self.rounds: list = []
+
+    @property
+    def winner(self) -> Optional[str]:
+        if self.monster_stamina <= 0:
+            return 'player'
+        if self.player.stamina <= 0:
+            return 'monster'
+        return None
+
+    def odds(self, policy: str = 'never') -> Odds:
+        return odds(self.player, self.monster, policy, self.monster_stamina)
+
+    def _roll(self) -> int:
+        return self.rng.randint(1, 6) + self.rng.randint(1, 6)
+
+    def _wants_luck(self, luck, hit: bool) -> bool:
+        p = self.player
+        if isinstance(luck, bool):
+            return luck and p.luck > 0
+        if luck == 'optimal':
+            after = _after_hit if hit else _after_wound
+            args = (p.stamina, self.monster_stamina, p.luck, (p.skill, self.monster.skill), 'optimal')
+            return p.luck > 0 and after(*args, True)[0] > after(*args, False)[0]
+        if hit:
+            return p.luck > 0 and (luck == 'always' or (luck == 'attack' and self.monster_stamina > WOUND))
+        return p.luck > 0 and luck in ('defend', 'always')
+
+    def round(self, luck=False) -> Round:
+        """Play one round. luck is True/False (test after any wound) or a luck policy name."""
+        if self.winner is not None:
+            raise ValueError('The fight is over')
+        p = self.player
+        mine = self._roll() + p.skill
+        theirs = self._roll() + self.monster.skill
+        if mine == theirs:
+            result = Round(mine, theirs, None)
+        else:
+            hit = mine > theirs
+            lucky = None
+            if self._wants_luck(luck, hit):
+                lucky = p.test_luck(self.rng)
+            if hit:
+                damage = WOUND if lucky is None else (LUCKY_HIT if lucky else UNLUCKY_HIT)
+                self.monster_stamina -= damage
+            else:
+                damage = WOUND if lucky is None else (LUCKY_WOUND if lucky else UNLUCKY_WOUND)
+                p.stamina -= damage
+            result = Round(mine, theirs, 'monster' if hit else 'player', damage, lucky)
+        self.rounds.append(result)
+        return result
+
+    def fight(self, luck='never') -> str:
+        """Play rounds until someone wins; return 'player' or 'monster'."""
+        while self.winner is None:
+            self.round(luck)
+        return self.winner
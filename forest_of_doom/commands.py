@@ -0,0 +1,168 @@
+"""Command grammars compiled into a prefix trie.
+
+A Grammar is declared once from spec strings and shared by every prompt that
+uses it::
+
+    SHOP = Grammar('list', 'buy <index:int>', 'save [slot]', 'exit', prefixes=True)
+    SHOP.parse('buy 3')    # -> Match(name='buy', args={'index': 3}, text='buy 3')
+    SHOP.parse('li')       # unambiguous prefixes work too -> Match(name='list', ...)
+
+Command words must be typed in full unless the grammar is built with
+prefixes=True. Only grammars whose commands can all be taken back (the shop)
+should allow prefixes: at a story choice a single 'n' or 'a' would commit to
+'no' or 'attack'.
+
+Spec syntax: the command word, then ``<name>`` for a required argument or
+``[name]`` for an optional one; ``:int`` converts the value. A trailing string
+argument takes the rest of the line, so ``save my slot`` gives slot='my slot'.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+_TYPES = {'int': int, 'str': str}
+
+
+class CommandError(ValueError):
+    """The line didn't match the grammar; str(error) is the message for the player."""
+
+
+class UnknownCommandError(CommandError):
+    """The command word isn't in the grammar (or the line was empty)."""
+
+
+@dataclass(frozen=True)
+class Arg:
+    name: str
+    type: Callable[[str], Any] = str
+    required: bool = True
+
+    @property
+    def usage(self) -> str:
+        return f"<{self.name}>" if self.required else f"[{self.name}]"
+
+
+@dataclass(frozen=True)
+class Command:
+    name: str
+    args: tuple = ()
+
+    @property
+    def usage(self) -> str:
+        return ' '.join([self.name] + [a.usage for a in self.args])
+
+
+class Match(NamedTuple):
+    name: str
+    args: Dict[str, Any]
+    text: str
+
+
+def parse_spec(spec: str) -> Command:
+    """Parse a spec such as 'buy <index:int>' into a Command."""
+    word, *rest = spec.split()
+    args = []
+    for token in rest:
+        required = token.startswith('<') and token.endswith('>')
+        if not required and not (token.startswith('[') and token.endswith(']')):
+            raise ValueError(f"Bad argument {token!r} in command spec {spec!r}")
+        name, _, type_name = token[1:-1].partition(':')
+        args.append(Arg(name, _TYPES[type_name or 'str'], required))
+    return Command(word.lower(), tuple(args))
+
+
+class _Node:
+    __slots__ = ('children', 'command', 'below')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        self.command: Optional[Command] = None
+        # every command whose word passes through this node, for prefix lookups
+        self.below: list = []
+
+
+class Grammar:
+    """A set of commands compiled into a character trie for prefix dispatch."""
+
+    def __init__(self, *specs: str, prefixes: bool = False):
+        self.commands = tuple(parse_spec(s) for s in specs)
+        # whether an unambiguous prefix of a command word stands for the word
+        self.prefixes = prefixes
+        self._root = _Node()
+        for cmd in self.commands:
+            node = self._root
+            node.below.append(cmd)
+            for ch in cmd.name:
+                node = node.children.setdefault(ch, _Node())
+                node.below.append(cmd)
+            node.command = cmd
+
+    @property
+    def names(self) -> list:
+        return [c.name for c in self.commands]
+
+    def lookup(self, word: str) -> Command:
+        """Resolve a command word: an exact name, or an unambiguous prefix of one if allowed."""
+        node = self._root
+        for ch in word:
+            node = node.children.get(ch)
+            if node is None:
+                raise UnknownCommandError(f"Please choose one of: {', '.join(self.names)}")
+        if node.command is not None:
+            return node.command
+        if not self.prefixes:
+            raise UnknownCommandError(f"Please choose one of: {', '.join(self.names)}")
+        if len(node.below) == 1:
+            return node.below[0]
+        raise CommandError(f"'{word}' could be: {', '.join(c.name for c in node.below)}")
+
+    def parse(self, line: str) -> Match:
+        """Parse one input line, raising CommandError with a player-facing message."""
+        text = line.strip()
+        if not text:
+            raise UnknownCommandError(f"Please choose one of: {', '.join(self.names)}")
+        word, _, rest = text.partition(' ')
+        cmd = self.lookup(word.lower())
+        rest = rest.strip()
+        args: Dict[str, Any] = {}
+        for i, arg in enumerate(cmd.args):
+            last = i == len(cmd.args) - 1
+            if last and arg.type is str:
+                value, rest = rest, ''
+            else:
+                value, _, rest = rest.partition(' ')
+                rest = rest.strip()
+            if not value:
+                if arg.required:
+                    raise CommandError(f"Usage: {cmd.usage}")
+                args[arg.name] = None
+                continue
+            try:
+                args[arg.name] = arg.type(value)
+            except ValueError:
+                raise CommandError(f"Invalid {arg.name}") from None
+        if rest:
+            raise CommandError(f"Usage: {cmd.usage}")
+        return Match(cmd.name, args, text)
+
+
+def route(grammar: Grammar, line: str, handlers: Optional[Dict[str, Callable[..., Any]]] = None,
+          out: Callable[[str], Any] = print) -> Optional[Match]:
+    """Parse line and run the handler registered for its command.
+
+    Returns the Match when the command has no handler (the caller acts on it),
+    or None when a handler ran or the line was rejected (the message goes to out).
+    Handlers are called with the parsed arguments as keyword arguments.
+    """
+    try:
+        match = grammar.parse(line)
+    except CommandError as e:
+        out(str(e))
+        return None
+    handler = (handlers or {}).get(match.name)
+    if handler is None:
+        return match
+    try:
+        handler(**match.args)
+    except Exception as e:
+        out(f"Handler for '{match.name}' raised an error: {e}")
+    return None
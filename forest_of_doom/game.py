@@ -1,227 +1,283 @@
-from .models import Player, generate_stats
-from .ui import slow_print, get_valid_input, display_status, shop_loop
+from dataclasses import dataclass, field
+from typing import Optional
+
+from . import scenes
+from .models import Player, generate_stats, player_to_dict, player_from_dict
+from .commands import Grammar, Match, route
+from .items import YAZTROMO_SLATE, CatalogView, items_to_list
+from .profiling import untimed
+from .scenes import Section
+from .ui import (slow_print, ask, display_status, shop_loop, StatusPanel, read_input,
+                 status_lines, shop_command, purchase_prompt, confirm_purchase)
 import random
 
 
-# Game content functions (text preserved from original file)
-def display_intro(player: Player, fast: bool = False, save_handler=None, load_handler=None) -> bool:
-    slow_print('''Only the foolhardy or the very brave would willingly risk a journey into Darkwood Forest, where strange, twisting paths wind their way into the eerie depths. 
-Who knows what monstrous creatures lurk in the threatening shadows, or what deadly adventure await the unwary traveller.''', fast=fast, pause=not fast)
-    handlers = {}
-    if save_handler is not None:
-        # support 'save' and 'save <slot>' prefix
-        handlers['save'] = lambda _: save_handler(player, slot=None)
-        handlers['save*'] = lambda text: save_handler(player, slot=text[len('save'):].strip() or None)
-    if load_handler is not None:
-        handlers['load'] = lambda _: load_handler(player, slot=None)
-        handlers['load*'] = lambda text: load_handler(player, slot=text[len('load'):].strip() or None)
-    choice = get_valid_input("You dare enter (yes/no) (or type 'save'/'save <slot>'/'load'/'load <slot>'): ", ['yes', 'no'], special_handlers=handlers)
-    if choice == 'yes':
-        slow_print('''In a desperate race against time, deep within Darkwood, your quest is to find the missing pieces of the legendary Hammer of Stonebridge, which was fashioned by dwarfs to protect peaceful Stonebridge against its ancient doom.
-
-Many dangers lie ahead and your success is by no means certain. Powerful adversaries are ranged against you and often your only choice is to kill or be killed.
-
-You have in your possession a sword and backpack containing provisions for the trip.''', fast=fast)
+SHOP_PROMPT = 'shop> '
+
+
+def yaztromo_slate() -> CatalogView:
+    """Return the items Yaztromo writes on his slate.
+
+    This is items.YAZTROMO_SLATE, a read-only view over the shared catalog, so
+    every player can hold the same object. Prices: default 3 gold. Exceptions
+    (2 gold): Potion of Plant Control, Potion of Insect Control, Potion of
+    Anti-Poison, Boots of Leaping, Glove of Missile Dexterity, Rod of
+    Water-finding, Garlic Buds.
+    """
+    return YAZTROMO_SLATE
+
+
+def _slot_command(match: Match, player: Player, save_handler=None, load_handler=None) -> bool:
+    """Run 'save [slot]'/'load [slot]'; return True if match was one of them."""
+    if match.name == 'save':
+        if save_handler is not None:
+            save_handler(player, slot=match.args['slot'])
         return True
-    else:
-        slow_print('Thank you for playing!', fast=fast)
-        return False
+    if match.name == 'load':
+        if load_handler is not None:
+            load_handler(player, slot=match.args['slot'])
+        return True
+    return False
+
+
+def _choose(prompt: str, grammar: Grammar, player: Player, save_handler=None, load_handler=None) -> str:
+    """Blocking prompt: handle save/load in place and return the chosen option."""
+    while True:
+        match = ask(prompt, grammar)
+        if not _slot_command(match, player, save_handler, load_handler):
+            return match.name
+
+
+def _show(section_id: str, player: Player, fast: bool = False, choice: Optional[str] = None) -> Section:
+    """Print one section's text the blocking way (the scene functions below don't follow @next)."""
+    sec = scenes.section(section_id)
+    state = SessionState(player=player, fast=fast)
+    for kind, value in sec.blocks:
+        if kind == 'action':
+            ACTIONS[value](state, choice)
+        elif kind == 'status':
+            display_status(player)
+        elif kind == 'blank':
+            print()
+        elif kind == 'text':
+            print(value)
+        else:
+            slow_print(_fill(kind, value, player), fast=fast)
+    return sec
+
+
+def _prompt(section_id: str, player: Player, save_handler=None, load_handler=None) -> str:
+    sec = scenes.section(section_id)
+    return _choose(sec.prompt, sec.grammar, player, save_handler, load_handler)
+
+
+def display_intro(player: Player, fast: bool = False, save_handler=None, load_handler=None) -> bool:
+    _show('intro', player, fast)
+    choice = _prompt('enter', player, save_handler, load_handler)
+    _show(scenes.section('enter').target(choice), player, fast)
+    return choice == 'yes'
 
 
 def choose_potion(player: Player, fast: bool = False, save_handler=None, load_handler=None) -> None:
-    slow_print('''You are armed with a sword and dressed in leather armour. You may choose to take a bottle of any of the following potions:
-
-Potion of Skill - restores SKILL points
-Potion of Strength - restores STAMINA
-Potion of Fortune - restores LUCK and adds 1 initial LUCK''', fast=fast)
-    handlers = {}
-    if save_handler is not None:
-        handlers['save'] = lambda _: save_handler(player, slot=None)
-        handlers['save*'] = lambda text: save_handler(player, slot=text[len('save'):].strip() or None)
-    if load_handler is not None:
-        handlers['load'] = lambda _: load_handler(player, slot=None)
-        handlers['load*'] = lambda text: load_handler(player, slot=text[len('load'):].strip() or None)
-    potion = get_valid_input("Which potion do you wish to choose? (skill, strength, fortune) (or type 'save'/'save <slot>'/'load'/'load <slot>'): ",
-                            ['skill', 'strength', 'fortune'], special_handlers=handlers)
-    player.potion = potion
-    if potion == 'fortune':
-        player.luck += 1  # Increase initial Luck by 1
-    slow_print(f'A potion of {potion} has been added to your pack.', fast=fast)
+    _show('potion', player, fast)
+    potion = _prompt('potion', player, save_handler, load_handler)
+    _show('potion_taken', player, fast, choice=potion)
 
 
 def display_background(player: Player, fast: bool = False) -> None:
-    slow_print('''BACKGROUND:
-You are an adventurer, a sword for hire, and have been roaming the northern borderlands of your kingdom. 
-Having always spurned the dullness of village life, you now wander the lands in search of wealth and danger.
-Despite the long walks and rough outdoor life, you are content with your unknown destiny. The world holds no fears
-for you as you are a skillful warrior, well practiced in the art of slaying evil men and beasts with your trusty sword.
-Not once during the last 10 days since entering the northern borderlands have you set eyes upon another person.
-This does not worry you at all, as you are happy with your own company and enjoy the slow, sunny days hunting, eating, and sleeping.''', fast=fast)
-    print()
-    slow_print('''It is evening, and having feasted on a dinner of rabbit, spit-roasted on an open fire, you settle down
-to sleep beneath your sheepskin blanket. There's a full moon, and the light sparkles on the blade of
-your broadsword, skewered into the ground by your side. You gaze at it, wondering when you will next
-have to wipe the blood of some vile creature from its sharp edge. These are strange lands, inhabited by
-twisted and loathsome beasts  ã goblins, trolls, and even dragons.''', fast=fast)
-    print()
-    slow_print('''As the flame of your campfire gently dies, you begin to drift asleep, and images of screaming,
-green-faced trolls flicker through your mind.
-
-Suddenly, in the bushes to your left, you hear the loud crack of a twig breaking under a clumsy foot. You
-leap up and grab your sword from the ground. You stand motionless but alert, ready to pounce on your
-unseen adversary.
-
-Then you hear a groan, followed by the dull thud of a body falling to the ground. Is it
-a trap? Slowly, you walk over to the bush where the noise is coming from and carefully pull back the
-branches.
-
-You look down to see a little old man with a great bushy beard, his face contorted with pain.
-You crouch down to remove the iron helmet covering his balding head and notice two crossbow bolts
-protruding from the stomach of his plump, chainmail-clad torso.
-
-Picking him up, you carry him over to the fire and stir the dying embers into life. After
-covering him with the sheepskin blanket, you manage to get the old man to drink a little water. He
-coughs and moans. He sits up rigid, eyes staring fixedly ahead, and starts to shout:
-
-"I'll get them! Get them! Don't you fear, Gillibran,
-Bigleg is coming to bring you the hammer. Oh yes,
-indeed I am. Oh yes..."
-
-The dwarf, whose name you presume to be Bigleg, is obviously delirious from the poison-tipped bolts
-lodged in his stomach. You watch as he slumps down again to the ground, then whisper his name
-in his ear. His eyes stare unblinkingly at you as he again starts to shout.''', fast=fast)
-    print()
-    slow_print('''"Ambush! Look out! Ambush! Aagh! The hammer!
-Take the hammer to Gillibran! Save the dwarfs!"
-
-His eyes half-close, and the pain seems to ease a little. As the delirium subsides, he speaks to you again
-in a low whisper:
-
-"Help us, friend... take the hammer to Gillibran...
-only the hammer will unite our people against
-the trolls... We were on our way to Darkwood in
-search of the hammer... ambushed by the little
-people... others died... the map in my pouch
-will take you to the home of Yaztromo, the master
-mage of these parts... he has great magics for sale
-to protect you against the creatures of Darkwood...
-take my gold... I beg you to find the hammer
-and take it to Gillibran, my Lord of Stonebridge.
-You will be well rewarded..."
-
-Bigleg opens his mouth to start another sentence, but nothing comes out except his last dying breath.
-
-You sit down and ponder Bigleg's words. Who is Gillibran? Who is Yaztromo?
-What is all the fuss about the dwarfish hammer?
-
-You reach over to the still body of Bigleg and remove the pouch from the leather belt around his waist.
-Inside, you find 10 Gold Pieces and a map.
-
-Jingling the coins in your hand, you think of the possible rewards which may await you just for
-returning a hammer to a village of dwarfs. You decide to try to find the hammer in Darkwood
-Forest  ˜ it's been a few weeks since your last good battle, and, what is more, you are likely to be well
-paid for this one.
-
-With your mind made up, you settle down to sleep, having taken back the sheepskin blanket from poor
-Bigleg. In the morning, you bury the old dwarf and gather up your possessions. You examine the
-map, look up to the sun, and find your bearings. Whistling merrily, you head off south at a good
-pace, eager to meet this man Yaztromo and see what he has to offer.''', fast=fast)
-    print()
-    slow_print(f'You have added {player.backpack["gold"]} Gold and a map to your backpack.', fast=fast)
-
-
-def yaztromo_intro(player: 'Player', fast: bool = False, save_handler=None, load_handler=None) -> str:
-    slow_print('''Your walk to Yaztromo's takes a little over half a day, and you arrive at his stone tower home dirty
-and hungry. As the tower is set back on the edges of Darkwood, some fifty metres away from the path you have been following, it is difficult to find.
-
-Finally, you walk up to the huge oak door, somewhat relieved to find that it does exist and that
-Bigleg had not been speaking wildly in his delirium.
-
-A large brass bell and gong hang from the stone archway. As you ring the bell, a shiver runs down
-your spine and you realize that the loud bong invades a deep silence which you had not noticed
-before. There are no sounds of birds or animals to be heard.
-
-You wait anxiously at the door and hear slow footsteps descending stairs from the tower above.
-A small wooden slot in the door slides open, and two eyes appear and examine you.
-
-"Well, who are you?" demands a grumpy voice through the hole.
-
-You answer that you are an adventurer in search of the master mage Yaztromo, intending to purchase
-magical items from him to combat the creatures of Darkwood Forest.
-
-"Oh! Well, in that case, if you are interested in buying
-some of my merchandise, you'd better come up. I
-am Yaztromo."''', fast=fast)
-    print()
-    slow_print("He then turns and slowly climbs the stone stairs.", fast=fast, pause=not fast)
-    handlers = {}
-    if save_handler is not None:
-        handlers['save'] = lambda _: save_handler(player, slot=None)
-        handlers['save*'] = lambda text: save_handler(player, slot=text[len('save'):].strip() or None)
-    if load_handler is not None:
-        handlers['load'] = lambda _: load_handler(player, slot=None)
-        handlers['load*'] = lambda text: load_handler(player, slot=text[len('load'):].strip() or None)
-    choice = get_valid_input("Will you:\nFollow him up the stairs?\nDraw your sword and attack him\n(follow/attack): (or type 'save'/'save <slot>'/'load'/'load <slot>') ", ['follow', 'attack'], special_handlers=handlers)
+    _show('background', player, fast)
+
+
+def yaztromo_intro(player: 'Player', fast: bool = False, save_handler=None, load_handler=None, panel=None) -> str:
+    _show('yaztromo', player, fast)
+    choice = _prompt('yaztromo', player, save_handler, load_handler)
     if choice == 'follow':
-        slow_print('''You follow the huffing and puffing old man in his tattered robes up the spiral staircase to a large room
-at the top of the tower. Shelves, cupboards, and cabinets line the walls, all filled with bottles, jars,
-weapons, armour, and all manner of strange artefacts.
-
-Yaztromo shuffles past the general clutter and slumps down in an old oak chair. He reaches into
-his top pocket and pulls out a fragile pair of gold-rimmed spectacles. Placing these on his nose, he
-picks up a piece of slate and chalk from a table next to his chair and begins to write frantically.
-
-    He then hands you the slate.''', fast=fast)
-        # Populate the player's slate with Yaztromo's available items.
-        # Prices: default 3 gold. Exceptions (2 gold): Potion of Plant Control,
-        # Potion of Insect Control, Potion of Anti-Poison, Boots of Leaping,
-        # Glove of Missile Dexterity, Rod of Water-finding, Garlic Buds.
-        player.slate = [
-            {'name': 'Potion of Healing', 'price': 3},
-            {'name': 'Potion of Plant Control', 'price': 2},
-            {'name': 'Potion of Stillness', 'price': 3},
-            {'name': 'Potion of Insect Control', 'price': 2},
-            {'name': 'Potion of Anti-Poison', 'price': 2},
-            {'name': 'Holy Water', 'price': 3},
-            {'name': 'Ring of Light', 'price': 3},
-            {'name': 'Boots of Leaping', 'price': 2},
-            {'name': 'Rope of climbing', 'price': 3},
-            {'name': 'Net of Entanglement', 'price': 3},
-            {'name': 'Armband of Strength', 'price': 3},
-            {'name': 'Glove of Missile Dexterity', 'price': 2},
-            {'name': 'Rod of Water-finding', 'price': 2},
-            {'name': 'Garlic Buds', 'price': 2},
-            {'name': 'Headband of Concentration', 'price': 3},
-            {'name': 'Fire Capsules', 'price': 3},
-            {'name': 'Nose Filters', 'price': 3},
-        ]
+        # also populates the player's slate with Yaztromo's items
+        _show('follow', player, fast)
         # If running in fast/test mode, skip the interactive shop loop to avoid blocking
         if fast:
             return 'shop'
         # Enter interactive shop loop
-        shop_loop(player, fast=fast, save_handler=save_handler, load_handler=load_handler)
+        shop_loop(player, fast=fast, save_handler=save_handler, load_handler=load_handler, panel=panel)
         return 'shop'
     else:
-        slow_print('''You draw your sword and attack Yaztromo! He turns, surprised, and raises his hand. A bolt of energy
-knocks you back, ending your adventure prematurely.''', fast=fast)
+        _show('attack', player, fast)
         return 'game_over'
 
 
-def run_game(fast: bool = False, seed: int | None = None, initial_player=None, save_callback=None, load_callback=None) -> 'Player':
-    """Run the game.
+# --- Scene actions ------------------------------------------------------------
+#
+# Game logic the content pack triggers with '@action <name>'. Each action is
+# called with the session state and the choice that led to the section.
 
-    If fast is True, skip pauses. If seed is provided, use deterministic RNG.
-    If initial_player is provided it will be used as the starting Player and the final
-    Player instance is returned so callers can save it.
-    """
-    player = initial_player if initial_player is not None else Player()
+def _luck_stats(player: Player) -> dict:
+    return {'luck': player.luck, 'initial_luck': player.initial_luck}
+
+
+def _roll_stats(state: 'SessionState', choice: Optional[str]) -> None:
+    rng = random.Random(state.seed) if state.seed is not None else None
+    p = state.player
+    generate_stats(p, rng=rng)
+    state.emit('stats', stats={'skill': p.skill, 'stamina': p.stamina, **_luck_stats(p)})
+
+
+def _take_potion(state: 'SessionState', choice: Optional[str]) -> None:
+    state.player.potion = choice
+    if choice == 'fortune':
+        state.player.luck += 1  # Increase initial Luck by 1
+        state.player.initial_luck = state.player.luck
+    state.emit('potion', potion=choice, stats=_luck_stats(state.player))
 
-    def _save_handler(p, slot=None):
+
+def try_luck(state: 'SessionState') -> bool:
+    """Test the player's Luck with the session's next seeded roll (see SessionState.rng)."""
+    lucky = state.player.test_luck(state.rng())
+    state.emit('luck', stats=_luck_stats(state.player))
+    return lucky
+
+
+def _fill_slate(state: 'SessionState', choice: Optional[str]) -> None:
+    state.player.slate = yaztromo_slate()
+    state.emit('slate', slate=items_to_list(state.player.slate))
+
+
+ACTIONS = {
+    'roll_stats': _roll_stats,
+    'take_potion': _take_potion,
+    'fill_slate': _fill_slate,
+}
+
+
+def _fill(kind: str, text: str, player: Player) -> str:
+    """Fill in the player fields a '@slow-format' block refers to."""
+    if kind != 'slow-format':
+        return text
+    return text.format(potion=player.potion, gold=player.backpack['gold'])
+
+
+# --- Resumable session core -------------------------------------------------
+#
+# The same flow as the scene functions above, expressed as a state machine:
+# step() consumes one line of player input and returns the output to show.
+# Nothing here blocks, so a session can be suspended between steps, serialised
+# with SessionState.to_dict() and driven by any front end (see run_game).
+# Between steps the scene is the id of the content section waiting for input,
+# or one of the shop scenes.
+
+START_SECTION = 'intro'
+SHOP_SCENES = ('shop', 'shop_confirm')
+
+
+@dataclass(frozen=True)
+class Message:
+    """One piece of output produced by step().
+
+    kind is 'slow' (typewriter text followed by a pause), 'text' (printed as-is)
+    or 'status' (the status block; front ends with a StatusPanel redraw that instead).
+    """
+    kind: str
+    text: str = ''
+
+
+@dataclass
+class SessionState:
+    """Everything needed to resume a session between two calls to step()."""
+    scene: str = 'start'
+    player: Player = field(default_factory=Player)
+    fast: bool = False
+    seed: Optional[int] = None
+    # True when the front end shows a live StatusPanel, so 'list' can skip gold/inventory
+    panel: bool = False
+    # slate index (or basket of [index, count] pairs) waiting for a yes/no answer
+    # in the 'shop_confirm' scene
+    pending: Optional[int | list] = None
+    # 'declined', 'game_over' or 'continued' once the session is done
+    outcome: Optional[str] = None
+    # section to continue with when the player leaves the shop
+    resume: Optional[str] = None
+    # dice rolled through rng() so far
+    rolls: int = 0
+    # player events (see emit) since a journal last took them; None, the default,
+    # collects nothing. Not saved.
+    events: Optional[list] = field(default=None, compare=False, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.scene == 'end'
+
+    @property
+    def prompt(self) -> Optional[str]:
+        """The prompt to show before reading the next line of input."""
+        if self.scene == 'shop_confirm':
+            return purchase_prompt(self.player, self.pending)
+        if self.scene == 'shop':
+            return SHOP_PROMPT
+        if self.scene in ('start', 'end'):
+            return None
+        return scenes.section(self.scene).prompt
+
+    def rng(self):
+        """The RNG for the next roll of the session (a Luck test, say).
+
+        With a seed each call gets a fresh random.Random seeded from the seed and
+        the number of rolls so far, so a resumed or replayed session rolls the
+        same numbers; without one it is the random module.
+        """
+        self.rolls += 1
+        if self.seed is None:
+            return random
+        return random.Random(f"{self.seed}:roll:{self.rolls}")
+
+    def emit(self, name: str, **fields) -> None:
+        """Note a change to the player as a small event, e.g. emit('purchase', items=[0], gold=-3).
+
+        The engine emits one for every change it makes to the player (see
+        journal for the events); they are only kept while events is a list.
+        """
+        if self.events is not None:
+            self.events.append({'e': name, **fields})
+
+    def to_dict(self) -> dict:
+        data = self.session_dict()
+        data['player'] = player_to_dict(self.player)
+        return data
+
+    def session_dict(self) -> dict:
+        """to_dict() without the player."""
+        return {
+            'scene': self.scene,
+            'fast': self.fast,
+            'seed': self.seed,
+            'panel': self.panel,
+            'pending': self.pending,
+            'outcome': self.outcome,
+            'resume': self.resume,
+            'rolls': self.rolls,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'SessionState':
+        return cls(
+            scene=data.get('scene', 'start'),
+            player=player_from_dict(data.get('player', {})),
+            fast=bool(data.get('fast', False)),
+            seed=data.get('seed'),
+            panel=bool(data.get('panel', False)),
+            pending=data.get('pending'),
+            outcome=data.get('outcome'),
+            resume=data.get('resume'),
+            rolls=int(data.get('rolls', 0)),
+        )
+
+
+def _session_handlers(save_callback=None, load_callback=None):
+    """Adapt run_game-style callbacks to the (player, slot) handlers used at prompts."""
+    def save_handler(p, slot=None):
         # save_callback may expect the Player instance and optional slot
         if save_callback is not None:
             save_callback(p, slot=slot)
 
-    def _load_handler(p, slot=None):
+    def load_handler(p, slot=None):
         # load_callback should return a Player instance; slot is optional
         if load_callback is None:
             return
@@ -231,26 +287,181 @@ def run_game(fast: bool = False, seed: int | None = None, initial_player=None, s
             p.skill = new_p.skill
             p.stamina = new_p.stamina
             p.luck = new_p.luck
+            p.initial_luck = new_p.initial_luck
             p.backpack = new_p.backpack
             p.potion = new_p.potion
 
-    if not display_intro(player, fast=fast, save_handler=_save_handler, load_handler=_load_handler):
-        return player  # Exit if player chooses not to enter
-    print()
-    get_valid_input('Type "ready" when you wish to generate your strengths and weaknesses: (or type "\"save\"/\"load\"") ', ['ready'], special_handlers={'save': lambda _: _save_handler(player), 'load': lambda _: _load_handler(player)})
-    rng = random.Random(seed) if seed is not None else None
-    generate_stats(player, rng=rng)
-    display_status(player)
-    print()
-    choose_potion(player, fast=fast, save_handler=_save_handler, load_handler=_load_handler)
-    display_status(player)
-    print()
-    display_background(player, fast=fast)
-    print()
-    next_section = yaztromo_intro(player, fast=fast, save_handler=_save_handler, load_handler=_load_handler)
-    if next_section == 'game_over':
-        slow_print("Game Over!", fast=fast)
-        return player
-    # Placeholder for future sections (e.g., Yaztromo's shop)
-    slow_print("To be continued... (Yaztromo's shop and further adventures coming soon!)", fast=fast)
-    return player
+    return save_handler, load_handler
+
+
+def _enter(state: SessionState, section_id: str, out: list, choice: Optional[str] = None) -> None:
+    """Play sections from section_id on until one waits for input, opens the shop or ends."""
+    player = state.player
+    while True:
+        sec = scenes.section(section_id)
+        for kind, value in sec.blocks:
+            if kind == 'action':
+                ACTIONS[value](state, choice)
+            elif kind == 'status':
+                out.append(Message('status', '\n'.join(status_lines(player))))
+            elif kind == 'blank':
+                out.append(Message('text', ''))
+            elif kind == 'text':
+                out.append(Message('text', value))
+            else:
+                out.append(Message('slow', _fill(kind, value, player)))
+        if sec.end is not None:
+            state.outcome = sec.end
+            state.scene = 'end'
+            return
+        if sec.choices:
+            state.scene = sec.id
+            return
+        # fast/test mode skips the interactive shop to avoid blocking
+        if sec.shop and not state.fast:
+            state.scene = 'shop'
+            state.resume = sec.next
+            return
+        if sec.next is None:
+            raise scenes.ContentError(f"Section {sec.id!r} has no way on")
+        section_id, choice = sec.next, None
+
+
+def step(state: SessionState, player_input: Optional[str], save_callback=None, load_callback=None) -> tuple:
+    """Advance a session by one line of player input.
+
+    Call first with ``player_input=None`` to get the opening text. In the shop
+    scenes None means the input stream closed, which leaves the shop (or cancels
+    a pending purchase). save_callback/load_callback are the same callbacks
+    run_game accepts. The state is updated in place and returned together with a
+    list of Message objects.
+    """
+    out: list = []
+
+    def say(text: str = '') -> None:
+        out.append(Message('text', text))
+
+    player = state.player
+    scene = state.scene
+    save_handler, load_handler = _session_handlers(save_callback, load_callback)
+
+    if scene == 'start':
+        _enter(state, START_SECTION, out)
+    elif scene == 'shop':
+        if player_input is None:
+            say()
+            action = 'exit'
+        else:
+            action, idx = shop_command(player, player_input, save_handler=save_callback, load_handler=load_callback,
+                                       panel=state.panel or None, out=say, emit=state.emit)
+        if action == 'exit':
+            resume, state.resume = state.resume, None
+            _enter(state, resume, out)
+        elif action == 'confirm':
+            state.pending = idx
+            state.scene = 'shop_confirm'
+    elif scene == 'shop_confirm':
+        if player_input is None:
+            say()
+        else:
+            confirm_purchase(player, state.pending, player_input, out=say, emit=state.emit)
+        state.pending = None
+        state.scene = 'shop'
+    elif scene != 'end':
+        sec = scenes.section(scene)
+        match = route(sec.grammar, (player_input or '').lower(), out=say)
+        if match is not None and not _slot_command(match, player, save_handler, load_handler):
+            _enter(state, sec.target(match.name), out, choice=match.name)
+        elif match is not None and match.name == 'load' and load_callback is not None:
+            state.emit('load', player=player_to_dict(player))
+    return state, out
+
+
+def render_messages(messages, player: Player, fast: bool = False, panel: Optional[StatusPanel] = None) -> None:
+    """Show step() output on the local terminal."""
+    for msg in messages:
+        if msg.kind == 'slow':
+            slow_print(msg.text, fast=fast)
+        elif msg.kind == 'status':
+            display_status(player, panel)
+        else:
+            print(msg.text)
+
+
+def run_game(fast: bool = False, seed: int | None = None, initial_player=None, save_callback=None, load_callback=None,
+             journal=None, resume: Optional[SessionState] = None, transcript=None, profiler=None) -> 'Player':
+    """Run the game.
+
+    If fast is True, skip pauses. If seed is provided, use deterministic RNG.
+    If initial_player is provided it will be used as the starting Player and the final
+    Player instance is returned so callers can save it.
+
+    This is a blocking driver over step(): it reads a line for each prompt and
+    renders the output on stdout. With a journal.Journal every step is recorded
+    as it happens; resume continues a session recovered from such a journal,
+    keeping its own fast mode and seed (the fast and seed arguments are ignored).
+    With a transcript.Recorder every input line is recorded for replay, and
+    with a profiling.Profiler each scene's time is split into think, render,
+    engine and save/load time.
+    """
+    # On a real terminal the status block becomes a pinned, differentially
+    # updated panel instead of being reprinted each time.
+    panel = StatusPanel.for_terminal()
+    if transcript is not None:
+        load_callback = transcript.wrap_load(load_callback)
+    timed = untimed
+    if profiler is not None:
+        timed = profiler.segment
+        save_callback = profiler.wrap_callback('save', save_callback)
+        load_callback = profiler.wrap_callback('load', load_callback)
+    if resume is not None:
+        state = resume
+        state.panel = panel is not None
+        if transcript is not None:
+            transcript.start(state)
+        messages = [Message('status', '\n'.join(status_lines(state.player)))]
+        scene = state.scene
+    else:
+        state = SessionState(player=initial_player if initial_player is not None else Player(),
+                             fast=fast, seed=seed, panel=panel is not None)
+        if journal is not None:
+            journal.start(state)
+        if transcript is not None:
+            transcript.start(state)
+        scene = state.scene
+        with timed(scene, 'engine'):
+            state, messages = step(state, None, save_callback, load_callback)
+        if journal is not None:
+            journal.record(state, 'start')
+    try:
+        while True:
+            # output is charged to the scene whose step produced it
+            with timed(scene, 'render'):
+                render_messages(messages, state.player, fast=state.fast, panel=panel)
+            if state.done:
+                return state.player
+            scene = state.scene
+            with timed(scene, 'render'):
+                if panel is not None and scene == 'shop':
+                    panel.render(state.player)
+                try:
+                    line = read_input(state.prompt)
+                except (KeyboardInterrupt, EOFError):
+                    # leaving the shop this way is allowed; anywhere else it ends the game
+                    if scene not in SHOP_SCENES:
+                        raise
+                    line = None
+            if transcript is not None:
+                transcript.input(line)
+            with timed(scene, 'engine'):
+                state, messages = step(state, line, save_callback, load_callback)
+            if journal is not None:
+                journal.record(state, scene)
+    finally:
+        if panel is not None:
+            panel.close()
+        if journal is not None:
+            journal.close()
+        if transcript is not None:
+            transcript.finish(state)
+            transcript.close()
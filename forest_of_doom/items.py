@@ -0,0 +1,269 @@
+"""The shared item catalog.
+
+Every item in the game exists once per process as a frozen Item in CATALOG;
+its position there is its id. Players keep ids rather than copies: the slate
+is a CatalogView over a tuple of ids (Yaztromo's is one shared object), the
+inventory is an ItemList of id stacks, and saves write those ids together with
+CATALOG_VERSION. Items still read like the dicts they replace
+(``item['name']``, ``item.get('price')``), and hand-made dict items that are
+not in the catalog keep working as plain dicts.
+
+Append new items at the end of the catalog: ids are stored in save files.
+Changing or removing an existing entry means bumping CATALOG_VERSION.
+"""
+import sys
+from array import array
+from collections.abc import MutableSequence, Sequence
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+CATALOG_VERSION = 1
+# ItemList stack ids from here up are custom (non-catalog) items
+_CUSTOM = 0x8000
+
+
+@dataclass(frozen=True)
+class Item:
+    id: int
+    name: str
+    price: Optional[int] = None
+    # player stat raised when the item is used, and by how much
+    effect: Optional[str] = None
+    amount: int = 0
+
+    _FIELDS = ('name', 'price', 'effect', 'amount')
+
+    # Read-only dict protocol, so code written for item dicts keeps working.
+    def keys(self):
+        return self._FIELDS
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key) if key in self._FIELDS else default
+
+
+def _catalog(*entries) -> tuple:
+    return tuple(Item(i, sys.intern(name), *rest) for i, (name, *rest) in enumerate(entries))
+
+
+CATALOG = _catalog(
+    ('Potion of Healing', 3, 'stamina', 2),
+    ('Potion of Plant Control', 2),
+    ('Potion of Stillness', 3),
+    ('Potion of Insect Control', 2),
+    ('Potion of Anti-Poison', 2),
+    ('Holy Water', 3),
+    ('Ring of Light', 3),
+    ('Boots of Leaping', 2),
+    ('Rope of climbing', 3),
+    ('Net of Entanglement', 3),
+    ('Armband of Strength', 3),
+    ('Glove of Missile Dexterity', 2),
+    ('Rod of Water-finding', 2),
+    ('Garlic Buds', 2),
+    ('Headband of Concentration', 3),
+    ('Fire Capsules', 3),
+    ('Nose Filters', 3),
+)
+
+_BY_KEY: Dict[tuple, Item] = {(it.name, it.price): it for it in CATALOG}
+
+
+def get_item(item_id: int) -> Item:
+    try:
+        return CATALOG[item_id]
+    except (IndexError, TypeError):
+        raise KeyError(f"No item {item_id!r} in catalog version {CATALOG_VERSION}") from None
+
+
+def find_item(item: Any) -> Optional[Item]:
+    """Return the catalog Item an item (Item or dict) stands for, or None."""
+    if isinstance(item, Item):
+        return item
+    if isinstance(item, dict):
+        return _BY_KEY.get((item.get('name'), item.get('price')))
+    return None
+
+
+class CatalogView(Sequence):
+    """An immutable sequence of catalog items, stored as a tuple of ids."""
+
+    __slots__ = ('ids',)
+
+    def __init__(self, ids=()):
+        self.ids = tuple(ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CatalogView(self.ids[index])
+        return CATALOG[self.ids[index]]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, CatalogView):
+            return self.ids == other.ids
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"CatalogView({self.ids!r})"
+
+
+# Everything Yaztromo sells, in the order he writes it on his slate.
+YAZTROMO_SLATE = CatalogView(range(len(CATALOG)))
+
+
+class ItemList(MutableSequence):
+    """A player's items, stored as stacks of (catalog id, count) in one array.
+
+    A stack is a run of equal items next to each other, so the list reads (and
+    is indexed) exactly like the plain list it replaces: buying a Holy Water
+    right after another grows that stack, while one bought after something
+    else starts a new stack at the end. Items that are not in the catalog
+    (hand-made dicts) are kept as a copy of the dict and stacked when equal.
+    Ids and counts are 32-bit.
+    """
+
+    __slots__ = ('_stacks', '_custom')
+
+    def __init__(self, items=()):
+        # id, count, id, count, ...; created on the first item
+        self._stacks: Optional[array] = None
+        # custom dict items; their stack id is _CUSTOM + index
+        self._custom: Optional[list] = None
+        for item in items:
+            self.append(item)
+
+    def _stack_id(self, item: Any) -> int:
+        found = find_item(item)
+        if found is not None:
+            return found.id
+        if isinstance(item, int):
+            return get_item(item).id
+        item = dict(item)
+        if self._custom is None:
+            self._custom = []
+        if item in self._custom:
+            return _CUSTOM + self._custom.index(item)
+        self._custom.append(item)
+        return _CUSTOM + len(self._custom) - 1
+
+    def _resolve(self, stack_id: int):
+        return CATALOG[stack_id] if stack_id < _CUSTOM else self._custom[stack_id - _CUSTOM]
+
+    def _locate(self, index: int) -> int:
+        """Return the array position of the stack holding entry index."""
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError('ItemList index out of range')
+        st = self._stacks
+        for pos in range(0, len(st), 2):
+            index -= st[pos + 1]
+            if index < 0:
+                return pos
+        raise IndexError('ItemList index out of range')  # pragma: no cover
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return self._resolve(self._stacks[self._locate(index)])
+
+    def __setitem__(self, index, item) -> None:
+        if isinstance(index, slice):
+            raise TypeError('ItemList does not support slice assignment')
+        del self[index]
+        self.insert(index, item)
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            for i in sorted(range(*index.indices(len(self))), reverse=True):
+                del self[i]
+            return
+        pos = self._locate(index)
+        st = self._stacks
+        if st[pos + 1] > 1:
+            st[pos + 1] -= 1
+            return
+        del st[pos:pos + 2]
+        # the stacks either side may now be one run
+        if 0 < pos < len(st) and st[pos - 2] == st[pos]:
+            st[pos - 1] += st[pos + 1]
+            del st[pos:pos + 2]
+
+    def __len__(self) -> int:
+        return sum(self._stacks[1::2]) if self._stacks else 0
+
+    def insert(self, index: int, item) -> None:
+        """Insert item before entry index, joining a neighbouring stack of the same item."""
+        n = len(self)
+        if index < 0:
+            index = max(0, index + n)
+        self._add(item, 1, min(index, n))
+
+    def add(self, item, count: int = 1) -> None:
+        """Add count of item at once at the end."""
+        if count > 0:
+            self._add(item, count, len(self))
+
+    def _add(self, item, count: int, index: int) -> None:
+        sid = self._stack_id(item)
+        if self._stacks is None:
+            self._stacks = array('I')
+        st = self._stacks
+        # find the stack holding entry index (or the end) and index's offset in it
+        pos = 0
+        while pos < len(st) and index >= st[pos + 1]:
+            index -= st[pos + 1]
+            pos += 2
+        if pos < len(st) and st[pos] == sid:
+            st[pos + 1] += count
+        elif index == 0 and pos > 0 and st[pos - 2] == sid:
+            st[pos - 1] += count
+        elif index == 0:
+            st[pos:pos] = array('I', (sid, count))
+        else:
+            # in the middle of another item's stack: split it around the new one
+            rest = st[pos + 1] - index
+            st[pos + 1] = index
+            st[pos + 2:pos + 2] = array('I', (sid, count, st[pos], rest))
+
+    def stacks(self) -> list:
+        """Return (item, count) pairs in order."""
+        st = self._stacks or ()
+        return [(self._resolve(st[pos]), st[pos + 1]) for pos in range(0, len(st), 2)]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Sequence) and list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"ItemList({list(self)!r})"
+
+    def to_list(self) -> list:
+        """Serialisable form: ids for catalog items, dicts for the rest."""
+        return [item.id if isinstance(item, Item) else dict(item) for item in self]
+
+
+def items_to_list(items) -> list:
+    """Serialise a slate or inventory (any sequence of items) for a save file."""
+    if isinstance(items, CatalogView):
+        return list(items.ids)
+    if isinstance(items, ItemList):
+        return items.to_list()
+    return ItemList(items).to_list()
+
+
+def slate_from_list(data) -> Sequence:
+    """Rebuild a slate: a CatalogView when every entry is a catalog item, else a list."""
+    entries = [find_item(e) or (get_item(e) if isinstance(e, int) else dict(e)) for e in data]
+    if all(isinstance(e, Item) for e in entries):
+        ids = tuple(e.id for e in entries)
+        # everyone who visited Yaztromo shares the one slate object
+        return YAZTROMO_SLATE if ids == YAZTROMO_SLATE.ids else CatalogView(ids)
+    return entries
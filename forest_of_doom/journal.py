@@ -0,0 +1,200 @@
+"""Append-only session journal: small player events plus periodic snapshots.
+
+A journal file is JSON lines. A snapshot line holds the whole session
+(SessionState.to_dict()). Every other line is one step: the events the engine
+emitted for the player (SessionState.emit) and the session fields that step
+changed::
+
+    {"snapshot": {...}, "seq": 0}
+    {"seq": 1, "e": "ready", "events": [{"e": "stats", "stats": {"skill": 9, "stamina": 20, ...}}], "set": {"scene": "potion"}}
+    {"seq": 7, "e": "shop_confirm", "events": [{"e": "purchase", "items": [0], "gold": -3}], "set": {"scene": "shop", "pending": null}}
+
+The events say what happened rather than what the player now looks like:
+
+    stats, potion, luck, drink  the stats (and potion) they set
+    slate                       Yaztromo's slate, as item ids
+    purchase                    items added to the inventory and the gold spent (negative)
+    use_item                    inventory index used up, the item, and the stats after it
+    load                        the whole player, replaced by a loaded save
+
+so recording a step is one short append, however big the inventory grows,
+and the player is never serialised outside of snapshots and loads. Every
+snapshot_every lines a snapshot is appended, and every compact_every snapshots
+the file is rewritten as just the latest one. recover() reads the last
+snapshot and replays the lines after it, so a session that crashed (even in
+the middle of the shop) picks up where it was. A line torn by a crash is
+ignored; a step's events and fields are one line, so a step is either
+recovered whole or not at all.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from .game import SessionState
+
+
+def apply_event(player: dict, event: dict) -> None:
+    """Replay one player event on a player dict (as from models.player_to_dict)."""
+    if 'player' in event:
+        player.clear()
+        player.update(event['player'])
+    player.update(event.get('stats', {}))
+    if 'potion' in event:
+        player['potion'] = event['potion']
+    if 'slate' in event:
+        player['slate'] = list(event['slate'])
+    if 'index' in event:
+        del player['inventory'][event['index']]
+    if 'items' in event:
+        player.setdefault('inventory', []).extend(event['items'])
+    if 'gold' in event:
+        backpack = player.setdefault('backpack', {})
+        backpack['gold'] = backpack.get('gold', 0) + event['gold']
+
+
+class Journal:
+    """Writes one session's journal; record() after every step."""
+
+    def __init__(self, path: str | Path, snapshot_every: int = 50, compact_every: int = 4, fsync: bool = False):
+        self.path = Path(path)
+        self.snapshot_every = max(1, snapshot_every)
+        self.compact_every = max(1, compact_every)
+        self.fsync = fsync
+        self.seq = 0
+        self.events = 0
+        self.snapshots = 0
+        self.compactions = 0
+        self.bytes_written = 0
+        # session fields (no player) as of the last record, to diff the next step against
+        self._last: Optional[dict] = None
+        self._since_snapshot = 0
+        self._snapshots_in_file = 0
+        self._file = None
+
+    def _append(self, record: dict) -> None:
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        self._file.write(line)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self.bytes_written += len(line.encode('utf-8'))
+
+    def start(self, state: SessionState) -> None:
+        """Begin the file with a snapshot of state (replacing any earlier journal)."""
+        self.close()
+        self.path.unlink(missing_ok=True)
+        self._snapshots_in_file = 0
+        self.snapshot(state)
+
+    def resume(self, state: SessionState, seq: int = 0) -> None:
+        """Continue the journal that state was recovered from.
+
+        The file is compacted first, which also drops a line torn by a crash.
+        """
+        self.seq = seq
+        self.compact(state.to_dict())
+        self._last = state.session_dict()
+        state.events = []
+        self._since_snapshot = 0
+
+    def snapshot(self, state: SessionState) -> None:
+        """Write the whole session; compacts the file every compact_every snapshots."""
+        data = state.to_dict()
+        if self._snapshots_in_file >= self.compact_every:
+            self.compact(data)
+        else:
+            self._append({'snapshot': data, 'seq': self.seq})
+            self._snapshots_in_file += 1
+        self.snapshots += 1
+        self._last = state.session_dict()
+        # from here on the engine reports changes to the player as events
+        state.events = []
+        self._since_snapshot = 0
+
+    def compact(self, data: dict) -> None:
+        """Atomically replace the file with a single snapshot."""
+        self.close()
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        line = json.dumps({'snapshot': data, 'seq': self.seq}, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(line)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        tmp.replace(self.path)
+        self.bytes_written += len(line.encode('utf-8'))
+        self._snapshots_in_file = 1
+        self.compactions += 1
+
+    def record(self, state: SessionState, kind: str) -> Optional[dict]:
+        """Append the player events and changed session fields since the last record
+        as one kind line; None if nothing happened."""
+        if self._last is None:
+            self.start(state)
+            return None
+        events, state.events = state.events or [], []
+        changed = {k: v for k, v in state.session_dict().items() if self._last.get(k, _MISSING) != v}
+        if not changed and not events:
+            return None
+        self.seq += 1
+        event: dict = {'seq': self.seq, 'e': kind}
+        if events:
+            event['events'] = events
+        if changed:
+            event['set'] = changed
+        self._append(event)
+        self.events += 1
+        self._last.update(changed)
+        self._since_snapshot += 1
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot(state)
+        return event
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_MISSING = object()
+
+
+def replay(lines) -> tuple:
+    """Rebuild the session dict from journal lines; return (state dict or None, last seq)."""
+    state: Optional[dict] = None
+    seq = 0
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # a line torn by a crash can only be the last one
+            break
+        if 'snapshot' in record:
+            state = record['snapshot']
+            state.setdefault('player', {})
+        elif state is not None:
+            for event in record.get('events', ()):
+                apply_event(state['player'], event)
+            for k, v in record.get('set', {}).items():
+                # journals from before player events set player fields by path
+                if k.startswith('player.'):
+                    state['player'][k[len('player.'):]] = v
+                else:
+                    state[k] = v
+        seq = record.get('seq', seq)
+    return state, seq
+
+
+def recover(path: str | Path) -> tuple:
+    """Return (SessionState, last seq) from the journal at path, or (None, 0) if there is none."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data, seq = replay(f)
+    except FileNotFoundError:
+        return None, 0
+    if data is None:
+        return None, 0
+    return SessionState.from_dict(data), seq
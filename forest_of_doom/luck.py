@@ -0,0 +1,111 @@
+"""Test your Luck, and exact tables of how LUCK runs out.
+
+A Luck test (Player.test_luck) is lucky if 2d6 comes to LUCK or less, and
+costs 1 LUCK either way, so every test is a little less likely to succeed than
+the one before. Drinking the Potion of Fortune (Player.drink_fortune) puts LUCK
+back to its initial level (the shop's 'drink' command). In play, game.try_luck
+rolls with the session's seeded RNG. combat uses luck_chance from here.
+
+Starting from some LUCK, a run of tests is a Markov chain over (LUCK, lucky
+tests so far). The chain is worked through exactly (as Fractions) for every
+starting LUCK a character can have when the module is imported, so
+pass_chance(), all_pass_chance() and passes() are table lookups. A restore is
+a jump of the chain back to the initial LUCK: look up from the player's new
+LUCK with k counted from there.
+"""
+from fractions import Fraction
+from typing import Dict, Tuple
+
+from .characters import FORTUNE_LUCK, STAT_DICE
+from .models import Player
+
+# the most LUCK a new character can have (6 on the die, plus the potion)
+MAX_LUCK = STAT_DICE['luck'][1] + 6 * STAT_DICE['luck'][0] + FORTUNE_LUCK
+# from MAX_LUCK, every test after this many is certain to be unlucky
+MAX_TESTS = MAX_LUCK
+
+
+def _chance(luck: int) -> Fraction:
+    ways = sum(1 for a in range(1, 7) for b in range(1, 7) if a + b <= luck)
+    return Fraction(ways, 36)
+
+
+_CHANCE = tuple(_chance(luck) for luck in range(MAX_LUCK + 1))
+
+
+def _chain(start: int) -> Tuple[tuple, tuple, tuple]:
+    """(P(k-th test lucky), P(first k all lucky), distribution of lucky tests in k) for k = 0..MAX_TESTS."""
+    states: Dict[tuple, Fraction] = {(start, 0): Fraction(1)}
+    kth, every, counts = [Fraction(0)], [Fraction(1)], [(Fraction(1),)]
+    for k in range(1, MAX_TESTS + 1):
+        following: Dict[tuple, Fraction] = {}
+        lucky = Fraction(0)
+        for (luck, n), p in states.items():
+            q = _CHANCE[luck]
+            lucky += p * q
+            down = max(0, luck - 1)
+            following[(down, n + 1)] = following.get((down, n + 1), 0) + p * q
+            following[(down, n)] = following.get((down, n), 0) + p * (1 - q)
+        states = following
+        kth.append(lucky)
+        every.append(sum((p for (_, n), p in states.items() if n == k), Fraction(0)))
+        dist = [Fraction(0)] * (k + 1)
+        for (_, n), p in states.items():
+            dist[n] += p
+        counts.append(tuple(dist))
+    return tuple(kth), tuple(every), tuple(counts)
+
+
+_TABLES = tuple(_chain(start) for start in range(MAX_LUCK + 1))
+
+
+def luck_chance(luck: int) -> Fraction:
+    """Probability that one Luck test with this LUCK is lucky."""
+    return _CHANCE[min(max(luck, 0), MAX_LUCK)]
+
+
+def _start(luck: int, k: int) -> Tuple[int, int, int]:
+    """(table row, k within the table, sure tests skipped) for a LUCK above MAX_LUCK, which
+    passes its first luck - MAX_LUCK tests for certain before behaving like MAX_LUCK."""
+    if k < 0:
+        raise ValueError('k must not be negative')
+    if luck <= MAX_LUCK:
+        return max(luck, 0), k, 0
+    sure = min(k, luck - MAX_LUCK)
+    return MAX_LUCK, k - sure, sure
+
+
+def pass_chance(luck: int, k: int = 1) -> Fraction:
+    """Probability that the k-th of a run of Luck tests starting at LUCK luck is lucky."""
+    if k < 1:
+        raise ValueError('k counts tests from 1')
+    row, k, _ = _start(luck, k)
+    if k == 0:
+        return Fraction(1)
+    kth = _TABLES[row][0]
+    return kth[k] if k <= MAX_TESTS else Fraction(0)
+
+
+def all_pass_chance(luck: int, k: int) -> Fraction:
+    """Probability that all of the first k Luck tests starting at LUCK luck are lucky."""
+    row, k, _ = _start(luck, k)
+    every = _TABLES[row][1]
+    return every[k] if k <= MAX_TESTS else Fraction(0)
+
+
+def passes(luck: int, k: int) -> Tuple[Fraction, ...]:
+    """Distribution of the number of lucky tests among k starting at LUCK luck: entry n is P(n lucky)."""
+    row, k_left, sure = _start(luck, k)
+    dist = _TABLES[row][2][min(k_left, MAX_TESTS)]
+    # tests past MAX_TESTS are all unlucky, which adds impossible counts at the top
+    return (Fraction(0),) * sure + dist + (Fraction(0),) * max(0, k_left - MAX_TESTS)
+
+
+def expected_passes(luck: int, k: int) -> Fraction:
+    """Expected number of lucky tests among k starting at LUCK luck."""
+    return sum((n * p for n, p in enumerate(passes(luck, k))), Fraction(0))
+
+
+def player_chance(player: Player, k: int = 1) -> Fraction:
+    """Probability that player's k-th Luck test from now is lucky."""
+    return pass_chance(player.luck, k)
@@ -1,78 +1,249 @@
 import argparse
+import contextlib
 from forest_of_doom import game
 from pathlib import Path
 from forest_of_doom import models
+from forest_of_doom import ui
 
 
 def parse_args():
     parser = argparse.ArgumentParser(description='Forest of Doom - text adventure')
     parser.add_argument('--fast', action='store_true', help='Skip pauses and print text normally')
     parser.add_argument('--seed', type=int, default=None, help='Optional RNG seed for deterministic runs')
-    parser.add_argument('--load', type=str, default=None, help='Path to JSON file to load player state from')
-    parser.add_argument('--save', type=str, default=None, help='Path to JSON file to save player state to on exit')
+    parser.add_argument('--load', type=str, default=None, help='Save to load player state from: a file (JSON or binary, detected automatically) or a .db SQLite store')
+    parser.add_argument('--save', type=str, default=None, help='Where to save player state on exit: a .db SQLite store, or a file (binary for .sav, otherwise JSON)')
+    parser.add_argument('--cps', type=float, default=None, help='Typewriter speed in characters per second')
+    parser.add_argument('--fps', type=float, default=None, help='Typewriter frame rate (writes per second)')
+    parser.add_argument('--journal', metavar='PATH', default=None,
+                        help='Record the session to this journal as it is played, and resume from it after a crash')
+    parser.add_argument('--record', metavar='FILE', default=None,
+                        help='Record the seed and every input line to this transcript for --replay')
+    parser.add_argument('--replay', metavar='FILE', nargs='+', default=None,
+                        help='Replay transcripts (files, or directories of *.transcript) at full speed and '
+                             'check each final player state, then exit')
+    parser.add_argument('--profile', metavar='FILE', nargs='?', const='profile.json', default=None,
+                        help='Time each scene (think/render/engine/save-load) and write a JSON report '
+                             '(default profile.json) plus a summary at exit')
+    parser.add_argument('--cprofile', metavar='FILE', default=None,
+                        help='Also run the session under cProfile and write its stats to FILE')
+    parser.add_argument('--backups', action='store_true', help='List the backups kept for --slot of the --save (or --load) store, then exit')
+    parser.add_argument('--restore', metavar='N', type=int, default=None,
+                        help='Make the Nth newest backup (1 = the latest) the current save of --slot, then exit')
+    parser.add_argument('--slot', default=None, help='Save slot for --backups/--restore (default slot if omitted)')
+    parser.add_argument('--serve', metavar='HOST:PORT', default=None, help='Serve many players over TCP/telnet instead of playing locally')
+    parser.add_argument('--workers', type=int, default=0, help='With --serve: prefork this many worker processes (0 = single process)')
+    parser.add_argument('--idle-timeout', type=float, default=300.0, help='Seconds before an idle network session is closed (--serve)')
     return parser.parse_args()
 
 
+slot_path = models.slot_path
+
+# One store per path and process (forked server workers open their own).
+_stores: dict = {}
+
+
+def get_store(path: str | Path) -> models.SaveStore:
+    """Return the save store for a --save/--load path.
+
+    Saves go through a background writer, so the game never waits on the disk;
+    call flush_stores()/close_stores() to make sure they have been written.
+    """
+    import os
+
+    from forest_of_doom.savewriter import BackgroundSaveStore
+
+    key = (os.getpid(), str(path))
+    store = _stores.get(key)
+    if store is None:
+        store = _stores[key] = BackgroundSaveStore(models.open_store(path))
+    return store
+
+
+def flush_stores() -> None:
+    """Wait until every queued save has been written."""
+    for store in list(_stores.values()):
+        store.flush()
+
+
+def close_stores() -> None:
+    """Flush and close every open save store."""
+    while _stores:
+        _, store = _stores.popitem()
+        store.close()
+
+
+def save_to_slot(player, base: str | Path, slot: str | None = None, out=print) -> None:
+    """Queue a save of player to slot in the store at base (the previous save is kept as a backup).
+
+    The write happens in the background (see get_store), so the message says the
+    save is queued rather than done.
+    """
+    try:
+        where = get_store(base).save(player, slot)
+        out(f"Save queued for {where}")
+    except Exception as e:
+        out(f"Failed to save player to {models.slot_path(base, slot)}: {e}")
+
+
+def load_from_slot(base: str | Path, slot: str | None = None, out=print):
+    """Load the player stored in slot of the store at base, or None on failure."""
+    try:
+        return get_store(base).load(slot)
+    except Exception as e:
+        out(f"Failed to load player from {models.slot_path(base, slot)}: {e}")
+        return None
+
+
+def make_callbacks(save_path: str | None, load_path: str | None, out=print):
+    """Return (save_callback, load_callback) for in-game save/load, as used by run_game.
+
+    Messages go through out so network sessions can send them to their client.
+    """
+    def save_callback(player, slot=None):
+        if not save_path:
+            out('No --save path provided; in-game save ignored.')
+            return
+        save_to_slot(player, save_path, slot, out=out)
+
+    def load_callback(slot=None):
+        if not load_path:
+            out('No --load path provided; in-game load ignored.')
+            return None
+        return load_from_slot(load_path, slot, out=out)
+
+    return save_callback, load_callback
+
+
 def main() -> None:
     args = parse_args()
+    ui.configure_typewriter(cps=args.cps, fps=args.fps)
+    try:
+        _run(args)
+    finally:
+        # pending background saves (including the final --save) are written here
+        close_stores()
+
+
+def manage_backups(path: str | Path, slot: str | None = None, restore: int | None = None, out=print) -> bool:
+    """List the backups of slot in the store at path, or restore one; return False on failure."""
+    store = get_store(path)
+    try:
+        if restore is not None:
+            out(f"Restored backup {restore} to {store.restore(slot, restore)}")
+            return True
+        versions = store.history(slot)
+    except Exception as e:
+        out(f"Failed to {'restore' if restore is not None else 'list'} backups of {models.slot_path(path, slot)}: {e}")
+        return False
+    if not versions:
+        out(f"No backups of {models.slot_path(path, slot)}")
+    for back, version in zip(range(len(versions), 0, -1), versions):
+        out(f"{back:>3}  {version}")
+    return True
+
+
+def report_profile(profiler, path: str | None = None) -> None:
+    """Write profiler's JSON report to path (if given) and its summary to stderr."""
+    import sys
+
+    if path:
+        try:
+            profiler.write(path)
+        except OSError as e:
+            print(f"Failed to write profile to {path}: {e}", file=sys.stderr)
+    for line in profiler.summary():
+        print(line, file=sys.stderr)
+    if path:
+        print(f"  report in {path}", file=sys.stderr)
+
+
+def _run(args) -> None:
+    if args.replay:
+        from forest_of_doom import transcript
+
+        if not transcript.replay_all(args.replay):
+            raise SystemExit(1)
+        return
+
+    if args.backups or args.restore is not None:
+        path = args.save or args.load
+        if not path:
+            print('--backups and --restore need a --save or --load path.')
+            return
+        manage_backups(path, args.slot, args.restore)
+        return
+
+    if args.serve:
+        from forest_of_doom import server
+
+        host, port = server.parse_address(args.serve)
+        config = server.ServerConfig(fast=args.fast, seed=args.seed, idle_timeout=args.idle_timeout,
+                                     cps=args.cps, fps=args.fps)
+        callbacks = lambda out: make_callbacks(args.save, args.load, out=out)  # noqa: E731
+        if args.workers > 0:
+            from forest_of_doom import prefork
+
+            # workers write their queued saves when the supervisor stops them
+            prefork.serve(host, port, args.workers, config, callbacks=callbacks, on_exit=close_stores)
+        else:
+            server.serve(host, port, config, callbacks=callbacks)
+        return
+
     initial_player = None
     if args.load:
         try:
-            initial_player = models.load_player(Path(args.load))
+            initial_player = get_store(args.load).load()
         except Exception as e:
             print(f"Failed to load player from {args.load}: {e}")
             return
 
-    # prepare save/load callbacks for in-game save/load
-    def save_callback(player, slot=None):
-        if not args.save:
-            print('No --save path provided; in-game save ignored.')
-            return
-        p = Path(args.save)
-        # support slot by inserting slot name before suffix
-        if slot:
-            p = p.with_name(p.stem + f"_{slot}" + p.suffix)
-        # create timestamped backup if file exists
-        if p.exists():
-            import shutil
-            from datetime import datetime
-
-            bak = p.with_name(p.stem + '.' + datetime.utcnow().strftime('%Y%m%dT%H%M%SZ') + p.suffix + '.bak')
-            try:
-                p.replace(bak)
-            except Exception:
-                shutil.copy(p, bak)
-        try:
-            models.save_player(player, p)
-            print(f"Saved player to {p}")
-        except Exception as e:
-            print(f"Failed to save player to {p}: {e}")
+    journal = resume = None
+    if args.journal:
+        from forest_of_doom import journal as journal_mod
 
-    def load_callback(slot=None):
-        if not args.load:
-            print('No --load path provided; in-game load ignored.')
-            return None
-        p = Path(args.load)
-        if slot:
-            p = p.with_name(p.stem + f"_{slot}" + p.suffix)
-        try:
-            return models.load_player(p)
-        except Exception as e:
-            print(f"Failed to load player from {p}: {e}")
-            return None
+        journal = journal_mod.Journal(args.journal)
+        resume, seq = journal_mod.recover(args.journal)
+        if resume is not None and not resume.done and resume.scene != 'start':
+            print(f"Resuming your session from {args.journal}.")
+            journal.resume(resume, seq)
+        else:
+            resume = None
+
+    recorder = None
+    seed = args.seed
+    if args.record:
+        import random
+
+        from forest_of_doom import transcript
+
+        recorder = transcript.Recorder(args.record)
+        if seed is None:
+            # a recorded session needs a seed for its replay to roll the same stats
+            seed = random.randrange(2 ** 31)
+
+    profiler = None
+    if args.profile or args.cprofile:
+        from forest_of_doom.profiling import Profiler
+
+        profiler = Profiler()
+
+    # prepare save/load callbacks for in-game save/load
+    save_callback, load_callback = make_callbacks(args.save, args.load)
 
     try:
-        final_player = game.run_game(fast=args.fast, seed=args.seed, initial_player=initial_player, save_callback=save_callback, load_callback=load_callback)
+        with profiler.activate(args.cprofile) if profiler is not None else contextlib.nullcontext():
+            final_player = game.run_game(fast=args.fast, seed=seed, initial_player=initial_player,
+                                         save_callback=save_callback, load_callback=load_callback, journal=journal,
+                                         resume=resume, transcript=recorder, profiler=profiler)
     except (KeyboardInterrupt, EOFError):
         print('\nExiting... Goodbye!')
         return
+    finally:
+        if profiler is not None:
+            report_profile(profiler, args.profile)
 
     if args.save and final_player is not None:
-        try:
-            models.save_player(final_player, Path(args.save))
-            print(f"Saved player to {args.save}")
-        except Exception as e:
-            print(f"Failed to save player to {args.save}: {e}")
+        save_to_slot(final_player, args.save)
 
 
 if __name__ == '__main__':
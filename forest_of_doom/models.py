@@ -1,27 +1,121 @@
+import abc
 import random
 from dataclasses import dataclass, field
+from collections.abc import MutableMapping, Sequence
 from typing import Dict, Optional
 import json
 from pathlib import Path
 
+from .items import CATALOG_VERSION, ItemList, items_to_list, slate_from_list
+
 # Base constants for stat generation
 SKILL_BASE = 6
 STAMINA_BASE = 12
 LUCK_BASE = 6
 
 
-@dataclass
+class Backpack(MutableMapping):
+    """Backpack counts: gold and map live in fixed slots, anything else in an overflow dict.
+
+    Behaves like the {"gold": 10, "map": 1} dict it replaces, at a third of the size.
+    """
+
+    __slots__ = ('gold', 'map', '_extra')
+    _FIXED = ('gold', 'map')
+
+    def __init__(self, counts=None, **kwargs):
+        # None marks a fixed key the backpack doesn't hold
+        self.gold: Optional[int] = None
+        self.map: Optional[int] = None
+        self._extra: Optional[dict] = None
+        self.update(counts or {}, **kwargs)
+
+    def __getitem__(self, key: str) -> int:
+        if key in self._FIXED:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: int) -> None:
+        if key in self._FIXED:
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in self._FIXED and getattr(self, key) is not None:
+            setattr(self, key, None)
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in self._FIXED:
+            if getattr(self, key) is not None:
+                yield key
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(getattr(self, k) is not None for k in self._FIXED) + len(self._extra or ())
+
+    def __repr__(self) -> str:
+        return f"Backpack({dict(self)!r})"
+
+
+def _new_backpack() -> Backpack:
+    return Backpack(gold=10, map=1)
+
+
+@dataclass(slots=True)
 class Player:
+    # Slotted, so a suspended session costs no per-player __dict__.
     skill: int = 0
     stamina: int = 0
     luck: int = 0
-    backpack: Dict[str, int] = field(default_factory=lambda: {"gold": 10, "map": 1})
+    backpack: Backpack = field(default_factory=_new_backpack)
     potion: Optional[str] = None
-    # A slate of items Yaztromo writes for the player when you visit his shop.
-    # Each entry is a dict with 'name' and optional 'price' (price set later by user).
-    slate: list = field(default_factory=list)
-    # Inventory holds purchased items (list of item dicts)
-    inventory: list = field(default_factory=list)
+    # A slate of items Yaztromo writes for the player when you visit his shop:
+    # usually items.YAZTROMO_SLATE, a view shared by every player. Entries read
+    # like dicts with 'name' and optional 'price'.
+    slate: Sequence = ()
+    # Inventory holds purchased items as stacks of catalog ids (see items.ItemList)
+    inventory: ItemList = field(default_factory=ItemList)
+    # LUCK as rolled (plus the Potion of Fortune's bonus), which drinking the
+    # potion restores; None for players made before it was kept
+    initial_luck: Optional[int] = None
+
+    def __post_init__(self):
+        if not isinstance(self.backpack, Backpack):
+            self.backpack = Backpack(self.backpack)
+        if not isinstance(self.inventory, ItemList):
+            self.inventory = ItemList(self.inventory)
+
+    def test_luck(self, rng=None) -> bool:
+        """Test your Luck: lucky if 2d6 comes to LUCK or less. LUCK goes down by 1 either way."""
+        if rng is None:
+            rng = random
+        if self.initial_luck is None:
+            self.initial_luck = self.luck
+        lucky = rng.randint(1, 6) + rng.randint(1, 6) <= self.luck
+        self.luck = max(0, self.luck - 1)
+        return lucky
+
+    def drink_fortune(self) -> bool:
+        """Drink the Potion of Fortune, if it is the potion carried: LUCK goes back to its
+        initial level and the potion is gone. Return whether there was one to drink."""
+        if self.potion != 'fortune':
+            return False
+        self.potion = None
+        if self.initial_luck is not None:
+            self.luck = max(self.luck, self.initial_luck)
+        return True
 
 
 def generate_stats(player: Player, rng=None) -> None:
@@ -31,6 +125,7 @@ def generate_stats(player: Player, rng=None) -> None:
     player.skill = rng.randint(1, 6) + SKILL_BASE
     player.stamina = rng.randint(1, 6) + rng.randint(1, 6) + STAMINA_BASE
     player.luck = rng.randint(1, 6) + LUCK_BASE
+    player.initial_luck = player.luck
 
 
 def player_to_dict(player: Player) -> Dict:
@@ -39,35 +134,414 @@ def player_to_dict(player: Player) -> Dict:
         'skill': player.skill,
         'stamina': player.stamina,
         'luck': player.luck,
-        'backpack': player.backpack,
+        'backpack': dict(player.backpack),
         'potion': player.potion,
-        'slate': player.slate,
-        'inventory': player.inventory,
+        'catalog': CATALOG_VERSION,
+        'slate': items_to_list(player.slate),
+        'inventory': items_to_list(player.inventory),
+        'initial_luck': player.initial_luck,
     }
 
 
 def player_from_dict(data: Dict) -> Player:
-    """Create a Player from a dict (as produced by player_to_dict)."""
+    """Create a Player from a dict (as produced by player_to_dict).
+
+    Saves from before the item catalog hold item dicts; those that match a
+    catalog item are converted to its id.
+    """
+    version = data.get('catalog')
+    if version is not None and version > CATALOG_VERSION:
+        raise ValueError(f"Save uses item catalog version {version}; this game knows up to {CATALOG_VERSION}")
     p = Player()
     p.skill = int(data.get('skill', 0))
     p.stamina = int(data.get('stamina', 0))
     p.luck = int(data.get('luck', 0))
-    p.backpack = dict(data.get('backpack', {}))
+    p.backpack = Backpack(data.get('backpack', {}))
     p.potion = data.get('potion')
-    p.slate = list(data.get('slate', []))
-    p.inventory = list(data.get('inventory', []))
+    p.slate = slate_from_list(data.get('slate', []))
+    p.inventory = ItemList(data.get('inventory', []))
+    initial = data.get('initial_luck')
+    p.initial_luck = int(initial) if initial is not None else None
     return p
 
 
-def save_player(player: Player, path: str | Path) -> None:
-    """Save player state as JSON to the given path."""
+# Paths with one of these suffixes are saved in the binary format by default.
+BINARY_SUFFIXES = ('.sav', '.fods')
+
+
+def save_player(player: Player, path: str | Path, fmt: str | None = None) -> None:
+    """Save player state to the given path.
+
+    fmt is 'json' (indented JSON) or 'binary' (see savecodec); by default it
+    follows the file suffix, with JSON for anything not in BINARY_SUFFIXES.
+    """
+    if fmt is None:
+        fmt = 'binary' if Path(path).suffix.lower() in BINARY_SUFFIXES else 'json'
+    if fmt == 'binary':
+        from . import savecodec
+
+        with open(path, 'wb') as f:
+            savecodec.write_player(player, f)
+        return
+    if fmt != 'json':
+        raise ValueError(f"Unknown save format {fmt!r}")
     p = player_to_dict(player)
     with open(path, 'w', encoding='utf-8') as f:
         json.dump(p, f, ensure_ascii=False, indent=2)
 
 
 def load_player(path: str | Path) -> Player:
-    """Load player state from JSON file and return a Player instance."""
-    with open(path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    return player_from_dict(data)
+    """Load player state from a JSON or binary save file and return a Player instance."""
+    from . import savecodec
+
+    with open(path, 'rb') as f:
+        data = f.read()
+    if savecodec.is_binary(data):
+        return savecodec.decode(data)
+    return player_from_dict(json.loads(data.decode('utf-8')))
+
+
+class LoadCache:
+    """Bounded LRU cache of decoded save files, keyed by path and file identity.
+
+    An entry is only used while the file's (mtime, size, inode) still match, so
+    a file changed behind our back is re-read. Entries are kept encoded and
+    every load returns a fresh Player, so callers may mutate what they get.
+    FileSaveStore drops the entry for a slot whenever it writes that slot.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        import threading
+        from collections import OrderedDict
+
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        # the background save writer invalidates from its own thread
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _identity(st) -> tuple:
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def load(self, path: str | Path) -> Player:
+        import os
+
+        from . import savecodec
+
+        key = os.path.abspath(path)
+        identity = self._identity(os.stat(key))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == identity:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                data = entry[1]
+            else:
+                data = None
+                self.misses += 1
+        if data is not None:
+            return savecodec.decode(data)
+        player = load_player(key)
+        with self._lock:
+            self._entries[key] = (identity, savecodec.encode(player))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return player
+
+    def invalidate(self, path: str | Path) -> None:
+        import os
+
+        with self._lock:
+            if self._entries.pop(os.path.abspath(path), None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {'size': size, 'hits': self.hits, 'misses': self.misses,
+                'invalidations': self.invalidations, 'evictions': self.evictions}
+
+
+# Shared by every FileSaveStore unless one is given its own.
+LOAD_CACHE = LoadCache()
+
+# marks an argument left at its default where None means "turned off"
+_DEFAULT = object()
+
+
+# --- Save stores ----------------------------------------------------------------
+#
+# A save store keeps players by slot name; slot None is the default slot.
+# FileSaveStore is the original layout (one file per slot next to the --save
+# path, older versions kept as timestamped .bak files); SqliteSaveStore keeps
+# every slot in one database. open_store() picks one from the path.
+
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+class SaveStore(abc.ABC):
+    """Interface shared by the save backends."""
+
+    @abc.abstractmethod
+    def save(self, player: Player, slot: str | None = None) -> str:
+        """Store player in slot; return a description of where it went."""
+
+    @abc.abstractmethod
+    def load(self, slot: str | None = None) -> Player:
+        """Return the latest player saved in slot (FileNotFoundError if there is none)."""
+
+    @abc.abstractmethod
+    def slots(self) -> list:
+        """Return the slots that hold a save (None for the default slot)."""
+
+    @abc.abstractmethod
+    def history(self, slot: str | None = None) -> list:
+        """Return descriptions of the older versions kept for slot, oldest first."""
+
+    @abc.abstractmethod
+    def restore(self, slot: str | None = None, back: int = 1) -> str:
+        """Make the back-th newest older version (1 = the last one) the current save of slot.
+
+        The save being replaced is kept as a version itself, so a restore can be undone.
+        """
+
+    def flush(self) -> None:
+        """Make sure every save so far is durable."""
+
+    def close(self) -> None:
+        self.flush()
+
+
+def slot_path(base: str | Path, slot: str | None = None) -> Path:
+    """Return the save file for slot: the slot name is inserted before the suffix."""
+    p = Path(base)
+    if slot:
+        p = p.with_name(p.stem + f"_{slot}" + p.suffix)
+    return p
+
+
+class FileSaveStore(SaveStore):
+    """One save file per slot, derived from base; older versions go to a BackupStore.
+
+    Loads go through a LoadCache (LOAD_CACHE unless cache is given; None disables it).
+    Backups are kept content-addressed under .backups next to base unless backups
+    is given (None disables them).
+    """
+
+    def __init__(self, base: str | Path, cache: Optional[LoadCache] = LOAD_CACHE, backups=_DEFAULT):
+        from .backups import BACKUP_DIR, BackupStore
+
+        self.base = Path(base)
+        self.cache = cache
+        self.backups = BackupStore(self.base.parent / BACKUP_DIR) if backups is _DEFAULT else backups
+
+    def path(self, slot: str | None = None) -> Path:
+        return slot_path(self.base, slot)
+
+    def _replace(self, p: Path, write) -> None:
+        import os
+
+        tmp = p.with_name(p.name + f'.{os.getpid()}.tmp')
+        write(tmp)
+        if self.backups is not None and p.exists():
+            # the old version is backed up before the new one replaces it, so the slot is never missing
+            self.backups.add(p.name, p.read_bytes())
+        tmp.replace(p)
+        if self.cache is not None:
+            self.cache.invalidate(p)
+
+    def save(self, player: Player, slot: str | None = None) -> str:
+        p = self.path(slot)
+        fmt = 'binary' if p.suffix.lower() in BINARY_SUFFIXES else 'json'
+        self._replace(p, lambda tmp: save_player(player, tmp, fmt=fmt))
+        return str(p)
+
+    def load(self, slot: str | None = None) -> Player:
+        if self.cache is not None:
+            return self.cache.load(self.path(slot))
+        return load_player(self.path(slot))
+
+    def slots(self) -> list:
+        stem, suffix = self.base.stem, self.base.suffix
+        found = []
+        for p in self.base.parent.glob(f'{stem}*{suffix}'):
+            if p.name == self.base.name:
+                found.append(None)
+            elif p.name.startswith(stem + '_'):
+                found.append(p.name[len(stem) + 1:len(p.name) - len(suffix)])
+        return sorted(found, key=lambda s: (s is not None, s or ''))
+
+    def history(self, slot: str | None = None) -> list:
+        from datetime import datetime, timezone
+
+        if self.backups is None:
+            return []
+        return [f"{datetime.fromtimestamp(e['at'], timezone.utc):%Y-%m-%d %H:%M:%S} UTC {e['hash'][:12]}"
+                for e in self.backups.history(self.path(slot).name)]
+
+    def restore(self, slot: str | None = None, back: int = 1) -> str:
+        p = self.path(slot)
+        entries = self.backups.history(p.name) if self.backups is not None else []
+        if not 1 <= back <= len(entries):
+            raise FileNotFoundError(f"No backup {back} of {p} ({len(entries)} kept)")
+        data = self.backups.read(entries[-back]['hash'])
+        self._replace(p, lambda tmp: tmp.write_bytes(data))
+        return str(p)
+
+
+class SqliteSaveStore(SaveStore):
+    """All slots in one SQLite database (WAL mode), keeping the last few versions of each.
+
+    Saves are binary records (see savecodec). With batch_size > 1 saves are
+    buffered in memory and written together in one short transaction once
+    batch_size have built up; flush() or close() writes the rest. The write lock
+    is only held while a batch goes in, so other processes are never kept
+    waiting on a half-filled batch. Each process opens its own connection, so the
+    store can be shared with forked server workers.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS saves (
+            slot TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            saved_at REAL NOT NULL,
+            data BLOB NOT NULL,
+            PRIMARY KEY (slot, version)
+        )
+    '''
+
+    def __init__(self, path: str | Path, keep: int = 10, batch_size: int = 1, timeout: float = 30.0):
+        self.path = Path(path)
+        # versions kept per slot, including the latest
+        self.keep = max(1, keep)
+        self.batch_size = max(1, batch_size)
+        self.timeout = timeout
+        self._conn = None
+        self._pid = None
+        # (slot key, saved at, record) of saves not yet written, oldest first
+        self._pending: list = []
+
+    def _db(self):
+        import os
+        import sqlite3
+
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(self.SCHEMA)
+            # a forked child drops whatever its parent had buffered; the parent writes it
+            self._conn, self._pid, self._pending = conn, os.getpid(), []
+        return self._conn
+
+    @staticmethod
+    def _key(slot: str | None) -> str:
+        return slot or ''
+
+    def save(self, player: Player, slot: str | None = None) -> str:
+        import time
+
+        from . import savecodec
+
+        self._db()
+        key = self._key(slot)
+        self._pending.append((key, time.time(), savecodec.encode(player)))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+        return f"{self.path} (slot {key or 'default'})"
+
+    def _buffered(self, key: str) -> Optional[bytes]:
+        for k, _, data in reversed(self._pending):
+            if k == key:
+                return data
+        return None
+
+    def load(self, slot: str | None = None) -> Player:
+        from . import savecodec
+
+        db = self._db()
+        data = self._buffered(self._key(slot))
+        if data is None:
+            row = db.execute('SELECT data FROM saves WHERE slot = ? ORDER BY version DESC LIMIT 1',
+                             (self._key(slot),)).fetchone()
+            if row is None:
+                raise FileNotFoundError(f"No save in slot {slot or 'default'} of {self.path}")
+            data = row[0]
+        return savecodec.decode(data)
+
+    def slots(self) -> list:
+        rows = self._db().execute('SELECT DISTINCT slot FROM saves').fetchall()
+        found = {r[0] for r in rows} | {key for key, _, _ in self._pending}
+        return [key or None for key in sorted(found)]
+
+    def history(self, slot: str | None = None) -> list:
+        # versions are numbered when they are written
+        self.flush()
+        rows = self._db().execute('SELECT version, saved_at FROM saves WHERE slot = ? ORDER BY version',
+                                  (self._key(slot),)).fetchall()
+        return [f"version {v} saved at {t:.0f}" for v, t in rows[:-1]]
+
+    def restore(self, slot: str | None = None, back: int = 1) -> str:
+        self.flush()
+        rows = self._db().execute('SELECT version FROM saves WHERE slot = ? ORDER BY version',
+                                  (self._key(slot),)).fetchall()
+        if not 1 <= back < len(rows):
+            raise FileNotFoundError(f"No version {back} back in slot {slot or 'default'} of {self.path}")
+        # saved again as the newest version, so the one it replaces stays in history
+        return self.save(self.load_version(rows[-1 - back][0], slot), slot)
+
+    def load_version(self, version: int, slot: str | None = None) -> Player:
+        """Return an older version of slot, as numbered in history()."""
+        from . import savecodec
+
+        row = self._db().execute('SELECT data FROM saves WHERE slot = ? AND version = ?',
+                                 (self._key(slot), version)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"No version {version} in slot {slot or 'default'} of {self.path}")
+        return savecodec.decode(row[0])
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        db = self._db()
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        # take the write lock up front so concurrent savers queue instead of failing
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            for key, saved_at, data in rows:
+                (latest,) = db.execute('SELECT COALESCE(MAX(version), 0) FROM saves WHERE slot = ?',
+                                       (key,)).fetchone()
+                db.execute('INSERT INTO saves (slot, version, saved_at, data) VALUES (?, ?, ?, ?)',
+                           (key, latest + 1, saved_at, data))
+                db.execute('DELETE FROM saves WHERE slot = ? AND version <= ?', (key, latest + 1 - self.keep))
+        except BaseException:
+            db.execute('ROLLBACK')
+            # put the batch back so a later flush can try again
+            self._pending = rows + self._pending
+            raise
+        db.execute('COMMIT')
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+
+def open_store(path: str | Path, **kwargs) -> SaveStore:
+    """Open the store for a --save/--load path: SQLite for .db/.sqlite paths, else files."""
+    if Path(path).suffix.lower() in SQLITE_SUFFIXES:
+        return SqliteSaveStore(path, **kwargs)
+    return FileSaveStore(path)
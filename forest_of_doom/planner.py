@@ -0,0 +1,94 @@
+"""What to buy from Yaztromo's slate: the best bundles for the gold you have.
+
+Each item on the slate is worth a value weight, and a bundle is worth the sum
+of its items. ITEM_VALUES holds the weights by name and is seeded from the
+catalog: an item that raises a stat is worth STAT_WEIGHTS[stat] per point (the
+Potion of Healing's 2 STAMINA make it worth 2). Items not listed are worth the
+same for their effect, if they have one, or DEFAULT_VALUE; callers can pass
+their own weights instead. plan() finds the k best bundles costing at most the gold by
+0/1 knapsack dynamic programming over gold, keeping the top k bundles for
+every budget; bundles of equal value rank cheaper first. Results are memoised
+by (gold, slate contents, values, k), so the shop's 'plan' command and batch
+tools asking again about the same slate are dictionary lookups.
+"""
+import functools
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+
+from .items import CATALOG
+
+# value of one point of a stat an item raises: SKILL decides fights, LUCK
+# turns them, STAMINA only lasts them out
+STAT_WEIGHTS: Dict[str, float] = {'skill': 3, 'luck': 2, 'stamina': 1}
+# value of an item with no stat effect (its uses are in the story)
+DEFAULT_VALUE = 1
+
+
+def effect_value(item) -> float:
+    """What item's stat effect is worth (STAT_WEIGHTS per point), or DEFAULT_VALUE without one."""
+    effect = item.get('effect')
+    if effect not in STAT_WEIGHTS:
+        return DEFAULT_VALUE
+    return STAT_WEIGHTS[effect] * item.get('amount', 0)
+
+
+# value weight of an item by name, seeded from the catalog's effects
+ITEM_VALUES: Dict[str, float] = {it.name: effect_value(it) for it in CATALOG}
+
+
+@dataclass(frozen=True)
+class Bundle:
+    # positions on the slate (0-based, as the shop's 'buy' takes them)
+    indices: tuple
+    names: tuple
+    cost: int
+    value: float
+
+
+def _rank(bundle: Bundle) -> tuple:
+    return -bundle.value, bundle.cost, bundle.indices
+
+
+@functools.lru_cache(maxsize=1024)
+def _plan(gold: int, entries: tuple, k: int) -> tuple:
+    # entries: (slate index, name, price, value) of every item that can be bought
+    best = [(Bundle((), (), 0, 0),)] * (gold + 1)
+    for index, name, price, value in entries:
+        grown = list(best)
+        for budget in range(price, gold + 1):
+            with_item = [Bundle(b.indices + (index,), b.names + (name,), b.cost + price, b.value + value)
+                         for b in best[budget - price]]
+            grown[budget] = tuple(sorted(best[budget] + tuple(with_item), key=_rank)[:k])
+        best = grown
+    return best[gold]
+
+
+def plan(slate: Sequence, gold: int, k: int = 3, values: Optional[Dict[str, float]] = None,
+         exclude: Sequence[int] = ()) -> list:
+    """The k best bundles of slate items costing at most gold, best first.
+
+    values maps item names to weights (default ITEM_VALUES); items it doesn't
+    list are worth effect_value(). Slate positions in exclude, and items
+    without a price, are never bought.
+    """
+    if k < 1:
+        raise ValueError('k must be at least 1')
+    values = ITEM_VALUES if values is None else values
+    entries = tuple((i, it.get('name'), it.get('price'),
+                     values[it.get('name')] if it.get('name') in values else effect_value(it))
+                    for i, it in enumerate(slate)
+                    if it.get('price') is not None and it.get('price') >= 0 and i not in exclude)
+    return list(_plan(max(0, int(gold)), entries, k))
+
+
+def plan_for(player, k: int = 3, values: Optional[Dict[str, float]] = None) -> list:
+    """plan() for player's gold and slate, leaving out items the player already has."""
+    owned = {it.get('name') for it in player.inventory}
+    slate = player.slate or ()
+    exclude = tuple(i for i, it in enumerate(slate) if it.get('name') in owned)
+    return plan(slate, player.backpack.get('gold', 0), k, values, exclude)
+
+
+def cache_info():
+    """Memo statistics for the planner."""
+    return _plan.cache_info()
@@ -0,0 +1,274 @@
+"""Preforked multi-core worker pool for the game server (POSIX only).
+
+The supervisor binds the listening socket, imports the game modules once and
+forks N workers, so every worker starts warm. It accepts connections itself and
+passes each client socket (SCM_RIGHTS over a Unix socketpair) to the worker
+with the fewest live sessions. Workers report every finished session back on
+the same channel, and a worker that dies is reaped and replaced. On SIGTERM a
+worker stops serving and runs on_exit (main passes close_stores, so queued
+background saves are written) before it exits.
+
+    python -m forest_of_doom.main --serve 0.0.0.0:4000 --workers 4
+"""
+import asyncio
+import os
+import select
+import selectors
+import signal
+import socket
+from typing import Callable, Optional
+
+# Imported before forking so workers never pay the import cost.
+from . import game, models, ui  # noqa: F401
+from .server import GameServer, ServerConfig
+
+_HANDOFF = b'c'
+_DONE = b'-'
+# seconds a connection waits for a channel to drain when every worker's is full
+DISPATCH_WAIT = 0.5
+
+
+class Worker:
+    """Supervisor-side record of one worker process."""
+
+    def __init__(self, pid: int, channel: socket.socket):
+        self.pid = pid
+        self.channel = channel
+        # sessions handed to the worker that it hasn't reported finished yet
+        self.load = 0
+        self.served = 0
+
+
+def _worker_main(channel: socket.socket, config: ServerConfig, callbacks: Optional[Callable],
+                 on_exit: Optional[Callable] = None) -> None:
+    """Worker process body: serve client sockets received from the supervisor."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    async def _run():
+        srv = GameServer(config, callbacks)
+        loop = asyncio.get_running_loop()
+        stopped = loop.create_future()
+        tasks = set()
+
+        async def serve(sock):
+            try:
+                reader, writer = await asyncio.open_connection(sock=sock, limit=config.max_line)
+                await srv.handle(reader, writer)
+            finally:
+                try:
+                    channel.send(_DONE)
+                except OSError:
+                    pass
+
+        def on_channel():
+            try:
+                msg, fds, _, _ = socket.recv_fds(channel, 64, 64)
+            except BlockingIOError:
+                return
+            except OSError:
+                msg, fds = b'', []
+            for fd in fds:
+                task = loop.create_task(serve(socket.socket(fileno=fd)))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if not msg and not stopped.done():
+                # supervisor went away
+                stopped.set_result(None)
+
+        def on_sigterm():
+            if not stopped.done():
+                stopped.set_result(None)
+
+        channel.setblocking(False)
+        loop.add_reader(channel.fileno(), on_channel)
+        # stop the loop instead of dying, so on_exit still runs
+        loop.add_signal_handler(signal.SIGTERM, on_sigterm)
+        await stopped
+
+    try:
+        asyncio.run(_run())
+    finally:
+        if on_exit is not None:
+            on_exit()
+
+
+class Supervisor:
+    """Accepts connections and balances them over a pool of forked workers."""
+
+    def __init__(self, host: str, port: int, workers: Optional[int] = None, config: Optional[ServerConfig] = None,
+                 callbacks: Optional[Callable] = None, backlog: int = 1024, on_exit: Optional[Callable] = None):
+        self.host = host
+        self.port = port
+        self.size = workers or os.cpu_count() or 1
+        self.config = config or ServerConfig()
+        self.callbacks = callbacks
+        self.backlog = backlog
+        # called in each worker before it exits
+        self.on_exit = on_exit
+        self.workers: list = []
+        self.restarts = 0
+        self.accepted = 0
+        self._listener: Optional[socket.socket] = None
+        self._selector = selectors.DefaultSelector()
+        self._stopping = False
+
+    def start(self) -> tuple:
+        """Bind the listening socket and fork the workers; return the bound address."""
+        self._listener = socket.create_server((self.host, self.port), backlog=self.backlog, reuse_port=False)
+        self._listener.setblocking(False)
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        for _ in range(self.size):
+            self._spawn()
+        return self._listener.getsockname()[:2]
+
+    def _spawn(self) -> Worker:
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - runs in the child
+            code = 0
+            try:
+                parent.close()
+                self._selector.close()
+                self._listener.close()
+                for w in self.workers:
+                    w.channel.close()
+                _worker_main(child, self.config, self.callbacks, self.on_exit)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        child.close()
+        parent.setblocking(False)
+        worker = Worker(pid, parent)
+        self.workers.append(worker)
+        self._selector.register(parent, selectors.EVENT_READ, worker)
+        return worker
+
+    def _retire(self, worker: Worker) -> None:
+        """Reap a dead (or misbehaving) worker and fork a replacement."""
+        self._selector.unregister(worker.channel)
+        worker.channel.close()
+        self.workers.remove(worker)
+        try:
+            os.kill(worker.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        try:
+            os.waitpid(worker.pid, 0)
+        except ChildProcessError:
+            pass
+        if not self._stopping:
+            self.restarts += 1
+            self._spawn()
+
+    def _dispatch(self, conn: socket.socket) -> None:
+        # workers whose channel is full right now; they are busy, not dead
+        busy: list = []
+        waited = False
+        try:
+            while self.workers:
+                ready = [w for w in self.workers if w not in busy]
+                if not ready:
+                    if waited:
+                        # nobody drained their channel in time: drop the connection
+                        return
+                    select.select([], [w.channel for w in busy], [], DISPATCH_WAIT)
+                    busy, waited = [], True
+                    continue
+                worker = min(ready, key=lambda w: w.load)
+                try:
+                    socket.send_fds(worker.channel, [_HANDOFF], [conn.fileno()])
+                except BlockingIOError:
+                    busy.append(worker)
+                    continue
+                except OSError:
+                    self._retire(worker)
+                    continue
+                worker.load += 1
+                self.accepted += 1
+                return
+        finally:
+            # the worker holds its own copy of the descriptor now
+            conn.close()
+
+    def _on_worker_message(self, worker: Worker) -> None:
+        try:
+            data = worker.channel.recv(4096)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._retire(worker)
+            return
+        done = data.count(_DONE)
+        worker.load = max(0, worker.load - done)
+        worker.served += done
+
+    def _reap(self) -> None:
+        for worker in list(self.workers):
+            try:
+                pid, _ = os.waitpid(worker.pid, os.WNOHANG)
+            except ChildProcessError:
+                pid = worker.pid
+            if pid:
+                self._retire(worker)
+
+    def run_once(self, timeout: float = 0.5) -> None:
+        """Handle pending accepts and worker messages, then reap dead workers."""
+        for key, _ in self._selector.select(timeout):
+            if key.fileobj is self._listener:
+                while True:
+                    try:
+                        conn, _ = self._listener.accept()
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    self._dispatch(conn)
+            else:
+                self._on_worker_message(key.data)
+        self._reap()
+
+    def run(self) -> None:
+        """Supervise until SIGINT/SIGTERM, then stop the workers."""
+        def _stop(signum, frame):
+            self._stopping = True
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+        try:
+            while not self._stopping:
+                self.run_once()
+        finally:
+            self.stop()
+
+    def stop(self) -> None:
+        """Terminate all workers and close the listening socket."""
+        self._stopping = True
+        for worker in list(self.workers):
+            try:
+                os.kill(worker.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for worker in list(self.workers):
+            try:
+                os.waitpid(worker.pid, 0)
+            except ChildProcessError:
+                pass
+            self._selector.unregister(worker.channel)
+            worker.channel.close()
+        self.workers.clear()
+        if self._listener is not None:
+            self._selector.unregister(self._listener)
+            self._listener.close()
+            self._listener = None
+
+
+def serve(host: str, port: int, workers: Optional[int] = None, config: Optional[ServerConfig] = None,
+          callbacks: Optional[Callable] = None, on_exit: Optional[Callable] = None) -> None:
+    """Run a preforked server until interrupted; each worker calls on_exit before it exits."""
+    sup = Supervisor(host, port, workers, config, callbacks, on_exit=on_exit)
+    bound = sup.start()
+    print(f"Serving Forest of Doom on {bound[0]}:{bound[1]} with {sup.size} workers", flush=True)
+    sup.run()
+    print('Server stopped.')
@@ -0,0 +1,148 @@
+"""Per-scene latency profile of a session (main --profile).
+
+run_game(profiler=Profiler()) times each scene of the session in four parts:
+
+* think   - waiting on input() for the player (wherever it happens, including
+            the "Press Enter" pause after typewriter text)
+* render  - writing output: typewriter text, the status block, prompts
+* engine  - step(): game logic and the content pack
+* io      - in-game save/load callbacks
+
+Render time is charged to the scene whose step produced the output, think time
+to the scene waiting for the line. Each save/load callback is also timed on its
+own. Profiler.activate() is the context that times input() and, with a path,
+runs cProfile too; report() is the JSON report and summary() a few lines for
+people. Without a profiler run_game only pays for a no-op context per step.
+"""
+import builtins
+import contextlib
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+PROFILE_VERSION = 1
+_PARTS = ('think', 'render', 'engine', 'io')
+_UNTIMED = contextlib.nullcontext()
+
+
+def untimed(scene: str, part: str):
+    """Stand-in for Profiler.segment when nothing is being profiled."""
+    return _UNTIMED
+
+
+class Profiler:
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.scenes: dict = {}
+        self.callbacks: dict = {}
+        # running totals; a segment charges what they grew by to think/io, not to itself
+        self.think = 0.0
+        self.io = 0.0
+        self.wall = 0.0
+        self.cprofile_path: Optional[str] = None
+
+    def _scene(self, scene: str) -> dict:
+        rec = self.scenes.get(scene)
+        if rec is None:
+            rec = self.scenes[scene] = {'steps': 0, **{part + '_s': 0.0 for part in _PARTS}}
+        return rec
+
+    @contextlib.contextmanager
+    def segment(self, scene: str, part: str):
+        """Charge the time spent inside to part ('render' or 'engine') of scene."""
+        think, io, started = self.think, self.io, self.clock()
+        try:
+            yield
+        finally:
+            elapsed = self.clock() - started
+            rec = self._scene(scene)
+            rec['think_s'] += self.think - think
+            rec['io_s'] += self.io - io
+            rec[part + '_s'] += elapsed - (self.think - think) - (self.io - io)
+            if part == 'engine':
+                rec['steps'] += 1
+
+    def wrap_callback(self, name: str, callback):
+        """Return callback timed as a name ('save'/'load') call; None stays None."""
+        if callback is None:
+            return None
+        stats = self.callbacks.setdefault(name, {'calls': 0, 'total_s': 0.0, 'max_s': 0.0})
+
+        def timed(*args, **kwargs):
+            started = self.clock()
+            try:
+                return callback(*args, **kwargs)
+            finally:
+                elapsed = self.clock() - started
+                self.io += elapsed
+                stats['calls'] += 1
+                stats['total_s'] += elapsed
+                stats['max_s'] = max(stats['max_s'], elapsed)
+
+        return timed
+
+    @contextlib.contextmanager
+    def activate(self, cprofile_path: Optional[str | Path] = None):
+        """Time input() waits and the wall clock (and run cProfile into cprofile_path) inside."""
+        real_input = builtins.input
+
+        def timed_input(prompt=''):
+            started = self.clock()
+            try:
+                return real_input(prompt)
+            finally:
+                self.think += self.clock() - started
+
+        profile = None
+        if cprofile_path is not None:
+            import cProfile
+
+            profile = cProfile.Profile()
+            self.cprofile_path = str(cprofile_path)
+        builtins.input = timed_input
+        started = self.clock()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield self
+        finally:
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(str(cprofile_path))
+            self.wall += self.clock() - started
+            builtins.input = real_input
+
+    def totals(self) -> dict:
+        return {part + '_s': sum(rec[part + '_s'] for rec in self.scenes.values()) for part in _PARTS}
+
+    def report(self) -> dict:
+        return {
+            'version': PROFILE_VERSION,
+            'wall_s': self.wall,
+            'totals': self.totals(),
+            'scenes': self.scenes,
+            'callbacks': self.callbacks,
+            'cprofile': self.cprofile_path,
+        }
+
+    def write(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.report(), indent=2) + '\n', encoding='utf-8')
+
+    def summary(self, top: int = 5) -> list:
+        """A few lines: the split of the wall time, the slowest scenes and the callbacks."""
+        t = self.totals()
+        lines = [f"Profile: {self.wall:.2f}s wall; think {t['think_s']:.2f}s, render {t['render_s']:.3f}s, "
+                 f"engine {t['engine_s']:.3f}s, save/load {t['io_s']:.3f}s"]
+        busy = sorted(self.scenes.items(), key=lambda kv: -(kv[1]['render_s'] + kv[1]['engine_s'] + kv[1]['io_s']))
+        for scene, rec in busy[:top]:
+            lines.append(f"  {scene:<14} {rec['steps']:>4} steps  render {rec['render_s']:.3f}s  "
+                         f"engine {rec['engine_s'] * 1000:.1f}ms  io {rec['io_s'] * 1000:.1f}ms  think {rec['think_s']:.1f}s")
+        for name, stats in self.callbacks.items():
+            if not stats['calls']:
+                continue
+            avg = stats['total_s'] / stats['calls'] * 1000
+            lines.append(f"  {name}: {stats['calls']} calls, {avg:.1f}ms avg, {stats['max_s'] * 1000:.1f}ms max")
+        if self.cprofile_path:
+            lines.append(f"  cProfile stats in {self.cprofile_path} (python -m pstats {self.cprofile_path})")
+        return lines
@@ -0,0 +1,242 @@
+"""Compact binary save format.
+
+One record per player::
+
+    header     magic b'FODS', schema version (u8), catalog version (u16)
+    stats      skill, stamina, luck, initial luck (4 x i16; -1 for no initial
+               luck; schema 1 records have only the first three)
+    potion     u8 code (0 none, 1 skill, 2 strength, 3 fortune), or 255 then a string
+    backpack   varint count, then (string key, zigzag varint value) pairs
+    slate      u8 kind: 0 empty, 1 Yaztromo's slate, 2 varint id list, 3 JSON list
+    inventory  varint stack count, then per stack varint (id << 1 | custom) and
+               varint count; custom stacks are followed by the item as a JSON string
+
+Strings are a varint length and UTF-8 bytes. Records can be written back to
+back on one stream: write_player/read_player encode and decode one at a time,
+and iter_players reads until the stream ends.
+"""
+import json
+import struct
+from typing import BinaryIO, Iterator
+
+from .items import CATALOG_VERSION, YAZTROMO_SLATE, CatalogView, Item, ItemList, slate_from_list
+from .models import Backpack, Player
+
+MAGIC = b'FODS'
+SCHEMA_VERSION = 2
+# older schemas read_player still accepts
+_READABLE = (1, SCHEMA_VERSION)
+
+_HEADER = struct.Struct('<4sBH')
+_STATS = struct.Struct('<hhhh')
+_STATS_V1 = struct.Struct('<hhh')
+_POTIONS = (None, 'skill', 'strength', 'fortune')
+_POTION_OTHER = 255
+
+_SLATE_EMPTY, _SLATE_YAZTROMO, _SLATE_IDS, _SLATE_JSON = range(4)
+
+
+class SaveFormatError(ValueError):
+    """The data is not a readable binary save."""
+
+
+def _varint(n: int) -> bytes:
+    if n < 0:
+        raise ValueError('varint must not be negative')
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _zigzag(n: int) -> int:
+    return n * 2 if n >= 0 else -n * 2 - 1
+
+
+def _unzigzag(n: int) -> int:
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+def _string(text: str) -> bytes:
+    data = text.encode('utf-8')
+    return _varint(len(data)) + data
+
+
+def encode(player: Player) -> bytes:
+    """Encode player as one binary save record."""
+    out = bytearray(_HEADER.pack(MAGIC, SCHEMA_VERSION, CATALOG_VERSION))
+    initial = player.initial_luck
+    out += _STATS.pack(player.skill, player.stamina, player.luck, -1 if initial is None else initial)
+    if player.potion in _POTIONS:
+        out.append(_POTIONS.index(player.potion))
+    else:
+        out.append(_POTION_OTHER)
+        out += _string(player.potion)
+    backpack = player.backpack
+    out += _varint(len(backpack))
+    for key, value in backpack.items():
+        out += _string(key) + _varint(_zigzag(int(value)))
+    slate = player.slate
+    if not slate:
+        out.append(_SLATE_EMPTY)
+    elif slate is YAZTROMO_SLATE:
+        out.append(_SLATE_YAZTROMO)
+    elif isinstance(slate, CatalogView):
+        out.append(_SLATE_IDS)
+        out += _varint(len(slate.ids)) + b''.join(_varint(i) for i in slate.ids)
+    else:
+        out.append(_SLATE_JSON)
+        out += _string(json.dumps([it.id if isinstance(it, Item) else dict(it) for it in slate],
+                                  ensure_ascii=False, separators=(',', ':')))
+    inventory = player.inventory if isinstance(player.inventory, ItemList) else ItemList(player.inventory)
+    stacks = inventory.stacks()
+    out += _varint(len(stacks))
+    for item, count in stacks:
+        if isinstance(item, Item):
+            out += _varint(item.id << 1) + _varint(count)
+        else:
+            out += _varint(1) + _varint(count)
+            out += _string(json.dumps(item, ensure_ascii=False, separators=(',', ':')))
+    return bytes(out)
+
+
+def write_player(player: Player, stream: BinaryIO) -> int:
+    """Write one record to stream; return the number of bytes written."""
+    return stream.write(encode(player))
+
+
+class _Reader:
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+
+    def exact(self, n: int) -> bytes:
+        data = self.stream.read(n)
+        if len(data) != n:
+            raise SaveFormatError('Save data is truncated')
+        return data
+
+    def byte(self) -> int:
+        return self.exact(1)[0]
+
+    def varint(self) -> int:
+        shift = n = 0
+        while True:
+            b = self.byte()
+            n |= (b & 0x7F) << shift
+            if not b & 0x80:
+                return n
+            shift += 7
+            if shift > 63:
+                raise SaveFormatError('Varint is too long')
+
+    def string(self) -> str:
+        return self.exact(self.varint()).decode('utf-8')
+
+
+class _BufferReader(_Reader):
+    """_Reader over bytes already in memory, without a stream in between."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def exact(self, n: int) -> bytes:
+        end = self.pos + n
+        if end > len(self.data):
+            raise SaveFormatError('Save data is truncated')
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def byte(self) -> int:
+        try:
+            b = self.data[self.pos]
+        except IndexError:
+            raise SaveFormatError('Save data is truncated') from None
+        self.pos += 1
+        return b
+
+
+def read_player(stream: BinaryIO) -> Player:
+    """Read one record from stream."""
+    return _read(_Reader(stream))
+
+
+def _read(r: _Reader) -> Player:
+    magic, schema, catalog = _HEADER.unpack(r.exact(_HEADER.size))
+    if magic != MAGIC:
+        raise SaveFormatError('Not a binary save')
+    if schema not in _READABLE:
+        raise SaveFormatError(f"Unsupported save schema version {schema}")
+    if catalog > CATALOG_VERSION:
+        raise SaveFormatError(f"Save uses item catalog version {catalog}; this game knows up to {CATALOG_VERSION}")
+    if schema == 1:
+        skill, stamina, luck = _STATS_V1.unpack(r.exact(_STATS_V1.size))
+        initial = None
+    else:
+        skill, stamina, luck, initial = _STATS.unpack(r.exact(_STATS.size))
+        if initial < 0:
+            initial = None
+    code = r.byte()
+    if code == _POTION_OTHER:
+        potion = r.string()
+    elif code < len(_POTIONS):
+        potion = _POTIONS[code]
+    else:
+        raise SaveFormatError(f"Bad potion code {code}")
+    backpack = Backpack({r.string(): _unzigzag(r.varint()) for _ in range(r.varint())})
+    kind = r.byte()
+    if kind == _SLATE_YAZTROMO:
+        slate = YAZTROMO_SLATE
+    elif kind == _SLATE_IDS:
+        slate = slate_from_list([r.varint() for _ in range(r.varint())])
+    elif kind == _SLATE_JSON:
+        slate = slate_from_list(json.loads(r.string()))
+    elif kind == _SLATE_EMPTY:
+        slate = ()
+    else:
+        raise SaveFormatError(f"Bad slate kind {kind}")
+    inventory = ItemList()
+    for _ in range(r.varint()):
+        tag, count = r.varint(), r.varint()
+        inventory.add(json.loads(r.string()) if tag & 1 else tag >> 1, count)
+    return Player(skill, stamina, luck, backpack, potion, slate, inventory, initial)
+
+
+def decode(data: bytes) -> Player:
+    """Decode a single record produced by encode()."""
+    r = _BufferReader(data)
+    player = _read(r)
+    if r.pos != len(data):
+        raise SaveFormatError('Trailing data after save record')
+    return player
+
+
+def iter_players(stream: BinaryIO) -> Iterator[Player]:
+    """Yield every record on stream until it ends."""
+    while True:
+        head = stream.read(1)
+        if not head:
+            return
+        yield read_player(_Prefixed(head, stream))
+
+
+class _Prefixed:
+    """A stream with some bytes already read off its front."""
+
+    def __init__(self, head: bytes, stream: BinaryIO):
+        self.head = head
+        self.stream = stream
+
+    def read(self, n: int) -> bytes:
+        if self.head:
+            data, self.head = self.head[:n], self.head[n:]
+            return data + (self.stream.read(n - len(data)) if n > len(data) else b'')
+        return self.stream.read(n)
+
+
+def is_binary(data: bytes) -> bool:
+    """True if data starts like a binary save."""
+    return data[:len(MAGIC)] == MAGIC
@@ -0,0 +1,196 @@
+"""Background save writer: saves are queued and written off the game loop.
+
+BackgroundSaveStore wraps any models.SaveStore. save() copies the player,
+queues the copy and returns at once; a writer thread writes it after a short
+coalescing window, so several saves of one slot inside the window cost a single
+write of the latest state. load() sees queued saves before they reach the
+store. flush() waits until everything queued is written and close() does that
+and stops the thread.
+
+stats() reports queue depth, writes, coalesced saves, failures and write
+latency for monitoring.
+"""
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional
+
+from . import savecodec
+from .models import Player, SaveStore
+
+
+class BackgroundSaveStore(SaveStore):
+    def __init__(self, store: SaveStore, window: float = 0.25):
+        self.store = store
+        # seconds a queued save waits for a newer save of the same slot
+        self.window = window
+        self._cond = threading.Condition()
+        # slot -> (encoded player, time first queued)
+        self._pending: Dict[Optional[str], tuple] = {}
+        # slots the writer has taken off the queue but not finished writing
+        self._writing: Dict[Optional[str], bytes] = {}
+        # serialises access to the wrapped store
+        self._store_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._flushing = 0
+        self._closed = False
+        self.queued = 0
+        self.writes = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.write_seconds = 0.0
+        self.max_write_seconds = 0.0
+
+    def _ensure_thread(self) -> None:
+        # a forked server worker needs its own writer thread
+        if self._thread is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='save-writer', daemon=True)
+            self._thread.start()
+
+    def save(self, player: Player, slot: Optional[str] = None) -> str:
+        data = savecodec.encode(player)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('Save store is closed')
+            self._ensure_thread()
+            if slot in self._pending:
+                self.coalesced += 1
+                self._pending[slot] = (data, self._pending[slot][1])
+            else:
+                self._pending[slot] = (data, time.monotonic())
+            self.queued += 1
+            self._cond.notify_all()
+        return self._describe(slot)
+
+    def _describe(self, slot: Optional[str]) -> str:
+        path = getattr(self.store, 'path', None)
+        if callable(path):
+            return str(path(slot))
+        return f"{path or self.store} (slot {slot or 'default'})"
+
+    def load(self, slot: Optional[str] = None) -> Player:
+        with self._cond:
+            queued = self._pending.get(slot)
+            data = queued[0] if queued is not None else self._writing.get(slot)
+        if data is not None:
+            return savecodec.decode(data)
+        with self._store_lock:
+            return self.store.load(slot)
+
+    def slots(self) -> list:
+        with self._store_lock:
+            found = self.store.slots()
+        with self._cond:
+            extra = [s for s in list(self._pending) + list(self._writing) if s not in found]
+        return found + extra
+
+    def history(self, slot: Optional[str] = None) -> list:
+        with self._store_lock:
+            return self.store.history(slot)
+
+    def restore(self, slot: Optional[str] = None, back: int = 1) -> str:
+        # queued saves go first, so back counts from what is really on disk
+        self.flush()
+        with self._store_lock:
+            return self.store.restore(slot, back)
+
+    @property
+    def depth(self) -> int:
+        """Saves queued or being written."""
+        with self._cond:
+            return len(self._pending) + len(self._writing)
+
+    def stats(self) -> dict:
+        with self._cond:
+            depth = len(self._pending) + len(self._writing)
+        return {
+            'queue_depth': depth,
+            'queued': self.queued,
+            'writes': self.writes,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'avg_write_ms': self.write_seconds / self.writes * 1000 if self.writes else 0.0,
+            'max_write_ms': self.max_write_seconds * 1000,
+        }
+
+    def _due(self, now: float) -> list:
+        if self._flushing or self._closed:
+            return list(self._pending)
+        return [slot for slot, (_, at) in self._pending.items() if now - at >= self.window]
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    due = self._due(now)
+                    if due:
+                        break
+                    if self._closed and not self._pending:
+                        return
+                    wait = None
+                    if self._pending:
+                        wait = max(0.0, min(at for _, at in self._pending.values()) + self.window - now)
+                    self._cond.wait(wait)
+                batch = {slot: self._pending.pop(slot)[0] for slot in due}
+                self._writing.update(batch)
+            try:
+                self._write(batch)
+            finally:
+                # even if the writer is dying, nobody may wait on these forever
+                with self._cond:
+                    for slot in batch:
+                        self._writing.pop(slot, None)
+                    self._cond.notify_all()
+
+    def _write(self, batch: dict) -> None:
+        for slot, data in batch.items():
+            started = time.perf_counter()
+            try:
+                with self._store_lock:
+                    self.store.save(savecodec.decode(data), slot)
+            except Exception as e:
+                self._failed(self._describe(slot), e)
+            else:
+                elapsed = time.perf_counter() - started
+                self.writes += 1
+                self.write_seconds += elapsed
+                self.max_write_seconds = max(self.max_write_seconds, elapsed)
+        try:
+            with self._store_lock:
+                self.store.flush()
+        except Exception as e:
+            # a failed commit loses the whole batch
+            self._failed(', '.join(self._describe(slot) for slot in batch), e)
+
+    def _failed(self, where: str, error: Exception) -> None:
+        self.failures += 1
+        self.last_error = f"{where}: {error}"
+        print(f"Background save failed for {self.last_error}", file=sys.stderr)
+
+    def flush(self) -> None:
+        """Write every queued save now and wait until they are done."""
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid():
+                return
+            self._flushing += 1
+            self._cond.notify_all()
+            try:
+                while self._pending or self._writing:
+                    self._cond.wait()
+            finally:
+                self._flushing -= 1
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread if self._pid == os.getpid() else None
+        if thread is not None:
+            thread.join()
+        with self._store_lock:
+            self.store.close()
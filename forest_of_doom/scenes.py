@@ -0,0 +1,300 @@
+"""Scene content: text sources compiled into an indexed pack read through mmap.
+
+Scenes live in ``content/*.txt`` as sections. Each section is a run of
+directives; a directive that takes a text block (@slow, @slow-format, @text,
+@prompt) collects the lines after it up to the next directive:
+
+    @section <id>             start a section
+    @slow                     typewriter text (the front end pauses after it)
+    @slow-format              the same, with {potion}/{gold} filled in from the player
+    @text                     plain text
+    @blank                    an empty line
+    @status                   the player's status block
+    @action <name>            run a game action (see game.ACTIONS)
+    @prompt                   the question to ask; the section then waits for input
+    @choice <word> -> <id>    an answer and the section it leads to
+    @next <id>                continue straight on to another section
+    @shop                     enter Yaztromo's shop before continuing with @next
+    @end <outcome>            finish the session
+
+Lines starting with '#' are comments, and trailing empty lines of a text block
+are dropped. ``python -m forest_of_doom.scenes build`` compiles every source into
+``content/scenes.pack``: a small header, one JSON record per section and an
+offset index at the end. ContentPack maps the file and decodes a section only
+when it is first visited. The game never writes the pack next to the sources:
+after editing them, run the build command (a test checks the committed pack
+matches). Only if the pack is missing altogether does the game compile a
+private copy into a temporary directory.
+"""
+import functools
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from .commands import Grammar
+
+CONTENT_DIR = Path(__file__).resolve().parent / 'content'
+PACK_PATH = CONTENT_DIR / 'scenes.pack'
+
+PACK_MAGIC = b'FODSCENE'
+PACK_VERSION = 1
+# magic, version, section count, index offset
+_HEADER = struct.Struct('<8sHIQ')
+# offset, length of one section record
+_ENTRY = struct.Struct('<QI')
+_ID_LEN = struct.Struct('<H')
+
+_TEXT_DIRECTIVES = ('slow', 'slow-format', 'text', 'prompt')
+# every prompt also accepts save/load
+SLOT_COMMANDS = ('save [slot]', 'load [slot]')
+
+
+class ContentError(ValueError):
+    """A scene source or pack is malformed."""
+
+
+@dataclass(frozen=True)
+class Section:
+    id: str
+    # (kind, value) pairs: kind is slow, slow-format, text, blank, status or action
+    blocks: tuple = ()
+    prompt: Optional[str] = None
+    # (word, target section) pairs
+    choices: tuple = ()
+    next: Optional[str] = None
+    shop: bool = False
+    end: Optional[str] = None
+
+    @functools.cached_property
+    def grammar(self) -> Grammar:
+        return Grammar(*(word for word, _ in self.choices), *SLOT_COMMANDS)
+
+    def target(self, choice: str) -> str:
+        return dict(self.choices)[choice]
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'blocks': [list(b) for b in self.blocks],
+            'prompt': self.prompt,
+            'choices': [list(c) for c in self.choices],
+            'next': self.next,
+            'shop': self.shop,
+            'end': self.end,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Section':
+        return cls(
+            id=data['id'],
+            blocks=tuple(tuple(b) for b in data.get('blocks', ())),
+            prompt=data.get('prompt'),
+            choices=tuple(tuple(c) for c in data.get('choices', ())),
+            next=data.get('next'),
+            shop=bool(data.get('shop', False)),
+            end=data.get('end'),
+        )
+
+
+def parse_source(text: str, origin: str = '<string>') -> list:
+    """Parse one scene source file into a list of Sections."""
+    sections: list = []
+    current: Optional[dict] = None
+    block: Optional[list] = None  # lines of the open text block
+
+    def close_block():
+        nonlocal block
+        if block is None:
+            return
+        kind, lines = block[0], block[1:]
+        while lines and lines[-1] == '':
+            lines.pop()
+        value = '\n'.join(lines)
+        if kind == 'prompt':
+            current['prompt'] = value
+        else:
+            current['blocks'].append((kind, value))
+        block = None
+
+    def close_section():
+        close_block()
+        if current is not None:
+            sections.append(Section(
+                id=current['id'], blocks=tuple(current['blocks']), prompt=current['prompt'],
+                choices=tuple(current['choices']), next=current['next'], shop=current['shop'], end=current['end']))
+
+    for lineno, line in enumerate(text.split('\n'), start=1):
+        if line.startswith('#'):
+            continue
+        if not line.startswith('@'):
+            if block is not None:
+                block.append(line)
+            elif line.strip():
+                raise ContentError(f"{origin}:{lineno}: text outside a text block")
+            continue
+        directive, _, arg = line[1:].partition(' ')
+        arg = arg.strip()
+        if directive == 'section':
+            close_section()
+            current = {'id': arg, 'blocks': [], 'prompt': None, 'choices': [], 'next': None, 'shop': False, 'end': None}
+            continue
+        if current is None:
+            raise ContentError(f"{origin}:{lineno}: @{directive} before any @section")
+        close_block()
+        if directive in _TEXT_DIRECTIVES:
+            block = [directive]
+        elif directive in ('blank', 'status'):
+            current['blocks'].append((directive, ''))
+        elif directive == 'action':
+            current['blocks'].append(('action', arg))
+        elif directive == 'choice':
+            word, sep, target = arg.partition('->')
+            if not sep:
+                raise ContentError(f"{origin}:{lineno}: expected '@choice <word> -> <section>'")
+            current['choices'].append((word.strip().lower(), target.strip()))
+        elif directive == 'next':
+            current['next'] = arg
+        elif directive == 'shop':
+            current['shop'] = True
+        elif directive == 'end':
+            current['end'] = arg
+        else:
+            raise ContentError(f"{origin}:{lineno}: unknown directive @{directive}")
+    close_section()
+    return sections
+
+
+def load_sources(source_dir: Path = CONTENT_DIR) -> list:
+    """Parse every ``*.txt`` source (in name order) and check the section graph."""
+    sections: list = []
+    for path in sorted(Path(source_dir).glob('*.txt')):
+        sections.extend(parse_source(path.read_text(encoding='utf-8'), origin=path.name))
+    ids = [s.id for s in sections]
+    dupes = {i for i in ids if ids.count(i) > 1}
+    if dupes:
+        raise ContentError(f"Duplicate sections: {', '.join(sorted(dupes))}")
+    known = set(ids)
+    for s in sections:
+        targets = [t for _, t in s.choices] + ([s.next] if s.next else [])
+        missing = [t for t in targets if t not in known]
+        if missing:
+            raise ContentError(f"Section {s.id!r} leads to unknown section(s): {', '.join(missing)}")
+        if s.choices and s.prompt is None:
+            raise ContentError(f"Section {s.id!r} has choices but no @prompt")
+    return sections
+
+
+def build_pack(sections: list, path: Path = PACK_PATH) -> Path:
+    """Write sections to a pack file: header, JSON records, then the offset index."""
+    body = bytearray()
+    index = bytearray()
+    for s in sections:
+        record = json.dumps(s.to_dict(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        sid = s.id.encode('utf-8')
+        index += _ID_LEN.pack(len(sid)) + sid + _ENTRY.pack(_HEADER.size + len(body), len(record))
+        body += record
+    header = _HEADER.pack(PACK_MAGIC, PACK_VERSION, len(sections), _HEADER.size + len(body))
+    path = Path(path)
+    # a temporary name of our own, so builds running at the same time can't mix their bytes
+    fd, tmp = tempfile.mkstemp(prefix=path.name + '.', suffix='.tmp', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header + bytes(body) + bytes(index))
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return path
+
+
+def compile_pack(source_dir: Path = CONTENT_DIR, path: Path = PACK_PATH) -> Path:
+    """Compile the scene sources in source_dir into a pack at path."""
+    return build_pack(load_sources(source_dir), path)
+
+
+class ContentPack:
+    """Read-only view of a compiled pack; sections are decoded on first use."""
+
+    def __init__(self, path: Path = PACK_PATH):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, index_at = _HEADER.unpack_from(self._mm, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self._mm.close()
+            raise ContentError(f"{self.path} is not a version {PACK_VERSION} scene pack")
+        self._index: Dict[str, tuple] = {}
+        pos = index_at
+        for _ in range(count):
+            (n,) = _ID_LEN.unpack_from(self._mm, pos)
+            pos += _ID_LEN.size
+            sid = bytes(self._mm[pos:pos + n]).decode('utf-8')
+            pos += n
+            self._index[sid] = _ENTRY.unpack_from(self._mm, pos)
+            pos += _ENTRY.size
+        self._decoded: Dict[str, Section] = {}
+
+    def __contains__(self, section_id: str) -> bool:
+        return section_id in self._index
+
+    @property
+    def ids(self) -> list:
+        return list(self._index)
+
+    @property
+    def decoded(self) -> int:
+        """How many sections have been decoded so far."""
+        return len(self._decoded)
+
+    def section(self, section_id: str) -> Section:
+        sec = self._decoded.get(section_id)
+        if sec is None:
+            try:
+                offset, length = self._index[section_id]
+            except KeyError:
+                raise ContentError(f"No section {section_id!r} in {self.path}") from None
+            sec = Section.from_dict(json.loads(self._mm[offset:offset + length].decode('utf-8')))
+            self._decoded[section_id] = sec
+        return sec
+
+    def close(self) -> None:
+        self._decoded.clear()
+        self._mm.close()
+
+
+_pack: Optional[ContentPack] = None
+
+
+def get_pack() -> ContentPack:
+    """Return the process-wide pack: the built one, or a private build if there is none."""
+    global _pack
+    if _pack is None:
+        path = PACK_PATH
+        if not path.exists():
+            path = compile_pack(path=Path(tempfile.mkdtemp(prefix='fod-scenes-')) / PACK_PATH.name)
+        _pack = ContentPack(path)
+    return _pack
+
+
+def section(section_id: str) -> Section:
+    """Shortcut for get_pack().section(section_id)."""
+    return get_pack().section(section_id)
+
+
+def main(argv=None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] != ['build']:
+        print('Usage: python -m forest_of_doom.scenes build')
+        return
+    path = compile_pack()
+    print(f"Wrote {path} ({path.stat().st_size} bytes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,229 @@
+"""Multi-session TCP/telnet server.
+
+Every connection is a game.SessionState driven by game.step() on one asyncio
+event loop, so thousands of players share a single process. Output pacing
+replaces slow_print's time.sleep with per-connection asyncio sleeps, writes
+wait on drain() so a slow reader only stalls its own session, and idle
+sessions are closed after a timeout.
+
+    python -m forest_of_doom.main --serve 0.0.0.0:4000
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from . import game, ui
+
+PAUSE_PROMPT = 'Press Enter to continue...'
+
+# Telnet command bytes: IAC starts a command; WILL/WONT/DO/DONT take one option byte.
+_IAC = 0xFF
+_SB = 0xFA
+_SE = 0xF0
+_NEGOTIATION = (0xFB, 0xFC, 0xFD, 0xFE)
+
+
+@dataclass
+class ServerConfig:
+    """Settings shared by every session on a server. cps/fps default to ui's typewriter defaults."""
+    fast: bool = False
+    seed: Optional[int] = None
+    cps: Optional[float] = None
+    fps: Optional[float] = None
+    # seconds a session may wait for input (or for the client to read output)
+    idle_timeout: float = 300.0
+    # per-connection output buffer high-water mark before writes wait on the client
+    write_buffer: int = 64 * 1024
+    # longest accepted input line
+    max_line: int = 4096
+
+
+def parse_address(text: str) -> tuple:
+    """Split 'HOST:PORT' (or ':PORT') into (host, port)."""
+    host, sep, port = text.rpartition(':')
+    if not sep or not port.isdigit():
+        raise ValueError(f"Expected HOST:PORT, got {text!r}")
+    return host or '0.0.0.0', int(port)
+
+
+def strip_telnet(data: bytes) -> bytes:
+    """Remove telnet IAC command sequences from received bytes."""
+    if _IAC not in data:
+        return data
+    out = bytearray()
+    i = 0
+    n = len(data)
+    while i < n:
+        b = data[i]
+        if b != _IAC:
+            out.append(b)
+            i += 1
+            continue
+        cmd = data[i + 1] if i + 1 < n else None
+        if cmd == _IAC:
+            out.append(_IAC)
+            i += 2
+        elif cmd in _NEGOTIATION:
+            i += 3
+        elif cmd == _SB:
+            end = data.find(bytes((_IAC, _SE)), i + 2)
+            i = n if end < 0 else end + 2
+        else:
+            i += 2
+    return bytes(out)
+
+
+class SessionClosed(Exception):
+    """The client went away or timed out."""
+
+
+class Connection:
+    """One player connected to the server."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, config: ServerConfig,
+                 callbacks: Optional[Callable] = None):
+        self.reader = reader
+        self.writer = writer
+        self.config = config
+        self.renderer = ui.TypewriterRenderer(cps=config.cps if config.cps is not None else ui.DEFAULT_CPS,
+                                              fps=config.fps if config.fps is not None else ui.DEFAULT_FPS)
+        # messages printed by save/load callbacks during a step
+        self.notes: list = []
+        if callbacks is not None:
+            self.save_callback, self.load_callback = callbacks(self.notes.append)
+        else:
+            self.save_callback = self.load_callback = None
+
+    async def send(self, text: str) -> None:
+        """Write text and wait until the client has drained it below the buffer limit."""
+        if not text:
+            return
+        self.writer.write(text.replace('\n', '\r\n').encode('utf-8'))
+        try:
+            await asyncio.wait_for(self.writer.drain(), self.config.idle_timeout)
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            raise SessionClosed() from e
+
+    async def type_out(self, text: str) -> None:
+        """Send text at the typewriter rate, one write per frame."""
+        r = self.renderer
+        if self.config.fast or r.cps <= 0 or r.fps <= 0:
+            await self.send(text)
+            return
+        loop = asyncio.get_running_loop()
+        n = len(text)
+        written = 0
+        start = loop.time()
+        while written < n:
+            due = r.chars_due(loop.time() - start, n)
+            if due > written:
+                await self.send(text[written:due])
+                written = due
+            if written >= n:
+                break
+            wait = r.next_wake(loop.time() - start, written) - (loop.time() - start)
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+    async def readline(self) -> Optional[str]:
+        """Read one line of input; None when the client closed its side."""
+        try:
+            data = await asyncio.wait_for(self.reader.readline(), self.config.idle_timeout)
+        except asyncio.TimeoutError:
+            await self.send('\nIdle timeout. Goodbye!\n')
+            raise SessionClosed()
+        except (ValueError, asyncio.LimitOverrunError, ConnectionError) as e:
+            raise SessionClosed() from e
+        if not data:
+            return None
+        return strip_telnet(data).decode('utf-8', errors='replace').rstrip('\r\n')
+
+    async def render(self, messages, player) -> None:
+        for msg in messages:
+            if msg.kind == 'slow':
+                await self.type_out(msg.text)
+                await self.send('\n')
+                if not self.config.fast:
+                    await self.send(PAUSE_PROMPT)
+                    if await self.readline() is None:
+                        raise SessionClosed()
+            elif msg.kind == 'status':
+                await self.send('\n' + msg.text + '\n')
+            else:
+                await self.send(msg.text + '\n')
+
+    async def run(self) -> game.SessionState:
+        state = game.SessionState(fast=self.config.fast, seed=self.config.seed)
+        line = None
+        while True:
+            state, messages = game.step(state, line, self.save_callback, self.load_callback)
+            if self.notes:
+                messages = [game.Message('text', note) for note in self.notes] + messages
+                self.notes.clear()
+            await self.render(messages, state.player)
+            if state.done:
+                return state
+            await self.send(state.prompt)
+            line = await self.readline()
+            if line is None and state.scene not in game.SHOP_SCENES:
+                raise SessionClosed()
+
+
+class GameServer:
+    """asyncio server hosting one game session per TCP connection."""
+
+    def __init__(self, config: Optional[ServerConfig] = None, callbacks: Optional[Callable] = None):
+        """callbacks(out) -> (save_callback, load_callback) builds each session's save/load hooks."""
+        self.config = config or ServerConfig()
+        self.callbacks = callbacks
+        self.active = 0
+        self.served = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.active += 1
+        writer.transport.set_write_buffer_limits(high=self.config.write_buffer)
+        conn = Connection(reader, writer, self.config, self.callbacks)
+        try:
+            await conn.run()
+            await conn.send('\nGoodbye!\n')
+        except SessionClosed:
+            pass
+        finally:
+            self.active -= 1
+            self.served += 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0, sock=None) -> tuple:
+        """Start listening (on host/port, or an already bound socket); return the bound address."""
+        if sock is not None:
+            self._server = await asyncio.start_server(self.handle, sock=sock, limit=self.config.max_line)
+        else:
+            self._server = await asyncio.start_server(self.handle, host, port, limit=self.config.max_line)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self) -> None:
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+
+
+def serve(host: str, port: int, config: Optional[ServerConfig] = None, callbacks: Optional[Callable] = None) -> None:
+    """Run a GameServer until interrupted."""
+    async def _main():
+        server = GameServer(config, callbacks)
+        bound = await server.start(host, port)
+        print(f"Serving Forest of Doom on {bound[0]}:{bound[1]}", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        print('\nServer stopped.')
@@ -0,0 +1,279 @@
+"""Headless batch simulator: many seeded playthroughs, aggregated for balance work.
+
+Each playthrough drives step() with an input policy instead of a player, with
+no terminal I/O. A policy is called as policy(state, rng, turn) before each
+input, with the session state, the playthrough's RNG and the number of lines
+typed so far, and returns the line to type (None closes the input). The built-in policies:
+
+* random    - a random choice at every prompt; random shop commands
+* greedy    - enters, follows Yaztromo and buys the cheapest affordable item
+              it doesn't have yet until the gold runs out
+* planned   - like greedy, but buys the best bundle planner.plan_for finds,
+              in one basket order
+* scripted  - types the given lines, then closes the input
+
+Seeds are split into chunks across a ProcessPoolExecutor; each worker returns
+a Tally of its chunk and the tallies are merged, so little crosses between
+processes. The summary (outcome rates, final stats, gold left, items bought)
+is printed and can be written as JSON::
+
+    python -m forest_of_doom.simulate -n 10000 --policy greedy --jobs 4 --output summary.json
+"""
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from .game import SHOP_SCENES, SessionState, step
+from .planner import plan_for
+
+SUMMARY_VERSION = 1
+MAX_STEPS = 500
+_STATS = ('skill', 'stamina', 'luck', 'gold', 'items')
+
+
+class RandomPolicy:
+    def __init__(self, exit_chance: float = 0.2):
+        # chance of leaving the shop at each shop prompt
+        self.exit_chance = exit_chance
+
+    def __call__(self, state: SessionState, rng: random.Random, turn: int) -> Optional[str]:
+        if state.scene == 'shop_confirm':
+            return rng.choice(('yes', 'no'))
+        if state.scene == 'shop':
+            if rng.random() < self.exit_chance:
+                return 'exit'
+            command = rng.choice(('buy', 'buy', 'buy', 'view', 'use', 'list'))
+            if command == 'list':
+                return command
+            # shop indices are 0-based; now and then one is out of range
+            size = len(state.player.slate) if command != 'use' else len(state.player.inventory)
+            return f"{command} {rng.randint(0, size)}"
+        from . import scenes
+
+        return rng.choice(scenes.section(state.scene).choices)[0]
+
+
+class GreedyShopper:
+    def __init__(self, potion: Optional[str] = None):
+        # None picks a random potion per playthrough
+        self.potion = potion
+
+    def __call__(self, state: SessionState, rng: random.Random, turn: int) -> Optional[str]:
+        scene, player = state.scene, state.player
+        if scene == 'shop_confirm':
+            return 'yes'
+        if scene == 'shop':
+            owned = {it.get('name') for it in player.inventory}
+            gold = player.backpack.get('gold', 0)
+            best = None
+            for i, it in enumerate(player.slate):
+                price = it.get('price')
+                if price is not None and price <= gold and (best is None or price < best[0]) \
+                        and it.get('name') not in owned:
+                    best = (price, i)
+            return f"buy {best[1]}" if best is not None else 'exit'
+        if scene == 'potion':
+            return self.potion or rng.choice(('skill', 'strength', 'fortune'))
+        from . import scenes
+
+        words = [word for word, _ in scenes.section(scene).choices]
+        for word in ('yes', 'ready', 'follow'):
+            if word in words:
+                return word
+        return words[0]
+
+
+class PlannedShopper(GreedyShopper):
+    def __call__(self, state: SessionState, rng: random.Random, turn: int) -> Optional[str]:
+        if state.scene == 'shop':
+            # the whole bundle as one basket; the memo makes planning a lookup after the first playthrough
+            best = plan_for(state.player, 1)[0]
+            return f"buy {' '.join(map(str, best.indices))}" if best.indices else 'exit'
+        return super().__call__(state, rng, turn)
+
+
+class Scripted:
+    def __init__(self, lines):
+        self.lines = list(lines)
+
+    def __call__(self, state: SessionState, rng: random.Random, turn: int) -> Optional[str]:
+        return self.lines[turn] if turn < len(self.lines) else None
+
+
+POLICIES = {
+    'random': RandomPolicy,
+    'greedy': GreedyShopper,
+    'planned': PlannedShopper,
+    'scripted': Scripted,
+}
+
+
+def make_policy(name: str, arg: Optional[str] = None):
+    """Build a policy from its name and an optional argument (the script for 'scripted',
+    comma separated; the potion for 'greedy' and 'planned')."""
+    if name == 'scripted':
+        return Scripted([line.strip() for line in (arg or '').split(',') if line.strip()])
+    if name in ('greedy', 'planned'):
+        return POLICIES[name](arg)
+    return POLICIES[name]()
+
+
+def play(seed: int, policy, max_steps: int = MAX_STEPS) -> dict:
+    """Play one session with policy; return its outcome and final player numbers."""
+    # separate from the game's own seeded RNG, so the two don't draw the same numbers
+    rng = random.Random(f"{seed}:policy")
+    state, _ = step(SessionState(seed=seed), None)
+    turn = 0
+    while not state.done and turn < max_steps:
+        line = policy(state, rng, turn)
+        if line is None and state.scene not in SHOP_SCENES:
+            break
+        turn += 1
+        state, _ = step(state, line)
+    player = state.player
+    bought = [it.get('name', '?') for it in player.inventory]
+    return {
+        'seed': seed,
+        'outcome': state.outcome if state.done else 'unfinished',
+        'potion': player.potion,
+        'skill': player.skill,
+        'stamina': player.stamina,
+        'luck': player.luck,
+        'gold': player.backpack.get('gold', 0),
+        'items': len(bought),
+        'bought': bought,
+        'steps': turn,
+    }
+
+
+class Tally:
+    """Running aggregate of play() results; tallies of separate chunks merge()."""
+
+    def __init__(self):
+        self.count = 0
+        self.steps = 0
+        self.outcomes: Counter = Counter()
+        self.potions: Counter = Counter()
+        self.bought: Counter = Counter()
+        self.sums = dict.fromkeys(_STATS, 0)
+        self.mins: dict = {}
+        self.maxs: dict = {}
+        # stat -> Counter of values, for the distributions
+        self.values = {name: Counter() for name in _STATS}
+
+    def add(self, result: dict) -> None:
+        self.count += 1
+        self.steps += result['steps']
+        self.outcomes[result['outcome']] += 1
+        self.potions[result['potion']] += 1
+        self.bought.update(result['bought'])
+        for name in _STATS:
+            v = result[name]
+            self.sums[name] += v
+            self.mins[name] = min(self.mins.get(name, v), v)
+            self.maxs[name] = max(self.maxs.get(name, v), v)
+            self.values[name][v] += 1
+
+    def merge(self, other: 'Tally') -> None:
+        self.count += other.count
+        self.steps += other.steps
+        self.outcomes.update(other.outcomes)
+        self.potions.update(other.potions)
+        self.bought.update(other.bought)
+        for name in _STATS:
+            self.sums[name] += other.sums[name]
+            self.values[name].update(other.values[name])
+            if name in other.mins:
+                self.mins[name] = min(self.mins.get(name, other.mins[name]), other.mins[name])
+                self.maxs[name] = max(self.maxs.get(name, other.maxs[name]), other.maxs[name])
+
+    def summary(self) -> dict:
+        n = self.count or 1
+        return {
+            'playthroughs': self.count,
+            'outcomes': dict(self.outcomes),
+            'game_over_rate': self.outcomes['game_over'] / n,
+            'potions': {str(k): v for k, v in self.potions.items()},
+            'stats': {name: {'mean': self.sums[name] / n, 'min': self.mins.get(name), 'max': self.maxs.get(name),
+                             'distribution': {str(k): v for k, v in sorted(self.values[name].items())}}
+                      for name in _STATS},
+            'items_bought': dict(self.bought.most_common()),
+            'mean_inputs': self.steps / n,
+        }
+
+
+def _run_chunk(seeds: range, policy_name: str, policy_arg: Optional[str], max_steps: int) -> Tally:
+    policy = make_policy(policy_name, policy_arg)
+    tally = Tally()
+    for seed in seeds:
+        tally.add(play(seed, policy, max_steps))
+    return tally
+
+
+def simulate(n: int, policy: str = 'greedy', policy_arg: Optional[str] = None, first_seed: int = 0,
+             jobs: Optional[int] = None, max_steps: int = MAX_STEPS) -> dict:
+    """Play seeds first_seed .. first_seed + n - 1 across jobs processes; return the summary."""
+    jobs = jobs or os.cpu_count() or 1
+    started = time.perf_counter()
+    tally = Tally()
+    seeds = range(first_seed, first_seed + n)
+    if jobs == 1:
+        tally = _run_chunk(seeds, policy, policy_arg, max_steps)
+    else:
+        # a few chunks per worker evens out uneven chunks without much overhead
+        size = max(1, -(-n // (jobs * 4)))
+        chunks = [seeds[i:i + size] for i in range(0, n, size)]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for part in pool.map(_run_chunk, chunks, [policy] * len(chunks), [policy_arg] * len(chunks),
+                                 [max_steps] * len(chunks)):
+                tally.merge(part)
+    elapsed = time.perf_counter() - started
+    summary = tally.summary()
+    summary.update({
+        'version': SUMMARY_VERSION,
+        'policy': policy if policy_arg is None else f"{policy}:{policy_arg}",
+        'first_seed': first_seed,
+        'jobs': jobs,
+        'seconds': elapsed,
+        'playthroughs_per_s': n / elapsed if elapsed > 0 else 0.0,
+    })
+    return summary
+
+
+def format_summary(s: dict) -> list:
+    lines = [f"{s['playthroughs']} playthroughs ({s['policy']}) on {s['jobs']} processes in {s['seconds']:.2f}s: "
+             f"{s['playthroughs_per_s']:.0f}/s",
+             'Outcomes: ' + ', '.join(f"{k} {v / max(1, s['playthroughs']):.1%}" for k, v in sorted(s['outcomes'].items()))]
+    for name, st in s['stats'].items():
+        lines.append(f"  {name:<8} mean {st['mean']:6.2f}  min {st['min']}  max {st['max']}")
+    top = list(s['items_bought'].items())[:5]
+    if top:
+        lines.append('Most bought: ' + ', '.join(f"{name} ({count})" for name, count in top))
+    return lines
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description='Run many headless, seeded playthroughs and summarise them')
+    parser.add_argument('-n', '--count', type=int, default=1000, help='playthroughs to run')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='greedy', help='how inputs are chosen')
+    parser.add_argument('--policy-arg', default=None,
+                        help="for scripted: the lines to type, comma separated; for greedy/planned: the potion to take")
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first playthrough')
+    parser.add_argument('--jobs', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--output', metavar='FILE', default=None, help='write the summary as JSON')
+    args = parser.parse_args(argv)
+    summary = simulate(args.count, args.policy, args.policy_arg, args.seed, args.jobs)
+    for line in format_summary(summary):
+        print(line)
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2) + '\n', encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
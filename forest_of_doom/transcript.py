@@ -0,0 +1,179 @@
+"""Input transcripts: record what a player typed, replay it at full speed.
+
+A transcript is JSON lines::
+
+    {"transcript": 1, "state": {...}}     the session before its first step (seed included)
+    "yes"                                 one line of input
+    null                                  the input closed (leaves the shop)
+    {"load": {...}}                       the player an in-game load returned (null if none)
+    {"end": "9c1f...", "done": true}      hash of the final player
+
+run_game(transcript=Recorder(path)) writes one. replay() plays the inputs back
+through step() with no output, taking loads from the transcript instead of the
+disk and skipping saves, then checks the final player hash. replay_all() does
+that for many transcripts, e.g. a directory of recorded sessions.
+"""
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from .game import SessionState, step
+from .models import Player, player_from_dict, player_to_dict
+
+TRANSCRIPT_VERSION = 1
+TRANSCRIPT_SUFFIX = '.transcript'
+
+
+def player_hash(player: Player) -> str:
+    """SHA-256 of the player's save dict, the same for equal players."""
+    data = json.dumps(player_to_dict(player), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class Recorder:
+    """Writes one session's transcript; run_game calls it as the session is played."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.inputs = 0
+        self._file = None
+
+    def _write(self, record) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        # flushed per line, so a crashed session is still on disk up to the crash
+        self._file.flush()
+
+    def start(self, state: SessionState) -> None:
+        self.close()
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._write({'transcript': TRANSCRIPT_VERSION, 'state': state.to_dict()})
+
+    def input(self, line: Optional[str]) -> None:
+        self.inputs += 1
+        self._write(line)
+
+    def wrap_load(self, load_callback):
+        """Return load_callback recording what each load returns (None stays None)."""
+        if load_callback is None:
+            return None
+
+        def load(slot=None):
+            player = load_callback(slot=slot) if slot is not None else load_callback()
+            self._write({'load': player_to_dict(player) if player is not None else None})
+            return player
+
+        return load
+
+    def finish(self, state: SessionState) -> None:
+        if self._file is not None:
+            self._write({'end': player_hash(state.player), 'done': state.done})
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+@dataclass
+class ReplayResult:
+    path: str
+    ok: bool
+    steps: int = 0
+    expected: Optional[str] = None
+    actual: Optional[str] = None
+    error: Optional[str] = None
+
+
+class _Records:
+    def __init__(self, records: list):
+        self.records = records
+        self.pos = 0
+
+    def peek(self):
+        return self.records[self.pos] if self.pos < len(self.records) else None
+
+    def take(self):
+        record = self.peek()
+        self.pos += 1
+        return record
+
+
+def _is_input(record) -> bool:
+    return record is None or isinstance(record, str)
+
+
+def replay(path: str | Path) -> ReplayResult:
+    """Play a transcript back and compare the final player with the recorded hash."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError) as e:
+        return ReplayResult(str(path), False, error=f"unreadable: {e}")
+    if not lines or not isinstance(lines[0], dict) or lines[0].get('transcript') != TRANSCRIPT_VERSION:
+        return ReplayResult(str(path), False, error='not a transcript')
+    end = lines[-1] if isinstance(lines[-1], dict) and 'end' in lines[-1] else None
+    records = _Records(lines[1:-1] if end is not None else lines[1:])
+
+    def load_callback(slot=None):
+        # a load record follows the input that asked for it
+        record = records.peek()
+        if isinstance(record, dict) and 'load' in record:
+            records.take()
+            return player_from_dict(record['load']) if record['load'] is not None else None
+        return None
+
+    def save_callback(player, slot=None):
+        pass
+
+    state = SessionState.from_dict(lines[0]['state'])
+    steps = 0
+    try:
+        if state.scene == 'start':
+            state, _ = step(state, None, save_callback, load_callback)
+        while records.pos < len(records.records):
+            record = records.take()
+            if not _is_input(record):
+                raise ValueError(f"unexpected record {record!r}")
+            if state.done:
+                raise ValueError('session ended before the recorded input did')
+            state, _ = step(state, record, save_callback, load_callback)
+            steps += 1
+    except Exception as e:
+        return ReplayResult(str(path), False, steps, error=f"step {steps}: {e}")
+    actual = player_hash(state.player)
+    if end is None:
+        return ReplayResult(str(path), False, steps, actual=actual, error='transcript has no end record')
+    ok = actual == end['end'] and state.done == end.get('done', state.done)
+    return ReplayResult(str(path), ok, steps, end['end'], actual, None if ok else 'final state differs')
+
+
+def find_transcripts(paths) -> list:
+    """Expand directories in paths to the transcripts under them."""
+    found = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            found.extend(sorted(p.rglob('*' + TRANSCRIPT_SUFFIX)))
+        else:
+            found.append(p)
+    return found
+
+
+def replay_all(paths, out=print) -> bool:
+    """Replay every transcript in paths (files or directories); report failures and a summary.
+
+    Return True if there were some and all of them reproduced their recorded final state.
+    """
+    started = time.perf_counter()
+    results = [replay(p) for p in find_transcripts(paths)]
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        out(f"FAIL {r.path}: {r.error}" + (f" (expected {r.expected[:12]}, got {r.actual[:12]})"
+                                         if r.expected and r.actual else ''))
+    elapsed = time.perf_counter() - started
+    steps = sum(r.steps for r in results)
+    out(f"Replayed {len(results)} transcripts ({steps} inputs) in {elapsed:.2f}s: "
+        f"{len(results) - len(failed)} ok, {len(failed)} failed")
+    return bool(results) and not failed
@@ -1,27 +1,242 @@
+import os
 import sys
 import time
-from typing import Iterable, Sequence, Optional, Dict, Callable, Any
+from typing import Iterable, Sequence, Optional, Dict, Callable, Any, NamedTuple
 
+from .commands import CommandError, Grammar, Match, UnknownCommandError, route
+from .items import ItemList, items_to_list
 
-def slow_print(text: str, delay: float = 0.03, pause: bool = True, fast: bool = False) -> None:
+try:  # POSIX only; on Windows the animation simply can't be skipped
+    import select
+    import termios
+except ImportError:  # pragma: no cover - platform dependent
+    select = None
+    termios = None
+
+# Typewriter defaults: 0.03s per character matches the original slow_print pacing.
+DEFAULT_CPS = 1 / 0.03
+DEFAULT_FPS = 30
+
+
+def _is_tty(stream) -> bool:
+    try:
+        return bool(stream.isatty())
+    except Exception:
+        return False
+
+
+class TypewriterRenderer:
+    """Frame-clocked typewriter effect.
+
+    Text is scheduled against a monotonic clock: character ``i`` is due at
+    ``start + i / cps``. Each frame writes every character that has come due in a
+    single write, so sleep overshoot never accumulates and the perceived speed
+    stays at ``cps`` regardless of jitter. Non-TTY streams get one plain write.
+
+    ``clock`` and ``sleep`` are injectable for tests; when left as None the
+    current ``time.monotonic``/``time.sleep`` are looked up at render time.
+    """
+
+    def __init__(self, cps: float = DEFAULT_CPS, fps: float = DEFAULT_FPS, stream=None,
+                 clock: Optional[Callable[[], float]] = None, sleep: Optional[Callable[[float], None]] = None):
+        self.cps = cps
+        self.fps = fps
+        self.stream = stream
+        self.clock = clock
+        self.sleep = sleep
+
+    def render(self, text: str, skip: Optional[Callable[[], bool]] = None) -> None:
+        """Write text with the typewriter effect.
+
+        ``skip`` is polled once per frame; when it returns True the rest of the
+        text is written immediately.
+        """
+        stream = self.stream if self.stream is not None else sys.stdout
+        if not text:
+            return
+        if self.cps <= 0 or self.fps <= 0 or not _is_tty(stream):
+            stream.write(text)
+            stream.flush()
+            return
+        clock = self.clock or time.monotonic
+        sleep = self.sleep or time.sleep
+        n = len(text)
+        written = 0
+        start = clock()
+        while written < n:
+            if skip is not None and skip():
+                break
+            due = self.chars_due(clock() - start, n)
+            if due > written:
+                stream.write(text[written:due])
+                stream.flush()
+                written = due
+            if written >= n:
+                break
+            wait = self.next_wake(clock() - start, written) - (clock() - start)
+            if wait > 0:
+                sleep(wait)
+        if written < n:
+            stream.write(text[written:])
+            stream.flush()
+
+    def chars_due(self, elapsed: float, n: int) -> int:
+        """Number of characters of an n-character text due ``elapsed`` seconds in."""
+        # the first character is due at start, so +1
+        return min(n, int(elapsed * self.cps) + 1)
+
+    def next_wake(self, elapsed: float, written: int) -> float:
+        """Elapsed time at which the next frame should be written.
+
+        This is the next frame boundary, but never before the next character is
+        due. Boundaries are absolute, so a late wake-up shortens the following
+        sleep instead of drifting.
+        """
+        interval = 1.0 / self.fps
+        next_frame = (int(elapsed / interval) + 1) * interval
+        return max(next_frame, written / self.cps)
+
+
+_typewriter = TypewriterRenderer()
+
+# Keys typed while an animation was playing. They are replayed into the next
+# read_input() call so a skip keypress (or a fast typist) never loses input.
+_typeahead: list = []
+
+
+class KeyReader:
+    """Non-blocking keypress detection for stdin on a POSIX terminal.
+
+    Use as a context manager: while active the terminal is in cbreak mode (no
+    line buffering, no echo) so single keys become readable immediately.
+    pressed() polls with select() and moves any bytes it reads into the
+    typeahead buffer. When stdin isn't a TTY the reader is inert.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream
+        self.fd = None
+        self.skipped = False
+        self._saved = None
+
+    def __enter__(self) -> 'KeyReader':
+        stream = self.stream if self.stream is not None else sys.stdin
+        if termios is None or not _is_tty(stream):
+            return self
+        try:
+            fd = stream.fileno()
+            saved = termios.tcgetattr(fd)
+            mode = termios.tcgetattr(fd)
+            mode[3] &= ~(termios.ICANON | termios.ECHO)
+            mode[6][termios.VMIN] = 1
+            mode[6][termios.VTIME] = 0
+            # TCSANOW (not TCSAFLUSH) so nothing already typed is discarded
+            termios.tcsetattr(fd, termios.TCSANOW, mode)
+        except (termios.error, OSError, ValueError):
+            return self
+        self.fd, self._saved = fd, saved
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.fd is not None:
+            try:
+                termios.tcsetattr(self.fd, termios.TCSANOW, self._saved)
+            except termios.error:
+                pass
+            self.fd = None
+
+    def pressed(self) -> bool:
+        """Return True if any key arrived since the last poll."""
+        if self.fd is None:
+            return False
+        got = False
+        while select.select([self.fd], [], [], 0)[0]:
+            data = os.read(self.fd, 1024)
+            if not data:
+                break
+            _typeahead.append(data.decode('utf-8', errors='ignore'))
+            got = True
+        if got:
+            self.skipped = True
+        return got
+
+
+def _drop_skip_key() -> None:
+    """Discard the Enter/space that skipped an animation; keep anything else as typeahead."""
+    if _typeahead and _typeahead[0][:1] in ('\n', '\r', ' '):
+        _typeahead[0] = _typeahead[0][1:]
+
+
+def _take_typeahead() -> str:
+    """Return pending typeahead with backspaces applied and control keys removed."""
+    out: list = []
+    for ch in ''.join(_typeahead):
+        if ch in ('\x7f', '\b'):
+            if out and out[-1] != '\n':
+                out.pop()
+        elif ch == '\r' or ch == '\n':
+            out.append('\n')
+        elif ch.isprintable():
+            out.append(ch)
+    _typeahead.clear()
+    return ''.join(out)
+
+
+def read_input(prompt: str = '') -> str:
+    """input() that first consumes keys typed during a skipped animation.
+
+    A complete typed-ahead line is returned without blocking; a partial one is
+    echoed after the prompt and completed by the player.
+    """
+    pending = _take_typeahead()
+    if not pending:
+        return input(prompt)
+    line, sep, rest = pending.partition('\n')
+    if rest:
+        _typeahead.append(rest)
+    sys.stdout.write(prompt + line + sep)
+    sys.stdout.flush()
+    if sep:
+        return line
+    return line + input()
+
+
+def configure_typewriter(cps: Optional[float] = None, fps: Optional[float] = None) -> TypewriterRenderer:
+    """Set the default characters-per-second and frame rate used by slow_print."""
+    if cps is not None:
+        _typewriter.cps = cps
+    if fps is not None:
+        _typewriter.fps = fps
+    return _typewriter
+
+
+def slow_print(text: str, delay: Optional[float] = None, pause: bool = True, fast: bool = False) -> None:
     """Print text slowly. If fast is True, prints normally. If pause is True, waits for Enter.
 
-    Designed to be testable and to handle interrupts gracefully.
+    ``delay`` is the per-character delay in seconds; when omitted the rate set by
+    configure_typewriter is used. Pressing a key during the animation prints the
+    rest of the text at once and skips the pause; keys typed after it are kept for
+    the next prompt. Designed to be testable and to handle interrupts gracefully.
     """
     if fast:
         # In fast mode we print normally and skip any pause to avoid blocking/tests
         print(text)
         return
 
+    renderer = _typewriter
+    if delay is not None:
+        renderer = TypewriterRenderer(cps=1 / delay if delay > 0 else 0, fps=_typewriter.fps)
     try:
-        for char in text:
-            sys.stdout.write(char)
-            sys.stdout.flush()
-            time.sleep(delay)
+        with KeyReader() as keys:
+            renderer.render(text, skip=keys.pressed)
+        if keys.skipped:
+            _drop_skip_key()
         print()
-        if pause:
+        # A key that skipped the animation also dismisses the pause, so whatever
+        # was typed after it stays in the typeahead for the next real prompt.
+        if pause and not keys.skipped:
             try:
-                input("Press Enter to continue...")
+                read_input("Press Enter to continue...")
             except (KeyboardInterrupt, EOFError):
                 print()
     except (KeyboardInterrupt, EOFError):
@@ -29,56 +244,168 @@ def slow_print(text: str, delay: float = 0.03, pause: bool = True, fast: bool =
         raise
 
 
+def ask(prompt: str, grammar: Grammar, handlers: Optional[Dict[str, Callable[..., Any]]] = None) -> Match:
+    """Prompt until a line matches grammar and isn't consumed by one of handlers.
+
+    Input is lowercased before parsing. Raises KeyboardInterrupt/EOFError if user interrupts.
+    """
+    while True:
+        match = route(grammar, read_input(prompt).lower(), handlers)
+        if match is not None:
+            return match
+
+
 def get_valid_input(prompt: str, valid_options: Sequence[str], special_handlers: Optional[Dict[str, Callable[[str], Any]]] = None) -> str:
     """Prompt until a valid option (case-insensitive) is entered.
 
     special_handlers is an optional dict mapping specific input strings (lowercase) to
     callables that will be executed when that input is entered. The handler is called
-    and the prompt repeats.
+    and the prompt repeats. A key ending in '*' (e.g. 'save*') also accepts text after
+    the word ('save slot1'). Every handler receives the whole line as typed
+    (lowercased). Options, which may contain spaces, and handler words must be
+    typed in full.
 
     Raises KeyboardInterrupt/EOFError if user interrupts.
     """
-    options = [opt.lower() for opt in valid_options]
-    handlers = {k.lower(): v for k, v in (special_handlers or {}).items()}
+    options = {opt.lower() for opt in valid_options}
+    exact = {}
+    words = {}
+    for key, handler in (special_handlers or {}).items():
+        key = key.lower()
+        if key.endswith('*'):
+            words[key[:-1]] = handler
+        else:
+            exact[key] = handler
     while True:
-        try:
-            choice = input(prompt).lower().strip()
-        except (KeyboardInterrupt, EOFError):
-            raise
+        choice = read_input(prompt).lower().strip()
+        # options and exact handlers are literal lines, looked up as they are
         if choice in options:
             return choice
-        # exact handler match
-        if choice in handlers:
-            try:
-                handlers[choice](choice)
-            except Exception as e:
-                print(f"Handler for '{choice}' raised an error: {e}")
-            continue
-        # prefix handlers: keys ending with '*' match startswith(key[:-1])
-        for hk, hv in handlers.items():
-            if hk.endswith('*'):
-                prefix = hk[:-1]
-                if choice.startswith(prefix):
-                    try:
-                        hv(choice)
-                    except Exception as e:
-                        print(f"Handler for prefix '{prefix}' raised an error: {e}")
-                    break
+        if choice in exact:
+            name, handler = choice, exact[choice]
         else:
+            name = next((w for w in words if choice == w or choice.startswith(w + ' ')), None)
+            handler = words.get(name)
+        if handler is None:
             print(f"Please choose one of: {', '.join(valid_options)}")
-        print(f"Please choose one of: {', '.join(valid_options)}")
+            continue
+        try:
+            handler(choice)
+        except Exception as e:
+            print(f"Handler for '{name}' raised an error: {e}")
 
 
-def display_status(player) -> None:
-    # Player is expected to have attributes: skill, stamina, luck, backpack, potion
-    print(f"\nStatus: Skill: {player.skill}, Stamina: {player.stamina}, Luck: {player.luck}")
+def status_lines(player) -> list:
+    """Return the status block shown by display_status as a list of lines."""
+    lines = [f"Status: Skill: {player.skill}, Stamina: {player.stamina}, Luck: {player.luck}"]
     try:
         backpack_items = ', '.join(f'{k}: {v}' for k, v in player.backpack.items())
     except Exception:
         backpack_items = str(player.backpack)
-    print(f"Backpack: {backpack_items}")
+    lines.append(f"Backpack: {backpack_items}")
     if getattr(player, 'potion', None):
-        print(f"Potion: {player.potion.capitalize()}")
+        lines.append(f"Potion: {player.potion.capitalize()}")
+    return lines
+
+
+class StatusPanel:
+    """Persistent status region pinned to the top of an ANSI terminal.
+
+    The first render makes room for the panel at the top without clearing the
+    screen (the text already there moves into the scrollback, not away), draws
+    it and restricts scrolling to the rows below it. Later renders diff against the last drawn lines and
+    emit only cursor moves plus the changed tail of each changed row. Without
+    ANSI support the full block is printed, but only when it changed.
+    """
+
+    HEIGHT = 4  # status, backpack, potion, inventory
+
+    def __init__(self, stream=None, ansi: Optional[bool] = None, width: Optional[int] = None):
+        self.stream = stream
+        self.ansi = ansi
+        self.width = width
+        self.bytes_written = 0
+        self._last: Optional[list] = None
+
+    @classmethod
+    def for_terminal(cls, stream=None) -> Optional['StatusPanel']:
+        """A panel for stream (stdout by default) if it is a terminal, else None."""
+        return cls(stream) if _is_tty(stream if stream is not None else sys.stdout) else None
+
+    def _out(self):
+        return self.stream if self.stream is not None else sys.stdout
+
+    def lines(self, player) -> list:
+        lines = status_lines(player)
+        if len(lines) < 3:
+            lines.append('')
+        inv = getattr(player, 'inventory', []) or []
+        lines.append('Inventory: ' + (', '.join(f"{i}. {it.get('name')}" for i, it in enumerate(inv)) or '(empty)'))
+        if self.width:
+            lines = [ln[:self.width] for ln in lines]
+        return lines
+
+    def _write(self, data: str) -> int:
+        if data:
+            stream = self._out()
+            stream.write(data)
+            stream.flush()
+            self.bytes_written += len(data.encode('utf-8'))
+        return len(data.encode('utf-8'))
+
+    def render(self, player) -> int:
+        """Bring the panel up to date with player; return the number of bytes written."""
+        ansi = self.ansi if self.ansi is not None else _is_tty(self._out())
+        if self.width is None and ansi:
+            import shutil
+
+            self.width = shutil.get_terminal_size().columns
+        new = self.lines(player)
+        old, self._last = self._last, new
+        if not ansi:
+            if new == old:
+                return 0
+            return self._write('\n' + '\n'.join(ln for ln in new if ln) + '\n')
+        if old is None:
+            rows = self.HEIGHT + 1  # the panel and its rule
+            top = rows + 1
+            body = '\r\n'.join(new) + '\r\n' + '-' * min(self.width or 40, 40)
+            # Blank lines first, so the cursor ends up below where the panel goes.
+            # Then scroll the screen up by the panel's height (its top rows go to
+            # the scrollback) and insert as many blank rows at the top, which puts
+            # the rest of the text back where it was. Draw the panel in those rows,
+            # confine scrolling to the rows under it and put the cursor back.
+            return self._write('\n' * rows + '\x1b7\x1b[999;1H' + '\n' * rows + f'\x1b[H\x1b[{rows}L'
+                               + f'{body}\x1b[{top};r\x1b8')
+        parts = []
+        for row, (a, b) in enumerate(zip(old, new), start=1):
+            if a == b:
+                continue
+            col = 0
+            while col < len(a) and col < len(b) and a[col] == b[col]:
+                col += 1
+            parts.append(f'\x1b[{row};{col + 1}H{b[col:]}')
+            if len(b) < len(a):
+                parts.append('\x1b[K')
+        if not parts:
+            return 0
+        # save cursor, patch the changed cells, restore cursor
+        return self._write('\x1b7' + ''.join(parts) + '\x1b8')
+
+    def close(self) -> None:
+        """Release the scroll region so the terminal behaves normally again."""
+        ansi = self.ansi if self.ansi is not None else _is_tty(self._out())
+        if ansi and self._last is not None:
+            self._write('\x1b[r\x1b[999;1H')
+        self._last = None
+
+
+def display_status(player, panel: Optional[StatusPanel] = None) -> None:
+    # Player is expected to have attributes: skill, stamina, luck, backpack, potion
+    if panel is not None:
+        panel.render(player)
+        return
+    print('\n' + '\n'.join(status_lines(player)))
 
 
 def display_slate(player) -> None:
@@ -119,13 +446,100 @@ def buy_from_slate(player, index: int) -> tuple[bool, str]:
     player.backpack['gold'] = gold - price
     inv = getattr(player, 'inventory', None)
     if inv is None:
-        player.inventory = []
+        player.inventory = ItemList()
         inv = player.inventory
-    # Append a shallow copy of the item to inventory to avoid shared references
-    inv.append(dict(item))
+    # An ItemList stores the catalog id (or its own copy of a custom item);
+    # plain lists get a shallow copy to avoid shared references
+    inv.append(item if isinstance(inv, ItemList) else dict(item))
     return True, f"Purchased {item.get('name')} for {price} gold"
 
 
+def parse_basket(text: str) -> list:
+    """Parse the items of a 'buy' command into [(slate index, count), ...].
+
+    Items are 0-based slate numbers separated by spaces or commas; '2x7' is two
+    of item 7. Repeats add up, and items keep the order they were first named in.
+    Raises ValueError with a message for the player.
+    """
+    counts: Dict[int, int] = {}
+    for token in text.replace(',', ' ').split():
+        count, sep, index = token.lower().partition('x')
+        if not sep:
+            count, index = '1', count
+        try:
+            count, index = int(count), int(index)
+        except ValueError:
+            raise ValueError(f"Invalid item {token!r}; try 'buy 1 3 5' or 'buy 2x7'") from None
+        if count < 1:
+            raise ValueError(f"Invalid count in {token!r}")
+        counts[index] = counts.get(index, 0) + count
+    if not counts:
+        raise ValueError('Usage: buy <n> [n ...]')
+    return list(counts.items())
+
+
+def _basket_items(player, basket) -> list:
+    """[(item, count), ...] for a basket of slate indices or (index, count) pairs."""
+    slate = getattr(player, 'slate', []) or []
+    counts: Dict[int, int] = {}
+    for entry in basket:
+        index, count = (entry, 1) if isinstance(entry, int) else entry
+        if not isinstance(index, int) or not isinstance(count, int) or count < 1:
+            raise ValueError('Invalid basket')
+        counts[index] = counts.get(index, 0) + count
+    items = []
+    for index, count in counts.items():
+        if index < 0 or index >= len(slate):
+            raise ValueError(f"Item index {index} out of range")
+        item = slate[index]
+        if item.get('price') is None:
+            raise ValueError(f"{item.get('name')} has no price set")
+        items.append((item, count))
+    return items
+
+
+def basket_total(player, basket) -> int:
+    """Check a basket against the slate and the player's gold; return what it costs.
+
+    Raises ValueError (with a message for the player) if any item can't be
+    bought or the player can't afford the lot.
+    """
+    total = sum(item.get('price') * count for item, count in _basket_items(player, basket))
+    gold = player.backpack.get('gold', 0)
+    if total > gold:
+        raise ValueError(f"Insufficient gold: the basket costs {total} gold and you have {gold}")
+    return total
+
+
+def buy_basket(player, basket) -> tuple[bool, str]:
+    """Buy a basket of slate items as one transaction: all of them or none.
+
+    basket holds 0-based slate indices and/or (index, count) pairs. The whole
+    basket is checked first, and the new inventory is built on a copy, so the
+    player only changes (gold and inventory together) once everything has
+    worked. Returns (True, receipt) or (False, message) with the player untouched.
+    """
+    try:
+        items = _basket_items(player, basket)
+        total = basket_total(player, basket)
+        gold = int(player.backpack.get('gold', 0))
+    except (TypeError, ValueError) as e:
+        return False, str(e)
+    inv = getattr(player, 'inventory', None)
+    # staged on a copy, always an ItemList (whatever the player held before)
+    staged = ItemList(inv if inv is not None else ())
+    receipt = ['Receipt:']
+    for item, count in items:
+        for _ in range(count):
+            staged.append(item)
+        receipt.append(f"  {count} x {item.get('name')}: {item.get('price') * count} gold")
+    # commit
+    player.inventory = staged
+    player.backpack['gold'] = gold - total
+    receipt.append(f"Total {total} gold; you have {gold - total} gold left")
+    return True, '\n'.join(receipt)
+
+
 def use_item(player, index: int) -> tuple[bool, str]:
     """Use an item from the player's inventory by 0-based index.
 
@@ -139,7 +553,12 @@ def use_item(player, index: int) -> tuple[bool, str]:
         return False, 'Index out of range'
     item = inv.pop(index)
     name = item.get('name', '')
-    # Simple effect rules
+    # Catalog items say what they do
+    effect = item.get('effect')
+    if effect:
+        setattr(player, effect, getattr(player, effect) + item.get('amount', 0))
+        return True, f"You use {name}. {effect.capitalize()} increased."
+    # Simple effect rules for custom items
     if 'Healing' in name:
         try:
             player.stamina += 2
@@ -162,150 +581,292 @@ def use_item(player, index: int) -> tuple[bool, str]:
     return True, f"You use {name}."
 
 
-def shop_loop(player, fast: bool = False, save_handler=None, load_handler=None) -> None:
+SHOP_HELP = 'Unknown command. Try: list, buy <n> [n ...], view <n>, use <n>, drink, plan [k], save, load, exit'
+# shop commands can be abbreviated ('li', 'b 3'); a purchase still waits for a yes/no
+SHOP_GRAMMAR = Grammar('list', 'buy <items>', 'view <index:int>', 'use <index:int>', 'drink', 'plan [count:int]',
+                       'exit', 'save [slot]', 'load [slot]', prefixes=True)
+# bundles the 'plan' command lists when no count is given
+PLAN_COUNT = 3
+
+
+def show_slate(player, panel: Optional[StatusPanel] = None, out: Callable[[str], Any] = print) -> None:
+    """Print the shop's slate table followed by the inventory (the 'list' command)."""
+    slate = getattr(player, 'slate', []) or []
+    inv = getattr(player, 'inventory', []) or []
+    gold = player.backpack.get('gold', 0)
+    if panel is not None:
+        out("Yaztromo's Slate")
+    else:
+        out(f"Yaztromo's Slate — You have {gold} gold")
+    if not slate:
+        out('  (no items)')
+    else:
+        # column widths
+        name_w = max((len(i.get('name', '')) for i in slate), default=10)
+        name_w = min(max(name_w, 10), 30)
+        out(f"  {'#':>2}  {'Item':{name_w}}   Price")
+        out('  ' + '-' * (name_w + 12))
+        for i, item in enumerate(slate):
+            price = item.get('price')
+            price_str = f"{price}g" if price is not None else '(unset)'
+            name = item.get('name', '<unnamed>')
+            out(f"  {i:2d}. {name:{name_w}}   {price_str:>6}")
+    if panel is not None:
+        # gold and inventory are already on screen in the status panel
+        return
+    # show inventory briefly
+    out('\nInventory:')
+    if not inv:
+        out('  (empty)')
+    else:
+        for i, it in enumerate(inv):
+            out(f"  {i:2d}. {it.get('name')}")
+
+
+def purchase_prompt(player, order) -> str:
+    """Return the yes/no question asked before buying order: a slate index or a basket."""
+    if isinstance(order, int):
+        item = player.slate[order]
+        return f"Buy '{item.get('name', '<unnamed>')}' for {item.get('price')} gold? (yes/no): "
+    items = _basket_items(player, order)
+    count = sum(n for _, n in items)
+    total = sum(item.get('price') * n for item, n in items)
+    return f"Buy these {count} items for {total} gold? (yes/no): "
+
+
+def confirm_purchase(player, order, answer: str, out: Callable[[str], Any] = print,
+                     emit: Optional[Callable[..., Any]] = None) -> bool:
+    """Complete a purchase started by shop_command once the player has answered.
+
+    A purchase made is reported to emit as emit('purchase', items=[...], gold=-cost).
+    """
+    if answer.strip().lower() not in ('y', 'yes'):
+        out('Purchase cancelled')
+        return False
+    gold = player.backpack.get('gold', 0)
+    ok, msg = buy_from_slate(player, order) if isinstance(order, int) else buy_basket(player, order)
+    out(msg)
+    if ok and emit is not None:
+        if isinstance(order, int):
+            bought = [player.slate[order]]
+        else:
+            bought = [item for item, count in _basket_items(player, order) for _ in range(count)]
+        emit('purchase', items=items_to_list(bought), gold=player.backpack.get('gold', 0) - gold)
+    return ok
+
+
+class _ShopContext(NamedTuple):
+    player: Any
+    save_handler: Optional[Callable]
+    load_handler: Optional[Callable]
+    panel: Optional[StatusPanel]
+    out: Callable[[str], Any]
+    emit: Optional[Callable[..., Any]] = None
+
+
+def _shop_list(ctx: _ShopContext) -> tuple:
+    show_slate(ctx.player, panel=ctx.panel, out=ctx.out)
+    return None, None
+
+
+def _slate_item(ctx: _ShopContext, index: int):
+    slate = getattr(ctx.player, 'slate', []) or []
+    if index < 0 or index >= len(slate):
+        ctx.out('Index out of range')
+        return None
+    return slate[index]
+
+
+def _shop_buy(ctx: _ShopContext, items: str) -> tuple:
+    try:
+        basket = parse_basket(items)
+    except ValueError as e:
+        ctx.out(str(e))
+        return None, None
+    if len(basket) > 1 or basket[0][1] > 1:
+        try:
+            items = _basket_items(ctx.player, basket)
+            basket_total(ctx.player, basket)
+        except ValueError as e:
+            ctx.out(str(e))
+            return None, None
+        for item, count in items:
+            ctx.out(f"  {count} x {item.get('name')}: {item.get('price') * count} gold")
+        # lists rather than tuples, so a pending basket survives a JSON round trip unchanged
+        return 'confirm', [[index, count] for index, count in basket]
+    index = basket[0][0]
+    item = _slate_item(ctx, index)
+    if item is None:
+        return None, None
+    if item.get('price') is None:
+        ctx.out('Item has no price set')
+        return None, None
+    return 'confirm', index
+
+
+def _shop_view(ctx: _ShopContext, index: int) -> tuple:
+    item = _slate_item(ctx, index)
+    if item is not None:
+        # detailed view
+        ctx.out('Item:')
+        ctx.out(f"  Name : {item.get('name')}")
+        ctx.out(f"  Price: {item.get('price')}")
+        ctx.out(f"  Raw  : {dict(item)}")
+    return None, None
+
+
+def _shop_use(ctx: _ShopContext, index: int) -> tuple:
+    player = ctx.player
+    inv = getattr(player, 'inventory', []) or []
+    item = inv[index] if 0 <= index < len(inv) else None
+    ok, msg = use_item(player, index)
+    ctx.out(msg)
+    if ok and ctx.emit is not None:
+        ctx.emit('use_item', index=index, item=items_to_list([item])[0],
+                 stats={'skill': player.skill, 'stamina': player.stamina, 'luck': player.luck})
+    return None, None
+
+
+def _shop_drink(ctx: _ShopContext) -> tuple:
+    player = ctx.player
+    if player.drink_fortune():
+        ctx.out(f"You drink the Potion of Fortune: your LUCK is back to {player.luck}")
+        if ctx.emit is not None:
+            ctx.emit('drink', potion=None, stats={'luck': player.luck})
+    else:
+        ctx.out('You have no Potion of Fortune to drink')
+    return None, None
+
+
+def _shop_plan(ctx: _ShopContext, count: Optional[int]) -> tuple:
+    from .planner import plan_for
+
+    count = PLAN_COUNT if count is None else count
+    if count < 1:
+        ctx.out('Invalid count')
+        return None, None
+    gold = ctx.player.backpack.get('gold', 0)
+    bundles = [b for b in plan_for(ctx.player, count) if b.indices]
+    if not bundles:
+        ctx.out(f"Nothing on the slate you can buy with {gold} gold")
+        return None, None
+    ctx.out(f"Best buys for {gold} gold:")
+    for n, bundle in enumerate(bundles, 1):
+        items = ', '.join(f"#{i} {name}" for i, name in zip(bundle.indices, bundle.names))
+        ctx.out(f"  {n}. {bundle.cost} gold, value {bundle.value:g}: {items}")
+    return None, None
+
+
+def _shop_exit(ctx: _ShopContext) -> tuple:
+    return 'exit', None
+
+
+def _shop_save(ctx: _ShopContext, slot: Optional[str]) -> tuple:
+    if ctx.save_handler is None:
+        ctx.out('Save handler not available')
+    else:
+        ctx.save_handler(ctx.player, slot=slot)
+    return None, None
+
+
+def _shop_load(ctx: _ShopContext, slot: Optional[str]) -> tuple:
+    if ctx.load_handler is None:
+        ctx.out('Load handler not available')
+        return None, None
+    new_p = ctx.load_handler(slot=slot) if slot is not None else ctx.load_handler()
+    if new_p is not None:
+        # mutate fields
+        player = ctx.player
+        player.skill = new_p.skill
+        player.stamina = new_p.stamina
+        player.luck = new_p.luck
+        player.initial_luck = new_p.initial_luck
+        player.backpack = new_p.backpack
+        player.potion = new_p.potion
+        player.slate = new_p.slate
+        player.inventory = new_p.inventory
+        if ctx.emit is not None:
+            from .models import player_to_dict
+
+            ctx.emit('load', player=player_to_dict(player))
+    return None, None
+
+
+_SHOP_ACTIONS = {
+    'list': _shop_list,
+    'buy': _shop_buy,
+    'view': _shop_view,
+    'use': _shop_use,
+    'drink': _shop_drink,
+    'plan': _shop_plan,
+    'exit': _shop_exit,
+    'save': _shop_save,
+    'load': _shop_load,
+}
+
+
+def shop_command(player, cmd: str, save_handler=None, load_handler=None, panel: Optional[StatusPanel] = None,
+                 out: Callable[[str], Any] = print, emit: Optional[Callable[..., Any]] = None) -> tuple:
+    """Handle one line typed at the shop prompt without blocking.
+
+    Returns ``('exit', None)`` when the player leaves, ``('confirm', order)`` when
+    a purchase is waiting for a yes/no answer (see purchase_prompt and
+    confirm_purchase), and ``(None, None)`` otherwise. order is the slate index
+    for one item, or a basket of [index, count] pairs for 'buy 1 3 5'.
+
+    save_handler is called as ``save_handler(player, slot=...)``; load_handler as
+    ``load_handler(slot=...)`` (or with no arguments) and should return a Player.
+    Changes to the player ('use', 'drink', 'load') are reported to emit as small
+    events (see game.SessionState.emit).
+    """
+    if not cmd.strip():
+        return None, None
+    try:
+        match = SHOP_GRAMMAR.parse(cmd)
+    except UnknownCommandError:
+        out(SHOP_HELP)
+        return None, None
+    except CommandError as e:
+        out(str(e))
+        return None, None
+    ctx = _ShopContext(player, save_handler, load_handler, panel, out, emit)
+    return _SHOP_ACTIONS[match.name](ctx, **match.args)
+
+
+def shop_loop(player, fast: bool = False, save_handler=None, load_handler=None, panel: Optional[StatusPanel] = None) -> None:
     """Interactive shop loop. Commands:
     - list: show slate
     - buy <n>: buy item at index n
+    - buy <n> <m> ... / buy 2x<n>: buy several items at once, all or none (see buy_basket)
     - view <n>: show item details
     - use <n>: use item from inventory by index
+    - drink: drink the Potion of Fortune, restoring the initial LUCK
+    - plan / plan <k>: the k best bundles to buy with the gold left (see planner)
     - exit: leave shop
     - save / save <slot>: call save_handler
     - load / load <slot>: call load_handler
 
-    This is intentionally minimal and test-friendly.
-    """
-    def call_save(text: str):
-        if save_handler is None:
-            print('Save handler not available')
-            return
-        parts = text.split(maxsplit=1)
-        slot = parts[1].strip() if len(parts) > 1 else None
-        save_handler(player, slot=slot)
-
-    def call_load(text: str):
-        if load_handler is None:
-            print('Load handler not available')
-            return
-        parts = text.split(maxsplit=1)
-        slot = parts[1].strip() if len(parts) > 1 else None
-        new_p = load_handler(slot=slot) if slot is not None else load_handler()
-        if new_p is not None:
-            # mutate fields
-            player.skill = new_p.skill
-            player.stamina = new_p.stamina
-            player.luck = new_p.luck
-            player.backpack = new_p.backpack
-            player.potion = new_p.potion
-            player.slate = new_p.slate
-            player.inventory = new_p.inventory
+    When a StatusPanel is given, gold and inventory live in the panel, which is
+    refreshed after every command instead of being reprinted by 'list'.
 
+    This is a blocking driver over shop_command; it is intentionally minimal and test-friendly.
+    """
     while True:
+        if panel is not None:
+            panel.render(player)
         try:
-            cmd = input('shop> ').strip()
+            cmd = read_input('shop> ').strip()
         except (KeyboardInterrupt, EOFError):
             print()
             break
-        if not cmd:
-            continue
-        cmd_l = cmd.lower()
-        if cmd_l == 'list':
-            slate = getattr(player, 'slate', []) or []
-            inv = getattr(player, 'inventory', []) or []
-            gold = player.backpack.get('gold', 0)
-            print(f"Yaztromo's Slate — You have {gold} gold")
-            if not slate:
-                print('  (no items)')
-            else:
-                # column widths
-                name_w = max((len(i.get('name', '')) for i in slate), default=10)
-                name_w = min(max(name_w, 10), 30)
-                print(f"  {'#':>2}  {'Item':{name_w}}   Price")
-                print('  ' + '-' * (name_w + 12))
-                for i, item in enumerate(slate):
-                    price = item.get('price')
-                    price_str = f"{price}g" if price is not None else '(unset)'
-                    name = item.get('name', '<unnamed>')
-                    print(f"  {i:2d}. {name:{name_w}}   {price_str:>6}")
-            # show inventory briefly
-            print('\nInventory:')
-            if not inv:
-                print('  (empty)')
-            else:
-                for i, it in enumerate(inv):
-                    print(f"  {i:2d}. {it.get('name')}" )
-            continue
-        if cmd_l.startswith('buy'):
-            parts = cmd.split()
-            if len(parts) < 2:
-                print('Usage: buy <index>')
-                continue
-            try:
-                idx = int(parts[1])
-            except ValueError:
-                print('Invalid index')
-                continue
-            slate = getattr(player, 'slate', []) or []
-            if idx < 0 or idx >= len(slate):
-                print('Index out of range')
-                continue
-            item = slate[idx]
-            price = item.get('price')
-            pname = item.get('name', '<unnamed>')
-            if price is None:
-                print('Item has no price set')
-                continue
+        action, idx = shop_command(player, cmd, save_handler=save_handler, load_handler=load_handler, panel=panel)
+        if action == 'exit':
+            break
+        if action == 'confirm':
             # confirmation prompt
             try:
-                resp = input(f"Buy '{pname}' for {price} gold? (yes/no): ").strip().lower()
+                resp = read_input(purchase_prompt(player, idx))
             except (KeyboardInterrupt, EOFError):
                 print()
                 continue
-            if resp not in ('y', 'yes'):
-                print('Purchase cancelled')
-                continue
-            ok, msg = buy_from_slate(player, idx)
-            print(msg)
-            continue
-        if cmd_l.startswith('view'):
-            parts = cmd.split()
-            if len(parts) < 2:
-                print('Usage: view <index>')
-                continue
-            try:
-                idx = int(parts[1])
-            except ValueError:
-                print('Invalid index')
-                continue
-            slate = getattr(player, 'slate', []) or []
-            if idx < 0 or idx >= len(slate):
-                print('Index out of range')
-                continue
-            item = slate[idx]
-            # detailed view
-            print('Item:')
-            print(f"  Name : {item.get('name')}")
-            print(f"  Price: {item.get('price')}")
-            print(f"  Raw  : {item}")
-            continue
-        if cmd_l.startswith('use'):
-            parts = cmd.split()
-            if len(parts) < 2:
-                print('Usage: use <index>')
-                continue
-            try:
-                idx = int(parts[1])
-            except ValueError:
-                print('Invalid index')
-                continue
-            ok, msg = use_item(player, idx)
-            print(msg)
-            continue
-        if cmd_l == 'exit':
-            break
-        if cmd_l.startswith('save'):
-            call_save(cmd)
-            continue
-        if cmd_l.startswith('load'):
-            call_load(cmd)
-            continue
-    print('Unknown command. Try: list, buy <n>, view <n>, use <n>, save, load, exit')
+            confirm_purchase(player, idx, resp)
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+
+from forest_of_doom import main
+from forest_of_doom.backups import BackupStore, RetentionPolicy
+from forest_of_doom.models import FileSaveStore, Player, SqliteSaveStore
+
+import pytest
+
+
+def test_identical_saves_are_stored_once(tmp_path):
+    store = FileSaveStore(tmp_path / 'player.json', cache=None)
+    for _ in range(20):
+        store.save(Player(skill=7))
+    store.save(Player(skill=8))
+    # every backup so far held the same skill-7 file
+    assert len(store.history()) == 1
+    assert len(list((tmp_path / '.backups' / 'objects').glob('*/*'))) == 1
+    assert not list(tmp_path.glob('*.bak'))
+
+
+def test_restore_brings_back_an_older_save(tmp_path):
+    store = FileSaveStore(tmp_path / 'player.sav', cache=None)
+    for skill in (1, 2, 3):
+        store.save(Player(skill=skill), 'a')
+    assert store.restore('a', 2).endswith('player_a.sav')
+    assert store.load('a').skill == 1
+    # the save that was replaced is a backup now, so the restore can be undone
+    store.restore('a')
+    assert store.load('a').skill == 3
+    with pytest.raises(FileNotFoundError):
+        store.restore('a', 99)
+
+
+def test_retention_thins_old_backups():
+    hour, day = 3600, 86400
+    now = 100 * day
+    # one backup every hour for the last ten days
+    entries = [{'hash': str(i), 'at': now - i * hour} for i in range(240, -1, -1)]
+    kept = RetentionPolicy(keep_last=5, hourly=6, daily=3).select(entries, now)
+    ages = sorted(round((now - e['at']) / hour) for e in kept)
+    assert ages[:5] == [0, 1, 2, 3, 4]
+    assert 5 in ages and 6 not in ages
+    assert max(ages) < 3 * 24 and len(kept) == 7
+
+
+def test_pruned_objects_are_collected(tmp_path):
+    backups = BackupStore(tmp_path, RetentionPolicy(keep_last=2, hourly=0, daily=0), gc_every=1, gc_grace=0)
+    backups.add('other', b'shared')
+    for i, data in enumerate([b'shared', b'one', b'two', b'three']):
+        backups.add('slot', data, at=i)
+    assert [backups.read(e['hash']) for e in backups.history('slot')] == [b'two', b'three']
+    assert sorted(backups.read(p.name) for p in (tmp_path / 'objects').glob('*/*')) == \
+        [b'shared', b'three', b'two']
+    assert backups.disk_usage() > 0
+
+
+def test_gc_spares_recent_objects(tmp_path):
+    backups = BackupStore(tmp_path, RetentionPolicy(keep_last=1, hourly=0, daily=0))
+    backups.add('slot', b'old', at=0)
+    backups.add('slot', b'new', at=1)
+    # unreferenced now, but just written: another process may be about to refer to it
+    assert backups.gc() == 0
+    old = next(p for p in (tmp_path / 'objects').glob('*/*') if backups.read(p.name) == b'old')
+    os.utime(old, (0, 0))
+    assert backups.gc() == 1 and not old.exists()
+
+
+def _add_many(root, n):
+    backups = BackupStore(root, RetentionPolicy(keep_last=1000, hourly=0, daily=0))
+    for i in range(25):
+        backups.add('shared', f'{n}:{i}'.encode())
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_concurrent_backups_keep_every_history_line(tmp_path):
+    ctx = multiprocessing.get_context('fork')
+    procs = [ctx.Process(target=_add_many, args=(tmp_path, n)) for n in range(4)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    assert len(BackupStore(tmp_path).history('shared')) == 100
+
+
+def test_sqlite_restore_and_cli(tmp_path, capsys):
+    path = tmp_path / 'saves.db'
+    store = SqliteSaveStore(path)
+    for skill in (4, 5):
+        store.save(Player(skill=skill))
+    store.close()
+    try:
+        assert main.manage_backups(path)
+        assert main.manage_backups(path, restore=1)
+        assert main.get_store(path).load().skill == 4
+        assert not main.manage_backups(path, 'missing', restore=1)
+    finally:
+        main.close_stores()
+    out = capsys.readouterr().out
+    assert '1  version 1' in out and 'Restored backup 1' in out and 'Failed to restore' in out
@@ -0,0 +1,30 @@
+import builtins
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'benchmarks'))
+
+import suite  # noqa: E402
+
+from forest_of_doom import ui  # noqa: E402
+
+
+def test_every_benchmark_runs_and_restores_patches(tmp_path):
+    typewriter, input_ = ui._typewriter, builtins.input
+    results = suite.run(list(suite.BENCHMARKS), min_time=0, repeat=1)['results']
+    assert set(results) == set(suite.BENCHMARKS)
+    assert all(r['seconds_per_op'] > 0 for r in results.values())
+    assert ui._typewriter is typewriter and builtins.input is input_
+
+
+def test_regressions_fail_the_run(tmp_path, capsys):
+    baseline = {'results': {'buy_use': {'seconds_per_op': 1e-9}, 'gone': {'seconds_per_op': 1.0}}}
+    (tmp_path / 'base.json').write_text(json.dumps(baseline))
+    out = tmp_path / 'now.json'
+    argv = ['buy_use', '--baseline', str(tmp_path / 'base.json'), '--output', str(out), '--min-time', '0', '--repeat', '1']
+    assert suite.main(argv) == 1
+    assert 'REGRESSION buy_use' in capsys.readouterr().out
+    current = json.loads(out.read_text())
+    assert suite.compare(current, current, 0.0) == []
+    assert suite.main(argv[:1] + ['--baseline', str(out), '--threshold', '1e9', '--min-time', '0', '--repeat', '1']) == 0
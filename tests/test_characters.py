@@ -0,0 +1,39 @@
+from fractions import Fraction
+
+import pytest
+
+from forest_of_doom import characters
+
+
+def test_distribution_tables_are_exact():
+    stamina = characters.distribution('stamina')
+    assert min(stamina) == 14 and max(stamina) == 24 and stamina[19] == Fraction(6, 36)
+    assert sum(stamina.values()) == 1
+    assert characters.distribution('luck', 'fortune') == {v + 1: p for v, p in characters.distribution('luck').items()}
+    assert characters.percentile('skill', 9) == Fraction(1, 2)
+    assert characters.percentile('luck', 7, 'fortune') == 0
+    assert characters.quantile('stamina', 0.5) == 19 and characters.quantile('skill', 1.0) == 12
+
+
+def test_batch_is_reproducible_and_matches_the_tables():
+    np = pytest.importorskip('numpy')
+    batch = characters.generate_batch(60_000, seed=5, potion='random')
+    again = characters.generate_batch(60_000, seed=5, potion='random')
+    assert batch.dtype == np.dtype(characters.CHARACTER_DTYPE) and np.array_equal(batch, again)
+    assert not np.array_equal(batch, characters.generate_batch(60_000, seed=6, potion='random'))
+
+    values, counts = np.unique(batch['stamina'], return_counts=True)
+    expected = characters.distribution('stamina')
+    assert list(values) == list(expected)
+    assert all(abs(c / len(batch) - float(expected[v])) < 0.01 for v, c in zip(values, counts))
+    fortune = batch[batch['potion'] == characters.POTIONS.index('fortune')]
+    assert fortune['luck'].min() == 8 and fortune['luck'].max() == 13
+    assert set(np.unique(batch['potion'])) == {1, 2, 3}
+
+
+def test_batches_in_chunks_and_players():
+    pytest.importorskip('numpy')
+    chunks = list(characters.iter_batches(25, seed=1, potion='fortune', chunk=10))
+    assert [len(c) for c in chunks] == [10, 10, 5]
+    players = characters.to_players(chunks[0][:2])
+    assert players[0].potion == 'fortune' and 8 <= players[0].luck <= 13
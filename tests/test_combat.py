@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from forest_of_doom import combat
+from forest_of_doom.models import Player
+
+
+class Dice:
+    """rng stand-in rolling the given faces in order."""
+
+    def __init__(self, *faces):
+        self.faces = list(faces)
+
+    def randint(self, a, b):
+        return self.faces.pop(0)
+
+
+def test_round_odds():
+    win, lose, tie = combat.round_odds(9, 9)
+    assert win == pytest.approx(lose) and win + lose + tie == pytest.approx(1)
+    assert combat.round_odds(12, 2)[0] > 0.99
+    assert combat.luck_chance(2) == pytest.approx(1 / 36) and combat.luck_chance(12) == pytest.approx(1)
+
+
+def test_one_decisive_round_and_luck_choices():
+    win, lose, _ = combat.round_odds(8, 7)
+    odds = combat.odds_for(8, 2, 0, 7, 2)
+    assert odds.win == pytest.approx(win / (win + lose))
+    assert odds.expected_stamina_if_won == pytest.approx(2)
+    # luck can't help a hit that kills anyway, and with no luck there is nothing to test
+    assert combat.odds_for(8, 2, 9, 7, 2, 'attack') == odds
+    assert combat.odds_for(8, 10, 0, 7, 10, 'optimal') == combat.odds_for(8, 10, 0, 7, 10)
+    best = combat.odds_for(8, 14, 7, 7, 8, 'optimal').win
+    assert all(best >= combat.odds_for(8, 14, 7, 7, 8, p).win - 1e-12 for p in combat.POLICIES)
+    with pytest.raises(ValueError):
+        combat.odds_for(8, 14, 7, 7, 8, 'sometimes')
+
+
+def test_rounds_apply_wounds_and_luck():
+    player = Player(skill=8, stamina=10, luck=9)
+    fight = combat.Combat(player, combat.Monster('Goblin', 5, 5), rng=Dice(6, 6, 1, 1, 2, 2))
+    r = fight.round(luck=True)
+    assert (r.player_strength, r.monster_strength, r.wounded, r.lucky, r.damage) == (20, 7, 'monster', True, 4)
+    assert fight.monster_stamina == 1 and player.luck == 8
+    fight.rng = Dice(1, 1, 6, 6)
+    assert fight.round(luck='attack').wounded == 'player' and player.stamina == 8
+    fight.rng = Dice(3, 3, 1, 1)
+    assert fight.round().damage == 2 and fight.winner == 'player'
+    with pytest.raises(ValueError):
+        fight.round()
+
+
+@pytest.mark.parametrize('policy', ['never', 'attack', 'optimal'])
+def test_odds_agree_with_simulated_fights(policy):
+    monster = combat.Monster('Wolf', 7, 8)
+    expected = combat.odds(Player(skill=8, stamina=14, luck=7), monster, policy)
+    rng = random.Random(3)
+    wins = sum(combat.Combat(Player(skill=8, stamina=14, luck=7), monster, rng).fight(policy) == 'player'
+               for _ in range(4000))
+    assert wins / 4000 == pytest.approx(expected.win, abs=0.015)
@@ -0,0 +1,105 @@
+import pytest
+
+from forest_of_doom import commands, ui
+from forest_of_doom.commands import CommandError, Grammar, UnknownCommandError
+from forest_of_doom.models import Player
+
+SHOP = Grammar('list', 'buy <index:int>', 'view <index:int>', 'save [slot]', 'load [slot]', 'exit', prefixes=True)
+
+
+def test_parse_typed_arguments():
+    m = SHOP.parse('buy 3')
+    assert m.name == 'buy' and m.args == {'index': 3}
+    assert SHOP.parse('BUY  4 ').args == {'index': 4}
+
+
+def test_optional_trailing_string_takes_rest_of_line():
+    assert SHOP.parse('save').args == {'slot': None}
+    assert SHOP.parse('save My Slot').args == {'slot': 'My Slot'}
+
+
+def test_unambiguous_prefix_and_ambiguous_prefix():
+    assert SHOP.parse('li').name == 'list'
+    assert SHOP.parse('e').name == 'exit'
+    with pytest.raises(CommandError, match='could be: list, load'):
+        SHOP.parse('l')
+
+
+def test_prefixes_are_opt_in():
+    choice = Grammar('yes', 'no', 'save [slot]')
+    assert choice.parse('no').name == 'no'
+    for line in ('n', 'ye', 'sa slot1'):
+        with pytest.raises(UnknownCommandError):
+            choice.parse(line)
+    assert ui.SHOP_GRAMMAR.parse('li').name == 'list'
+
+
+def test_errors_carry_player_facing_messages():
+    with pytest.raises(UnknownCommandError):
+        SHOP.parse('dance')
+    with pytest.raises(CommandError, match=r'Usage: buy <index>'):
+        SHOP.parse('buy')
+    with pytest.raises(CommandError, match='Invalid index'):
+        SHOP.parse('buy two')
+    with pytest.raises(CommandError, match='Usage: buy <index>'):
+        SHOP.parse('buy 1 2')
+
+
+def test_route_calls_handler_with_parsed_args():
+    seen = []
+    msgs = []
+    assert commands.route(SHOP, 'save a', {'save': lambda slot: seen.append(slot)}, out=msgs.append) is None
+    assert seen == ['a']
+    assert commands.route(SHOP, 'view 2', {}, out=msgs.append).args == {'index': 2}
+    assert commands.route(SHOP, 'nope', out=msgs.append) is None
+    assert msgs == ['Please choose one of: list, buy, view, save, load, exit']
+
+
+def test_get_valid_input_reports_invalid_choice_once(monkeypatch, capsys):
+    inputs = iter(['maybe', 'no'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(inputs))
+    assert ui.get_valid_input('? ', ['yes', 'no']) == 'no'
+    assert capsys.readouterr().out.count('Please choose one of') == 1
+
+
+def test_get_valid_input_legacy_prefix_handler(monkeypatch):
+    calls = []
+    inputs = iter(['save slot1', 'save', 'yes'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(inputs))
+    handlers = {'save': lambda t: calls.append(('exact', t)), 'save*': lambda t: calls.append(('prefix', t))}
+    assert ui.get_valid_input('? ', ['yes', 'no'], handlers) == 'yes'
+    assert calls == [('prefix', 'save slot1'), ('exact', 'save')]
+
+
+def test_get_valid_input_needs_whole_words(monkeypatch, capsys):
+    inputs = iter(['n', 'sa slot1', 'no'])
+    seen = []
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(inputs))
+    assert ui.get_valid_input('? ', ['yes', 'no'], {'save*': seen.append}) == 'no'
+    assert seen == [] and capsys.readouterr().out.count('Please choose one of') == 2
+
+
+def test_get_valid_input_accepts_options_with_spaces(monkeypatch):
+    inputs = iter(['go', 'Go North'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(inputs))
+    assert ui.get_valid_input('? ', ['go north', 'go south'], {'load game*': print}) == 'go north'
+
+
+def test_get_valid_input_star_handlers_get_the_whole_line(monkeypatch):
+    seen = []
+    inputs = iter(['Load Game slot2', 'load game', 'no'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(inputs))
+    assert ui.get_valid_input('? ', ['yes', 'no'], {'load game*': seen.append}) == 'no'
+    assert seen == ['load game slot2', 'load game']
+
+
+def test_shop_unknown_command_reported_immediately_not_on_exit(monkeypatch, capsys):
+    inputs = iter(['dance', 'exit'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(inputs))
+    ui.shop_loop(Player())
+    out = capsys.readouterr().out
+    assert out.count(ui.SHOP_HELP) == 1
+    assert out.strip().endswith(ui.SHOP_HELP)
+    inputs = iter(['exit'])
+    ui.shop_loop(Player())
+    assert ui.SHOP_HELP not in capsys.readouterr().out
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from forest_of_doom import game, items, ui
+from forest_of_doom.items import CATALOG, YAZTROMO_SLATE, CatalogView, ItemList
+from forest_of_doom.models import Player, player_from_dict, player_to_dict
+
+
+def shopper():
+    p = Player()
+    p.slate = game.yaztromo_slate()
+    p.backpack['gold'] = 10
+    return p
+
+
+def test_slate_is_shared_and_reads_like_dicts():
+    a, b = shopper(), shopper()
+    assert a.slate is b.slate is YAZTROMO_SLATE
+    assert a.slate[0]['name'] == 'Potion of Healing' and a.slate[1].get('price') == 2
+    with pytest.raises(KeyError):
+        a.slate[0]['colour']
+
+
+def test_inventory_holds_catalog_ids():
+    p = shopper()
+    ui.buy_from_slate(p, 5)
+    assert p.inventory[0] is CATALOG[5]
+    assert p.inventory.to_list() == [5]
+
+
+def test_save_stores_ids_and_catalog_version():
+    p = shopper()
+    ui.buy_from_slate(p, 0)
+    data = player_to_dict(p)
+    assert data['catalog'] == items.CATALOG_VERSION
+    assert data['slate'] == list(range(len(CATALOG)))
+    assert data['inventory'] == [0]
+    restored = player_from_dict(json.loads(json.dumps(data)))
+    assert restored.slate is YAZTROMO_SLATE
+    assert restored.inventory == p.inventory
+
+
+def test_pre_catalog_saves_are_converted():
+    old = {'slate': [{'name': 'Holy Water', 'price': 3}, {'name': 'Garlic Buds', 'price': 2}],
+           'inventory': [{'name': 'Potion of Healing', 'price': 3}, {'name': 'Lucky Charm', 'price': 1}]}
+    p = player_from_dict(old)
+    assert isinstance(p.slate, CatalogView) and p.slate.ids == (5, 13)
+    assert p.inventory.to_list() == [0, {'name': 'Lucky Charm', 'price': 1}]
+
+
+def test_newer_catalog_version_is_rejected():
+    with pytest.raises(ValueError, match='catalog version'):
+        player_from_dict({'catalog': items.CATALOG_VERSION + 1})
+
+
+def test_custom_items_are_copied():
+    trinket = {'name': 'Trinket', 'price': 1}
+    inv = ItemList([trinket])
+    trinket['price'] = 99
+    assert inv[0] == {'name': 'Trinket', 'price': 1}
+
+
+def test_use_applies_catalog_effect():
+    p = shopper()
+    p.stamina = 10
+    ui.buy_from_slate(p, 0)
+    ok, msg = ui.use_item(p, 0)
+    assert ok and p.stamina == 12 and msg.endswith('Stamina increased.')
+    assert len(p.inventory) == 0
+
+
+def test_inventory_stacks_repeated_items_in_order():
+    inv = ItemList([CATALOG[5], {'name': 'Holy Water', 'price': 3}, CATALOG[0], 0])
+    assert [(it.name, n) for it, n in inv.stacks()] == [('Holy Water', 2), ('Potion of Healing', 2)]
+    assert [it['name'] for it in inv] == ['Holy Water', 'Holy Water', 'Potion of Healing', 'Potion of Healing']
+    assert inv.pop(1) is CATALOG[5]
+    assert len(inv) == 3 and inv.to_list() == [5, 0, 0]
+    del inv[0]
+    assert inv.to_list() == [0, 0]
+
+
+def test_inventory_keeps_purchase_order():
+    inv = ItemList([0, 1, 0])
+    assert [it.name for it in inv] == ['Potion of Healing', 'Potion of Plant Control', 'Potion of Healing']
+    inv.insert(1, 0)
+    inv.insert(3, 2)
+    assert inv.to_list() == [0, 0, 1, 2, 0] and len(inv.stacks()) == 4
+    del inv[2], inv[2]
+    # the two Healing stacks either side become one again
+    assert inv.to_list() == [0, 0, 0] and inv.stacks() == [(CATALOG[0], 3)]
+    inv.add(0, 70000)
+    assert len(inv) == 70003
@@ -0,0 +1,154 @@
+import json
+
+from forest_of_doom import game, journal
+from forest_of_doom.journal import Journal
+from forest_of_doom.models import Player
+
+
+def play(state, j, lines):
+    state, _ = game.step(state, None)
+    j.record(state, 'start')
+    for line in lines:
+        scene = state.scene
+        state, _ = game.step(state, line)
+        j.record(state, scene)
+    return state
+
+
+def test_events_hold_only_what_changed(tmp_path):
+    j = Journal(tmp_path / 's.journal')
+    state = game.SessionState(seed=2)
+    j.start(state)
+    state = play(state, j, ['yes', 'ready', 'skill', 'follow', 'buy 0'])
+    event = j.record(*game.step(state, 'yes')[:1], 'shop_confirm')
+    assert event['e'] == 'shop_confirm'
+    assert event['events'] == [{'e': 'purchase', 'items': [0], 'gold': -3}]
+    assert set(event['set']) == {'scene', 'pending'}
+    assert len(json.dumps(event)) < 200
+    j.close()
+
+
+def test_recover_mid_shop_after_a_crash(tmp_path):
+    path = tmp_path / 's.journal'
+    j = Journal(path)
+    state = game.SessionState(seed=4)
+    j.start(state)
+    state = play(state, j, ['yes', 'ready', 'fortune', 'follow', 'buy 5', 'yes', 'buy 0'])
+    j.close()
+    with open(path, 'a') as f:
+        f.write('{"seq": 99, "e": "sho')  # torn write
+    recovered, seq = journal.recover(path)
+    assert recovered.to_dict() == state.to_dict()
+    assert recovered.scene == 'shop_confirm' and recovered.pending == 0
+    # resuming compacts the file, dropping the torn line, and keeps appending
+    j2 = Journal(path)
+    j2.resume(recovered, seq)
+    recovered, _ = game.step(recovered, 'yes')
+    j2.record(recovered, 'shop_confirm')
+    j2.close()
+    again, _ = journal.recover(path)
+    assert again.player.inventory.to_list() == [5, 0]
+
+
+def test_snapshots_and_compaction(tmp_path):
+    path = tmp_path / 's.journal'
+    j = Journal(path, snapshot_every=2, compact_every=2)
+    state = game.SessionState(seed=1)
+    j.start(state)
+    state = play(state, j, ['yes', 'ready', 'skill', 'follow'] + ['buy 1', 'no'] * 4)
+    j.close()
+    assert j.snapshots >= 4 and j.compactions >= 1
+    lines = path.read_text().splitlines()
+    assert sum('"snapshot"' in ln for ln in lines) <= 2
+    assert journal.recover(path)[0].to_dict() == state.to_dict()
+
+
+def test_run_game_resumes_a_journalled_session(tmp_path, monkeypatch):
+    path = tmp_path / 's.journal'
+    state = game.SessionState(seed=3)
+    j = Journal(path)
+    j.start(state)
+    play(state, j, ['yes', 'ready', 'skill', 'follow', 'buy 0', 'yes'])
+    j.close()
+
+    resumed, seq = journal.recover(path)
+    j = Journal(path)
+    j.resume(resumed, seq)
+    monkeypatch.setattr('builtins.input', lambda prompt='': 'exit')
+    player = game.run_game(fast=True, journal=j, resume=resumed)
+    assert player.backpack['gold'] == 7
+    assert journal.recover(path)[0].outcome == 'continued'
+
+
+def test_steps_do_not_serialise_the_player(tmp_path, monkeypatch):
+    j = Journal(tmp_path / 's.journal')
+    state = game.SessionState(seed=2)
+    j.start(state)
+    state = play(state, j, [])
+    calls = []
+    real = game.player_to_dict
+    monkeypatch.setattr(game, 'player_to_dict', lambda p: calls.append(p) or real(p))
+    # 'yes' only moves on through the story; 'ready' rolls the stats
+    state, _ = game.step(state, 'yes')
+    assert j.record(state, 'enter') == {'seq': 2, 'e': 'enter', 'set': {'scene': 'ready'}}
+    state, _ = game.step(state, 'ready')
+    [stats] = j.record(state, 'ready')['events']
+    assert stats['e'] == 'stats' and stats['stats']['skill'] == state.player.skill
+    game.try_luck(state)
+    assert j.record(state, 'potion')['events'] == [
+        {'e': 'luck', 'stats': {'luck': state.player.luck, 'initial_luck': state.player.initial_luck}}]
+    assert calls == []
+    j.close()
+    assert journal.recover(tmp_path / 's.journal')[0].to_dict() == state.to_dict()
+
+
+def test_shop_lines_do_not_grow_with_the_inventory(tmp_path):
+    path = tmp_path / 's.journal'
+    j = Journal(path, snapshot_every=1000)
+    state = game.SessionState(seed=1)
+    j.start(state)
+    state = play(state, j, ['yes', 'ready', 'fortune', 'follow'])
+    state.player.backpack['gold'] = 10000
+    # changed outside the engine, so no event says so
+    j.snapshot(state)
+    sizes = []
+    for _ in range(200):
+        for line in ('buy 1', 'yes'):
+            scene = state.scene
+            state, _ = game.step(state, line)
+            sizes.append(len(json.dumps(j.record(state, scene))))
+    # only the seq number gets longer
+    assert max(sizes[-20:]) <= max(sizes[:20]) + 1
+    for line in ('use 0', 'use 5', 'drink'):
+        state, _ = game.step(state, line)
+        assert j.record(state, 'shop')['events'][0]['e'] in ('use_item', 'drink')
+    j.close()
+    recovered = journal.recover(path)[0]
+    assert recovered.to_dict() == state.to_dict()
+    assert len(recovered.player.inventory) == 198 and recovered.player.potion is None
+
+
+def test_load_is_journalled_as_the_whole_player(tmp_path):
+    path = tmp_path / 's.journal'
+    j = Journal(path)
+    state = game.SessionState(seed=1)
+    j.start(state)
+    state = play(state, j, ['yes', 'ready', 'skill', 'follow'])
+    saved = Player(skill=3, stamina=4, luck=5, inventory=[0, 0, 2])
+    state, _ = game.step(state, 'load', load_callback=lambda slot=None: saved)
+    [load] = j.record(state, 'shop')['events']
+    assert load['e'] == 'load' and load['player']['inventory'] == [0, 0, 2]
+    j.close()
+    assert journal.recover(path)[0].to_dict() == state.to_dict()
+
+
+def test_resumed_session_keeps_its_own_fast_mode(tmp_path, monkeypatch):
+    state, _ = game.step(game.SessionState(seed=3, fast=True), None)
+    state, _ = game.step(state, 'yes')
+    resumed = game.SessionState.from_dict(state.to_dict())
+    speeds = []
+    monkeypatch.setattr(game, 'slow_print', lambda text, fast=False: speeds.append(fast))
+    inputs = iter(['ready', 'skill', 'attack'])
+    monkeypatch.setattr(game, 'read_input', lambda prompt='': next(inputs))
+    game.run_game(fast=False, resume=resumed)
+    assert speeds and all(speeds)
@@ -0,0 +1,48 @@
+import os
+
+from forest_of_doom.models import FileSaveStore, LoadCache, Player, save_player
+
+
+def test_repeated_loads_hit_and_return_copies(tmp_path):
+    cache = LoadCache()
+    store = FileSaveStore(tmp_path / 'p.json', cache=cache)
+    store.save(Player(skill=6), 'a')
+    first = store.load('a')
+    first.skill = 99
+    first.backpack['gold'] = 0
+    second = store.load('a')
+    assert second.skill == 6 and second.backpack['gold'] == 10
+    assert second is not first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_own_save_invalidates_the_slot(tmp_path):
+    cache = LoadCache()
+    store = FileSaveStore(tmp_path / 'p.json', cache=cache)
+    store.save(Player(skill=1))
+    store.load()
+    store.save(Player(skill=2))
+    assert cache.invalidations == 1
+    assert store.load().skill == 2
+
+
+def test_file_changed_elsewhere_is_reread(tmp_path):
+    cache = LoadCache()
+    path = tmp_path / 'p.json'
+    save_player(Player(skill=1), path)
+    assert cache.load(path).skill == 1
+    save_player(Player(skill=22), path)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert cache.load(path).skill == 22
+    assert cache.misses == 2 and cache.hits == 0
+
+
+def test_cache_is_bounded(tmp_path):
+    cache = LoadCache(maxsize=2)
+    for name in 'abc':
+        save_player(Player(), tmp_path / f'{name}.json')
+        cache.load(tmp_path / f'{name}.json')
+    assert cache.stats()['size'] == 2 and cache.evictions == 1
+    cache.load(tmp_path / 'a.json')
+    assert cache.misses == 4
@@ -0,0 +1,119 @@
+import random
+from fractions import Fraction
+
+import pytest
+
+from forest_of_doom import game, luck, savecodec
+from forest_of_doom.game import SessionState, step
+from forest_of_doom.models import Player, player_from_dict, player_to_dict
+
+
+class Dice:
+    """rng stand-in rolling the given faces in order."""
+
+    def __init__(self, *faces):
+        self.faces = list(faces)
+
+    def randint(self, a, b):
+        return self.faces.pop(0)
+
+
+def test_luck_test_spends_luck_either_way():
+    p = Player(luck=7)
+    assert p.test_luck(Dice(3, 4)) is True and p.luck == 6
+    assert p.test_luck(Dice(3, 4)) is False and p.luck == 5
+    assert p.initial_luck == 7
+    p.luck = 0
+    assert p.test_luck(Dice(1, 1)) is False and p.luck == 0
+
+
+def test_potion_of_fortune_restores_initial_luck_once():
+    p = Player(luck=9, potion='fortune', initial_luck=9)
+    for _ in range(4):
+        p.test_luck(random.Random(1))
+    assert p.drink_fortune() and p.luck == 9 and p.potion is None
+    assert not p.drink_fortune()
+    assert not Player(luck=3, potion='skill').drink_fortune()
+
+
+def brute(start, k):
+    """(P(k-th lucky), P(all lucky), distribution of lucky tests) by walking every outcome."""
+    kth = every = Fraction(0)
+    dist = [Fraction(0)] * (k + 1)
+
+    def walk(lk, i, p, n):
+        nonlocal kth, every
+        if i == k:
+            dist[n] += p
+            every += p if n == k else 0
+            return
+        q = luck.luck_chance(lk)
+        kth += p * q if i == k - 1 else 0
+        walk(max(0, lk - 1), i + 1, p * q, n + 1)
+        walk(max(0, lk - 1), i + 1, p * (1 - q), n)
+
+    walk(start, 0, Fraction(1), 0)
+    return kth, every, tuple(dist)
+
+
+@pytest.mark.parametrize('start,k', [(0, 1), (7, 1), (7, 4), (12, 8), (13, 14), (15, 6)])
+def test_tables_match_every_outcome(start, k):
+    assert (luck.pass_chance(start, k), luck.all_pass_chance(start, k), luck.passes(start, k)) == brute(start, k)
+
+
+def test_table_lookups():
+    assert luck.pass_chance(12) == 1 and luck.pass_chance(12, 2) == Fraction(35, 36)
+    assert luck.pass_chance(7, 7) == 0 and luck.pass_chance(40, 29) == 1
+    assert luck.all_pass_chance(9, 0) == 1 and luck.all_pass_chance(9, 20) == 0
+    assert sum(luck.passes(10, 20)) == 1 and len(luck.passes(10, 20)) == 21
+    assert luck.expected_passes(13, 3) == 2 + Fraction(35, 36)
+    assert luck.player_chance(Player(luck=8), 2) == luck.luck_chance(7)
+    with pytest.raises(ValueError):
+        luck.pass_chance(8, 0)
+
+
+def test_session_luck_tests_are_seeded_and_survive_resume():
+    state, _ = step(SessionState(seed=5), None)
+    state.player.luck = 12
+    first = [game.try_luck(state) for _ in range(3)]
+    resumed = SessionState.from_dict(state.to_dict())
+    assert resumed.rolls == 3
+    again, _ = step(SessionState(seed=5), None)
+    again.player.luck = 12
+    assert [game.try_luck(again) for _ in range(3)] == first
+    assert game.try_luck(resumed) == game.try_luck(again)
+
+
+def test_fortune_potion_sets_initial_luck_and_it_is_saved():
+    state, _ = step(SessionState(seed=3), None)
+    for line in ('yes', 'ready', 'fortune'):
+        state, _ = step(state, line)
+    p = state.player
+    assert p.potion == 'fortune' and p.initial_luck == p.luck
+    p.test_luck(random.Random(0))
+    assert player_from_dict(player_to_dict(p)).initial_luck == p.luck + 1
+    assert savecodec.decode(savecodec.encode(p)).initial_luck == p.luck + 1
+
+
+def test_schema_1_saves_still_load():
+    data = bytearray(savecodec.encode(Player(skill=9, stamina=20, luck=8, initial_luck=10)))
+    # a schema 1 record is the same without the initial luck
+    data[4] = 1
+    del data[13:15]
+    p = savecodec.decode(bytes(data))
+    assert (p.skill, p.stamina, p.luck, p.initial_luck) == (9, 20, 8, None)
+
+
+def test_drink_in_the_shop_restores_luck():
+    state, _ = step(SessionState(seed=3), None)
+    for line in ('yes', 'ready', 'fortune', 'follow'):
+        state, _ = step(state, line)
+    assert state.scene == 'shop'
+    start = state.player.luck
+    game.try_luck(state)
+    game.try_luck(state)
+    state, out = step(state, 'drink')
+    assert state.player.luck == start and state.player.potion is None
+    assert out[-1].text == f"You drink the Potion of Fortune: your LUCK is back to {start}"
+    state, out = step(state, 'drink')
+    assert out[-1].text == 'You have no Potion of Fortune to drink'
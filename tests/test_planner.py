@@ -0,0 +1,65 @@
+from itertools import combinations
+
+import pytest
+
+from forest_of_doom import planner, simulate, ui
+from forest_of_doom.items import YAZTROMO_SLATE
+from forest_of_doom.models import Player
+
+
+def brute(slate, gold, values):
+    """Every affordable bundle, ranked the way plan() ranks them."""
+    bundles = []
+    for size in range(len(slate) + 1):
+        for picked in combinations(range(len(slate)), size):
+            cost = sum(slate[i]['price'] for i in picked)
+            if cost <= gold:
+                value = sum(values.get(slate[i]['name'], planner.DEFAULT_VALUE) for i in picked)
+                bundles.append((-value, cost, picked))
+    return sorted(bundles)
+
+
+@pytest.mark.parametrize('gold', [0, 4, 7, 10])
+def test_plan_matches_brute_force(gold):
+    slate = YAZTROMO_SLATE[:8]
+    values = {'Potion of Healing': 3, 'Holy Water': 2.5, 'Ring of Light': 0}
+    expected = brute(slate, gold, values)[:4]
+    got = planner.plan(slate, gold, 4, values)
+    assert [(-b.value, b.cost, b.indices) for b in got] == expected
+    assert all(b.names == tuple(slate[i]['name'] for i in b.indices) for b in got)
+
+
+def test_plan_skips_owned_and_unpriced_items_and_is_memoised():
+    slate = [{'name': 'Lamp', 'price': 2}, {'name': 'Map'}, {'name': 'Rope', 'price': 3}]
+    assert planner.plan(slate, 5, 1)[0].indices == (0, 2)
+    p = Player(slate=slate, inventory=[{'name': 'Rope', 'price': 3}])
+    assert planner.plan_for(p, 1)[0].indices == (0,)
+    before = planner.cache_info().hits
+    planner.plan(slate, 5, 1)
+    assert planner.cache_info().hits == before + 1
+    with pytest.raises(ValueError):
+        planner.plan(slate, 5, 0)
+
+
+def test_item_values_come_from_effects():
+    assert planner.ITEM_VALUES['Potion of Healing'] == 2 and planner.ITEM_VALUES['Holy Water'] == 1
+    slate = [{'name': 'Elixir', 'price': 3, 'effect': 'skill', 'amount': 1}, {'name': 'Lamp', 'price': 3}]
+    assert [b.value for b in planner.plan(slate, 3, 2)] == [3, 1]
+    assert planner.plan(slate, 3, 1, values={'Lamp': 4})[0].names == ('Lamp',)
+
+
+def test_plan_command_lists_bundles(capsys):
+    p = Player(slate=YAZTROMO_SLATE)
+    assert ui.shop_command(p, 'plan 2') == (None, None)
+    out = capsys.readouterr().out.splitlines()
+    assert out[0] == 'Best buys for 10 gold:' and len(out) == 3
+    assert out[1].startswith('  1. 9 gold, value 5: #0 Potion of Healing, #1 Potion of Plant Control')
+    p.backpack['gold'] = 1
+    ui.shop_command(p, 'plan')
+    assert 'Nothing on the slate' in capsys.readouterr().out
+
+
+def test_planned_shopper_buys_the_planned_bundle():
+    result = simulate.play(3, simulate.make_policy('planned', 'skill'))
+    best = planner.plan(YAZTROMO_SLATE, 10, 1)[0]
+    assert sorted(result['bought']) == sorted(best.names) and result['gold'] == 10 - best.cost
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'benchmarks'))
+
+import player_memory  # noqa: E402
+
+from forest_of_doom.models import Backpack, Player, player_from_dict, player_to_dict  # noqa: E402
+
+
+def test_player_has_no_instance_dict():
+    p = Player()
+    assert not hasattr(p, '__dict__')
+    with pytest.raises(AttributeError):
+        p.nickname = 'x'
+
+
+def test_backpack_acts_like_the_old_dict():
+    bp = Backpack({'gold': 3})
+    assert dict(bp) == {'gold': 3} and 'map' not in bp
+    bp['map'] = 1
+    bp['rope'] = 2
+    assert list(bp.items()) == [('gold', 3), ('map', 1), ('rope', 2)]
+    assert bp == {'gold': 3, 'map': 1, 'rope': 2}
+    del bp['gold']
+    assert bp.get('gold', 0) == 0 and len(bp) == 2
+
+
+def test_dict_round_trip_is_unchanged():
+    p = Player(skill=9, backpack={'gold': 4, 'map': 1, 'key': 1}, inventory=[{'name': 'Holy Water', 'price': 3}])
+    data = player_to_dict(p)
+    assert data['backpack'] == {'gold': 4, 'map': 1, 'key': 1}
+    assert data['inventory'] == [5]
+    assert player_from_dict(data) == p
+
+
+def test_slotted_player_uses_less_memory():
+    for state in ('rolled', 'shopping'):
+        legacy = player_memory.bytes_per_session(player_memory.LegacyPlayer, state == 'shopping', 2000)
+        compact = player_memory.bytes_per_session(Player, state == 'shopping', 2000)
+        assert compact < legacy
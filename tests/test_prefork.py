@@ -0,0 +1,119 @@
+import os
+import signal
+import socket
+import time
+
+import pytest
+
+from forest_of_doom import main, savewriter
+from forest_of_doom.models import load_player
+from forest_of_doom.server import ServerConfig
+
+prefork = pytest.importorskip('forest_of_doom.prefork')
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork') or not hasattr(socket, 'send_fds'),
+                                reason='needs fork and SCM_RIGHTS')
+
+
+def pump(sup, cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, 'timed out'
+        sup.run_once(0.05)
+
+
+def recv_until(sock, text, sup):
+    seen = b''
+    sock.settimeout(0.05)
+    deadline = time.monotonic() + 5
+    while text.encode() not in seen:
+        assert time.monotonic() < deadline, seen
+        sup.run_once(0.01)
+        try:
+            chunk = sock.recv(4096)
+        except socket.timeout:
+            continue
+        if not chunk:
+            break
+        seen += chunk
+    return seen.decode()
+
+
+@pytest.fixture
+def supervisor():
+    sup = prefork.Supervisor('127.0.0.1', 0, workers=2, config=ServerConfig(fast=True, seed=0))
+    host, port = sup.start()
+    yield sup, port
+    sup.stop()
+
+
+def test_sessions_are_spread_over_least_loaded_workers(supervisor):
+    sup, port = supervisor
+    clients = [socket.create_connection(('127.0.0.1', port)) for _ in range(4)]
+    pump(sup, lambda: sup.accepted == 4)
+    assert sorted(w.load for w in sup.workers) == [2, 2]
+    for c in clients:
+        assert 'You dare enter' in recv_until(c, 'You dare enter', sup)
+        c.sendall(b'no\r\n')
+        assert 'Goodbye' in recv_until(c, 'Goodbye', sup)
+        c.close()
+    pump(sup, lambda: all(w.load == 0 for w in sup.workers))
+    assert sum(w.served for w in sup.workers) == 4
+
+
+def test_dead_worker_is_replaced(supervisor):
+    sup, port = supervisor
+    victim = sup.workers[0].pid
+    os.kill(victim, signal.SIGKILL)
+    pump(sup, lambda: sup.restarts == 1)
+    assert len(sup.workers) == 2
+    assert victim not in [w.pid for w in sup.workers]
+    c = socket.create_connection(('127.0.0.1', port))
+    assert 'You dare enter' in recv_until(c, 'You dare enter', sup)
+    c.close()
+
+
+def test_stopped_worker_writes_queued_saves(tmp_path, monkeypatch):
+    base = tmp_path / 'player.json'
+
+    class SlowWriter(savewriter.BackgroundSaveStore):
+        def __init__(self, store):
+            super().__init__(store, window=60)
+
+    # the save would otherwise sit in the queue for a minute
+    monkeypatch.setattr(savewriter, 'BackgroundSaveStore', SlowWriter)
+    sup = prefork.Supervisor('127.0.0.1', 0, workers=1, config=ServerConfig(fast=True, seed=0),
+                             callbacks=lambda out: main.make_callbacks(str(base), str(base), out=out),
+                             on_exit=main.close_stores)
+    _, port = sup.start()
+    try:
+        c = socket.create_connection(('127.0.0.1', port))
+        recv_until(c, 'You dare enter', sup)
+        c.sendall(b'save slot1\r\n')
+        assert 'Save queued for' in recv_until(c, 'Save queued for', sup)
+        assert not main.slot_path(base, 'slot1').exists()
+    finally:
+        sup.stop()
+    c.close()
+    assert load_player(main.slot_path(base, 'slot1')).skill is not None
+
+
+def test_full_channel_skips_the_worker_without_killing_it(supervisor):
+    sup, port = supervisor
+    stuck, other = sup.workers
+    # a stopped worker stops reading its channel, so it fills up
+    os.kill(stuck.pid, signal.SIGSTOP)
+    try:
+        while True:
+            try:
+                stuck.channel.send(b'\0' * 4096)
+            except BlockingIOError:
+                break
+        other.load = 5
+        c = socket.create_connection(('127.0.0.1', port))
+        pump(sup, lambda: sup.accepted == 1)
+        assert other.load == 6 and stuck.load == 0
+        assert sup.restarts == 0 and stuck in sup.workers
+    finally:
+        os.kill(stuck.pid, signal.SIGCONT)
+    assert 'You dare enter' in recv_until(c, 'You dare enter', sup)
+    c.close()
@@ -0,0 +1,36 @@
+import json
+import time
+
+from forest_of_doom import game, main
+from forest_of_doom.profiling import Profiler
+
+
+def test_profile_splits_think_engine_and_save_time(monkeypatch, tmp_path, capsys):
+    answers = iter(['yes', 'ready', 'save', 'fortune', 'follow'])
+
+    def slow_player(prompt=''):
+        time.sleep(0.01)
+        return next(answers)
+
+    def slow_save(player, slot=None):
+        time.sleep(0.02)
+
+    monkeypatch.setattr('builtins.input', slow_player)
+    profiler = Profiler()
+    with profiler.activate(tmp_path / 'run.prof'):
+        game.run_game(fast=True, seed=0, save_callback=slow_save, profiler=profiler)
+    assert (tmp_path / 'run.prof').exists()
+
+    scenes = profiler.scenes
+    assert [scenes[s]['steps'] for s in ('start', 'enter', 'ready', 'potion', 'yaztromo')] == [1, 1, 1, 2, 1]
+    assert scenes['potion']['think_s'] >= 0.02 and scenes['potion']['io_s'] >= 0.02
+    # the save's time is not counted as game logic
+    assert scenes['potion']['engine_s'] < 0.02
+    assert profiler.callbacks['save']['calls'] == 1 and profiler.callbacks['save']['max_s'] >= 0.02
+    totals = profiler.totals()
+    assert totals['think_s'] >= 0.05 and sum(totals.values()) <= profiler.wall
+
+    main.report_profile(profiler, tmp_path / 'profile.json')
+    report = json.loads((tmp_path / 'profile.json').read_text())
+    assert report['scenes']['potion']['steps'] == 2 and report['cprofile'].endswith('run.prof')
+    assert capsys.readouterr().err.startswith('Profile: ')
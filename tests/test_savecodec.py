@@ -0,0 +1,70 @@
+import io
+import json
+
+import pytest
+
+from forest_of_doom import savecodec, ui
+from forest_of_doom.items import YAZTROMO_SLATE, CatalogView
+from forest_of_doom.models import Player, load_player, player_to_dict, save_player
+from forest_of_doom.savecodec import SaveFormatError
+
+
+def shopper(**kwargs):
+    p = Player(skill=11, stamina=-3, luck=7, potion='fortune', **kwargs)
+    p.slate = YAZTROMO_SLATE
+    p.backpack['gold'] = 300
+    for i in (0, 5, 5):
+        ui.buy_from_slate(p, i)
+    return p
+
+
+def test_round_trip_keeps_everything():
+    p = shopper()
+    p.inventory.append({'name': 'Lucky Charm', 'price': 1})
+    p.backpack['rope'] = 2
+    restored = savecodec.decode(savecodec.encode(p))
+    assert player_to_dict(restored) == player_to_dict(p)
+    assert restored.slate is YAZTROMO_SLATE
+
+
+@pytest.mark.parametrize('slate', [(), CatalogView((3, 1)), [{'name': 'Odd', 'price': None}]])
+def test_other_slates_and_potions(slate):
+    p = Player(potion='elixir', slate=slate)
+    restored = savecodec.decode(savecodec.encode(p))
+    assert restored.potion == 'elixir'
+    assert list(restored.slate) == list(slate)
+
+
+def test_records_stream_back_to_back():
+    buf = io.BytesIO()
+    players = [shopper(), Player(skill=1), Player(luck=2)]
+    for p in players:
+        savecodec.write_player(p, buf)
+    buf.seek(0)
+    assert [player_to_dict(p) for p in savecodec.iter_players(buf)] == [player_to_dict(p) for p in players]
+
+
+def test_binary_is_much_smaller_than_json():
+    p = shopper()
+    assert len(savecodec.encode(p)) * 4 < len(json.dumps(player_to_dict(p), indent=2))
+
+
+def test_load_detects_format(tmp_path):
+    p = shopper()
+    save_player(p, tmp_path / 'a.sav')
+    save_player(p, tmp_path / 'b.json')
+    save_player(p, tmp_path / 'c.json', fmt='binary')
+    assert (tmp_path / 'a.sav').read_bytes().startswith(savecodec.MAGIC)
+    assert (tmp_path / 'b.json').read_text().startswith('{')
+    for name in ('a.sav', 'b.json', 'c.json'):
+        assert player_to_dict(load_player(tmp_path / name)) == player_to_dict(p)
+
+
+def test_bad_data_is_rejected():
+    data = savecodec.encode(shopper())
+    with pytest.raises(SaveFormatError, match='truncated'):
+        savecodec.decode(data[:-1])
+    with pytest.raises(SaveFormatError, match='Trailing'):
+        savecodec.decode(data + b'\0')
+    with pytest.raises(SaveFormatError, match='schema'):
+        savecodec.decode(data[:4] + b'\x63' + data[5:])
@@ -0,0 +1,99 @@
+import sqlite3
+import threading
+
+import pytest
+
+from forest_of_doom import main
+from forest_of_doom.models import FileSaveStore, Player, SqliteSaveStore, open_store
+
+
+def test_open_store_picks_backend(tmp_path):
+    assert isinstance(open_store(tmp_path / 'p.json'), FileSaveStore)
+    assert isinstance(open_store(tmp_path / 'p.db'), SqliteSaveStore)
+
+
+def test_file_store_keeps_layout_and_backups(tmp_path):
+    store = FileSaveStore(tmp_path / 'player.json')
+    store.save(Player(skill=1))
+    store.save(Player(skill=2))
+    store.save(Player(skill=3), 'slot1')
+    assert (tmp_path / 'player.json').exists() and (tmp_path / 'player_slot1.json').exists()
+    assert store.load().skill == 2 and store.load('slot1').skill == 3
+    assert store.slots() == [None, 'slot1']
+    assert len(store.history()) == 1 and store.history('slot1') == []
+    assert not list(tmp_path.glob('*.tmp'))
+    with pytest.raises(FileNotFoundError):
+        store.load('empty')
+
+
+def test_sqlite_store_slots_and_history(tmp_path):
+    store = SqliteSaveStore(tmp_path / 'saves.db', keep=3)
+    for skill in range(1, 6):
+        store.save(Player(skill=skill), 'a')
+    store.save(Player(luck=9))
+    assert store.load('a').skill == 5 and store.load().luck == 9
+    assert store.slots() == [None, 'a']
+    # the latest plus two older versions are kept
+    assert [h.split()[1] for h in store.history('a')] == ['3', '4']
+    assert store.load_version(3, 'a').skill == 3
+    with pytest.raises(FileNotFoundError):
+        store.load('missing')
+    mode = sqlite3.connect(tmp_path / 'saves.db').execute('PRAGMA journal_mode').fetchone()[0]
+    assert mode == 'wal'
+    store.close()
+
+
+def test_sqlite_batched_commits_become_visible_on_flush(tmp_path):
+    store = SqliteSaveStore(tmp_path / 'saves.db', batch_size=10)
+    store.save(Player(skill=4), 'x')
+    other = SqliteSaveStore(tmp_path / 'saves.db')
+    with pytest.raises(FileNotFoundError):
+        other.load('x')
+    store.flush()
+    assert other.load('x').skill == 4
+    store.close()
+    other.close()
+
+
+def test_sqlite_batch_does_not_hold_the_write_lock(tmp_path):
+    store = SqliteSaveStore(tmp_path / 'saves.db', batch_size=10)
+    store.save(Player(skill=4), 'x')
+    assert store.load('x').skill == 4 and store.slots() == ['x']
+    # another process can write while the batch is still building up
+    other = SqliteSaveStore(tmp_path / 'saves.db', timeout=0.1)
+    other.save(Player(skill=7), 'x')
+    store.save(Player(skill=5), 'x')
+    store.close()
+    assert other.load('x').skill == 5
+    assert [h.split()[1] for h in other.history('x')] == ['1', '2']
+    other.close()
+
+
+def test_concurrent_saves_to_one_slot(tmp_path):
+    path = tmp_path / 'saves.db'
+
+    def saver(n):
+        store = SqliteSaveStore(path, keep=100)
+        for i in range(20):
+            store.save(Player(skill=n * 100 + i), 'shared')
+        store.close()
+
+    threads = [threading.Thread(target=saver, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    store = SqliteSaveStore(path, keep=100)
+    assert len(store.history('shared')) == 79
+    assert store.load('shared').skill % 100 == 19
+    store.close()
+
+
+def test_in_game_callbacks_use_the_store(tmp_path):
+    base = str(tmp_path / 'game.db')
+    notes = []
+    save_cb, load_cb = main.make_callbacks(base, base, out=notes.append)
+    save_cb(Player(skill=7), slot='s1')
+    assert load_cb(slot='s1').skill == 7
+    assert load_cb(slot='nope') is None
+    assert notes[0].startswith('Save queued for') and 'Failed to load' in notes[1]
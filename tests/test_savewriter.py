@@ -0,0 +1,127 @@
+import threading
+import time
+
+from forest_of_doom.models import FileSaveStore, Player, SaveStore
+from forest_of_doom.savewriter import BackgroundSaveStore
+
+
+class SlowStore(SaveStore):
+    """In-memory store whose writes take a while."""
+
+    def __init__(self, delay=0.05, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.saved = {}
+        self.writes = 0
+
+    def save(self, player, slot=None):
+        time.sleep(self.delay)
+        if self.fail:
+            raise OSError('disk full')
+        self.writes += 1
+        self.saved[slot] = player
+        return 'memory'
+
+    def load(self, slot=None):
+        return self.saved[slot]
+
+    def slots(self):
+        return list(self.saved)
+
+    def history(self, slot=None):
+        return []
+
+    def restore(self, slot=None, back=1):
+        raise FileNotFoundError(slot)
+
+
+def test_save_returns_before_the_write():
+    inner = SlowStore(delay=0.2)
+    store = BackgroundSaveStore(inner, window=0)
+    started = time.perf_counter()
+    store.save(Player(skill=3))
+    assert time.perf_counter() - started < 0.1
+    assert store.load().skill == 3  # served from the queue
+    store.flush()
+    assert inner.saved[None].skill == 3 and store.depth == 0
+    store.close()
+
+
+def test_saves_within_the_window_coalesce():
+    inner = SlowStore(delay=0)
+    store = BackgroundSaveStore(inner, window=0.2)
+    p = Player()
+    for gold in range(5):
+        p.backpack['gold'] = gold
+        store.save(p, 'shop')
+    store.save(Player(luck=1), 'other')
+    store.flush()
+    assert inner.writes == 2
+    assert inner.saved['shop'].backpack['gold'] == 4
+    stats = store.stats()
+    assert stats['coalesced'] == 4 and stats['writes'] == 2 and stats['queue_depth'] == 0
+    store.close()
+
+
+def test_queued_copy_is_independent_of_the_player():
+    inner = SlowStore(delay=0)
+    store = BackgroundSaveStore(inner, window=0.1)
+    p = Player(skill=5)
+    store.save(p)
+    p.skill = 99
+    store.close()
+    assert inner.saved[None].skill == 5
+
+
+def test_close_writes_pending_saves_to_disk(tmp_path):
+    store = BackgroundSaveStore(FileSaveStore(tmp_path / 'p.json'), window=10)
+    store.save(Player(skill=8), 'late')
+    store.close()
+    assert FileSaveStore(tmp_path / 'p.json').load('late').skill == 8
+
+
+def test_failures_are_counted_not_raised(capsys):
+    store = BackgroundSaveStore(SlowStore(delay=0, fail=True), window=0)
+    store.save(Player())
+    store.flush()
+    assert store.stats()['failures'] == 1 and 'disk full' in store.last_error
+    assert 'Background save failed' in capsys.readouterr().err
+    store.close()
+
+
+class FailingFlushStore(SlowStore):
+    def flush(self):
+        raise OSError('commit failed')
+
+    def close(self):
+        pass
+
+
+def test_failed_flush_is_counted_and_does_not_hang():
+    store = BackgroundSaveStore(FailingFlushStore(delay=0), window=0)
+    store.save(Player(), 'a')
+    store.flush()
+    assert store.stats()['failures'] == 1 and 'commit failed' in store.last_error
+    # the writer survived: later saves still go through
+    store.save(Player(skill=4), 'b')
+    store.flush()
+    assert store.store.saved['b'].skill == 4 and store.depth == 0
+    store.close()
+
+
+def test_concurrent_savers():
+    inner = SlowStore(delay=0.001)
+    store = BackgroundSaveStore(inner, window=0.01)
+
+    def saver(n):
+        for i in range(50):
+            store.save(Player(skill=i), f'slot{n}')
+
+    threads = [threading.Thread(target=saver, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    store.close()
+    assert {s: p.skill for s, p in inner.saved.items()} == {f'slot{n}': 49 for n in range(4)}
+    assert store.stats()['queued'] == 200
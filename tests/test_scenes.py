@@ -0,0 +1,92 @@
+import pytest
+
+from forest_of_doom import game, scenes
+from forest_of_doom.scenes import ContentError, ContentPack, parse_source
+
+SOURCE = '''# comment
+@section a
+@slow
+Hello
+there
+
+@blank
+@prompt
+Go? 
+@choice Yes -> b
+@choice no -> b
+
+@section b
+@slow-format
+You have {gold} gold.
+@end done
+'''
+
+
+def test_parse_source_blocks_and_choices():
+    a, b = parse_source(SOURCE)
+    assert a.blocks == (('slow', 'Hello\nthere'), ('blank', ''))
+    assert a.prompt == 'Go? '
+    assert a.target('yes') == 'b'
+    assert a.grammar.names == ['yes', 'no', 'save', 'load']
+    assert b.end == 'done'
+
+
+@pytest.mark.parametrize('source, message', [
+    ('@slow\nx', 'before any @section'),
+    ('@section a\n@bogus', 'unknown directive'),
+    ('@section a\nstray text', 'outside a text block'),
+    ('@section a\n@choice yes', "expected '@choice"),
+])
+def test_parse_errors_name_the_line(source, message):
+    with pytest.raises(ContentError, match=message):
+        parse_source(source, origin='x.txt')
+
+
+def test_load_sources_checks_targets(tmp_path):
+    (tmp_path / 'a.txt').write_text('@section a\n@next nowhere\n')
+    with pytest.raises(ContentError, match='nowhere'):
+        scenes.load_sources(tmp_path)
+
+
+def test_pack_round_trip_decodes_lazily(tmp_path):
+    (tmp_path / 'a.txt').write_text(SOURCE)
+    pack = ContentPack(scenes.compile_pack(tmp_path, tmp_path / 'test.pack'))
+    try:
+        assert pack.ids == ['a', 'b'] and pack.decoded == 0
+        assert pack.section('b').blocks == (('slow-format', 'You have {gold} gold.'),)
+        assert pack.decoded == 1
+        assert pack.section('a') == parse_source(SOURCE)[0]
+        with pytest.raises(ContentError):
+            pack.section('missing')
+    finally:
+        pack.close()
+
+
+def test_committed_pack_matches_sources(tmp_path):
+    built = scenes.compile_pack(path=tmp_path / 'scenes.pack')
+    assert built.read_bytes() == scenes.PACK_PATH.read_bytes()
+
+
+def test_content_actions_exist():
+    pack = scenes.get_pack()
+    for sid in pack.ids:
+        for kind, value in pack.section(sid).blocks:
+            if kind == 'action':
+                assert value in game.ACTIONS
+
+
+def test_game_never_rewrites_the_pack_and_builds_a_private_copy_if_missing(tmp_path, monkeypatch):
+    pack = tmp_path / 'scenes.pack'
+    scenes.compile_pack(path=pack)
+    assert [p.name for p in tmp_path.iterdir()] == ['scenes.pack']
+    # sources newer than the pack don't matter any more
+    stamp = pack.stat().st_mtime_ns
+    monkeypatch.setattr(scenes, 'PACK_PATH', pack)
+    monkeypatch.setattr(scenes, '_pack', None)
+    assert scenes.get_pack().path == pack and pack.stat().st_mtime_ns == stamp
+
+    monkeypatch.setattr(scenes, 'PACK_PATH', tmp_path / 'missing' / 'scenes.pack')
+    monkeypatch.setattr(scenes, '_pack', None)
+    private = scenes.get_pack()
+    assert private.path.parent != tmp_path / 'missing' and 'enter' in private
+    private.close()
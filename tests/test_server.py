@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from forest_of_doom import main, server
+from forest_of_doom.models import load_player
+
+
+class Client:
+    """Minimal line-based stand-in for a telnet client."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.seen = ''
+
+    async def expect(self, text, timeout=5):
+        while text not in self.seen:
+            chunk = await asyncio.wait_for(self.reader.read(4096), timeout)
+            if not chunk:
+                raise AssertionError(f'connection closed before {text!r}; got {self.seen[-200:]!r}')
+            self.seen += chunk.decode('utf-8')
+        before, _, self.seen = self.seen.partition(text)
+        return before
+
+    async def send(self, line):
+        self.writer.write(line.encode('utf-8') + b'\r\n')
+        await self.writer.drain()
+
+
+async def connect(port):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    return Client(reader, writer)
+
+
+def run_with_server(config, scenario, callbacks=None):
+    async def _main():
+        srv = server.GameServer(config, callbacks)
+        _, port = await srv.start('127.0.0.1', 0)
+        try:
+            return await scenario(srv, port)
+        finally:
+            srv.close()
+
+    return asyncio.run(_main())
+
+
+def test_full_session_over_tcp():
+    async def scenario(srv, port):
+        c = await connect(port)
+        await c.expect('You dare enter')
+        await c.send('yes')
+        await c.expect('"ready"')
+        await c.send('ready')
+        await c.expect('Which potion')
+        await c.send('skill')
+        await c.expect('(follow/attack)')
+        await c.send('follow')
+        rest = await c.expect('Goodbye!')
+        assert 'To be continued' in rest
+
+    run_with_server(server.ServerConfig(fast=True, seed=0), scenario)
+
+
+def test_many_concurrent_sessions_share_one_loop():
+    async def one(port):
+        c = await connect(port)
+        for prompt, answer in (('You dare enter', 'yes'), ('"ready"', 'ready'),
+                               ('Which potion', 'fortune'), ('(follow/attack)', 'attack')):
+            await c.expect(prompt)
+            await c.send(answer)
+        assert 'Game Over!' in await c.expect('Goodbye!')
+
+    async def scenario(srv, port):
+        await asyncio.gather(*(one(port) for _ in range(50)))
+        return srv.served
+
+    assert run_with_server(server.ServerConfig(fast=True, seed=1), scenario) == 50
+
+
+def test_paced_output_and_pause_prompt():
+    async def scenario(srv, port):
+        c = await connect(port)
+        await c.expect(server.PAUSE_PROMPT)
+        await c.send('')
+        await c.expect('You dare enter')
+        await c.send('no')
+        await c.expect(server.PAUSE_PROMPT)
+        await c.send('')
+        await c.expect('Goodbye!')
+
+    run_with_server(server.ServerConfig(cps=20000, fps=200), scenario)
+
+
+def test_idle_session_times_out():
+    async def scenario(srv, port):
+        c = await connect(port)
+        await c.expect('You dare enter')
+        await c.expect('Idle timeout')
+        assert await asyncio.wait_for(c.reader.read(), 5) == b''
+
+    run_with_server(server.ServerConfig(fast=True, idle_timeout=0.2), scenario)
+
+
+def test_in_game_save_uses_slot_logic(tmp_path):
+    base = tmp_path / 'player.json'
+
+    async def scenario(srv, port):
+        c = await connect(port)
+        await c.expect('You dare enter')
+        await c.send('yes')
+        await c.expect('"ready"')
+        await c.send('ready')
+        await c.expect('Which potion')
+        await c.send('save slot1')
+        await c.expect('Save queued for')
+
+    run_with_server(server.ServerConfig(fast=True, seed=0), scenario,
+                    callbacks=lambda out: main.make_callbacks(str(base), str(base), out=out))
+    main.close_stores()  # saves are written in the background
+    assert load_player(main.slot_path(base, 'slot1')).skill > 0
+
+
+def test_strip_telnet_negotiation():
+    assert server.strip_telnet(b'\xff\xfb\x01yes\xff\xff\r\n') == b'yes\xff\r\n'
+    assert server.strip_telnet(b'\xff\xfa\x18\x00xterm\xff\xf0ok') == b'ok'
+
+
+def test_parse_address():
+    assert server.parse_address('127.0.0.1:4000') == ('127.0.0.1', 4000)
+    assert server.parse_address(':4000') == ('0.0.0.0', 4000)
+    with pytest.raises(ValueError):
+        server.parse_address('nope')
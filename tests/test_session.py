@@ -0,0 +1,90 @@
+import json
+
+from forest_of_doom import game, scenes
+from forest_of_doom.models import Player
+
+
+def play(state, lines, **callbacks):
+    state, out = game.step(state, None, **callbacks) if state.scene == 'start' else (state, [])
+    for line in lines:
+        state, out = game.step(state, line, **callbacks)
+    return state, out
+
+
+def test_step_walks_the_scenes_in_order():
+    state = game.SessionState(fast=True, seed=0)
+    state, out = game.step(state, None)
+    assert state.scene == 'enter'
+    assert out[0].kind == 'slow' and 'Darkwood Forest' in out[0].text
+    assert state.prompt == scenes.section('enter').prompt
+    for line, scene in (('yes', 'ready'), ('ready', 'potion'), ('skill', 'yaztromo'), ('follow', 'end')):
+        state, out = game.step(state, line)
+        assert state.scene == scene
+    assert state.done
+    assert state.outcome == 'continued'
+    assert len(state.player.slate) == 17
+
+
+def test_invalid_input_keeps_scene_and_reports():
+    state = game.SessionState(fast=True)
+    state, _ = game.step(state, None)
+    state, out = game.step(state, 'maybe')
+    assert state.scene == 'enter'
+    assert any('Please choose one of' in m.text for m in out)
+
+
+
+def test_story_choices_need_the_whole_word():
+    state, _ = play(game.SessionState(fast=True, seed=0), ['n'])
+    assert state.scene == 'enter'
+    state, _ = play(state, ['yes', 'ready', 'skill', 'a'])
+    assert state.scene == 'yaztromo' and not state.done
+
+
+def test_session_survives_serialisation_mid_shop():
+    state = game.SessionState(seed=1)
+    state, _ = play(state, ['yes', 'ready', 'fortune', 'follow'])
+    assert state.scene == 'shop'
+    state, _ = game.step(state, 'buy 0')
+    assert state.scene == 'shop_confirm'
+    assert 'Potion of Healing' in state.prompt
+
+    restored = game.SessionState.from_dict(json.loads(json.dumps(state.to_dict())))
+    assert restored.pending == 0
+    restored, out = game.step(restored, 'yes')
+    assert restored.scene == 'shop'
+    assert restored.player.backpack['gold'] == 7
+    assert restored.player.inventory[0]['name'] == 'Potion of Healing'
+
+    restored, out = game.step(restored, 'exit')
+    assert restored.done and restored.outcome == 'continued'
+
+
+def test_step_matches_seeded_stats_of_blocking_driver(monkeypatch):
+    answers = iter(['yes', 'ready', 'skill', 'follow'])
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    driven = game.run_game(fast=True, seed=5)
+    stepped, _ = play(game.SessionState(fast=True, seed=5), ['yes', 'ready', 'skill', 'follow'])
+    assert (driven.skill, driven.stamina, driven.luck) == (stepped.player.skill, stepped.player.stamina, stepped.player.luck)
+
+
+def test_attack_ends_in_game_over():
+    state, out = play(game.SessionState(fast=True), ['yes', 'ready', 'strength', 'attack'])
+    assert state.outcome == 'game_over'
+    assert out[-1].text == scenes.section('game_over').blocks[-1][1]
+
+
+def test_save_and_load_callbacks_run_through_step():
+    saved = []
+
+    def save_cb(player, slot=None):
+        saved.append((player.skill, slot))
+
+    def load_cb(slot=None):
+        return Player(skill=42, stamina=1, luck=1, backpack={'gold': 3})
+
+    state = game.SessionState(fast=True, seed=0)
+    state, _ = play(state, ['yes', 'ready', 'save slotA', 'load'], save_callback=save_cb, load_callback=load_cb)
+    assert saved and saved[0][1] == 'slota'
+    assert state.player.skill == 42
+    assert state.scene == 'potion'
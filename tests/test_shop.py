@@ -1,3 +1,8 @@
+import json
+
+import pytest
+
+from forest_of_doom.items import YAZTROMO_SLATE, ItemList
 from forest_of_doom.models import Player
 from forest_of_doom import ui, game
 
@@ -40,3 +45,48 @@ def test_buy_invalid_index():
     success, msg = ui.buy_from_slate(p, 99)
     assert success is False
     assert 'range' in msg or 'Invalid' in msg
+
+
+def test_parse_basket():
+    assert ui.parse_basket('1 3, 5') == [(1, 1), (3, 1), (5, 1)]
+    assert ui.parse_basket('2x7 1 7') == [(7, 3), (1, 1)]
+    for bad in ('two', '0x1', ''):
+        with pytest.raises(ValueError):
+            ui.parse_basket(bad)
+
+
+def test_buy_basket_is_all_or_nothing():
+    p = setup_player_with_slate()
+    p.backpack['gold'] = 9
+    ok, receipt = ui.buy_basket(p, [(0, 2), 1])
+    assert ok and receipt.startswith('Receipt:') and 'Total 9 gold' in receipt
+    assert p.backpack['gold'] == 0
+    assert [it['name'] for it in p.inventory] == ['Cheap Trinket', 'Cheap Trinket', 'Expensive Amulet']
+
+    p = setup_player_with_slate()
+    for basket in ([0, 1], [0, 99]):
+        ok, msg = ui.buy_basket(p, basket)
+        assert not ok and ('Insufficient' in msg or 'range' in msg)
+        assert p.backpack['gold'] == 5 and len(p.inventory) == 0
+
+
+def test_basket_into_an_empty_inventory_keeps_an_item_list():
+    p = Player(slate=YAZTROMO_SLATE)
+    assert isinstance(p.inventory, ItemList) and len(p.inventory) == 0
+    ok, _ = ui.buy_basket(p, [(0, 2), 1])
+    assert ok and isinstance(p.inventory, ItemList)
+    assert p.inventory.to_list() == [0, 0, 1]
+
+
+def test_basket_order_confirms_once_through_step():
+    state = game.SessionState(seed=1)
+    for line in (None, 'yes', 'ready', 'skill', 'follow', 'buy 1 2x3'):
+        state, _ = game.step(state, line)
+    assert state.scene == 'shop_confirm' and state.pending == [[1, 1], [3, 2]]
+    assert state.prompt == 'Buy these 3 items for 6 gold? (yes/no): '
+    state = game.SessionState.from_dict(json.loads(json.dumps(state.to_dict())))
+    state, out = game.step(state, 'yes')
+    assert state.scene == 'shop' and state.player.backpack['gold'] == 4
+    assert 'Receipt:' in out[0].text and len(state.player.inventory) == 3
+    state, out = game.step(state, 'buy 0 0')
+    assert state.scene == 'shop' and 'Insufficient gold' in out[0].text
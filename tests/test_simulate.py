@@ -0,0 +1,30 @@
+import json
+
+from forest_of_doom import simulate
+from forest_of_doom.items import YAZTROMO_SLATE
+
+
+def test_greedy_shopper_spends_its_gold():
+    result = simulate.play(7, simulate.GreedyShopper('fortune'))
+    assert result['outcome'] == 'continued' and result['potion'] == 'fortune'
+    cheapest = min(it['price'] for it in YAZTROMO_SLATE)
+    assert result['items'] == len(set(result['bought'])) >= 3 and result['gold'] < cheapest
+    assert simulate.play(7, simulate.GreedyShopper('fortune')) == result
+
+
+def test_scripted_policy_and_closed_input():
+    declined = simulate.play(1, simulate.make_policy('scripted', 'no'))
+    assert declined['outcome'] == 'declined' and declined['steps'] == 1
+    stopped = simulate.play(1, simulate.make_policy('scripted', 'yes,ready'))
+    assert stopped['outcome'] == 'unfinished' and stopped['skill'] > 0
+
+
+def test_pool_gives_the_same_summary_as_one_process(tmp_path):
+    one = simulate.simulate(60, 'random', jobs=1)
+    pooled = simulate.simulate(60, 'random', jobs=2)
+    for key in ('playthroughs', 'outcomes', 'stats', 'items_bought', 'potions'):
+        assert one[key] == pooled[key]
+    assert sum(one['outcomes'].values()) == 60 and 0 < one['game_over_rate'] < 1
+
+    simulate.main(['-n', '5', '--jobs', '1', '--output', str(tmp_path / 'summary.json')])
+    assert json.loads((tmp_path / 'summary.json').read_text())['playthroughs'] == 5
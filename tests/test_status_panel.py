@@ -0,0 +1,75 @@
+import io
+
+from forest_of_doom import ui
+from forest_of_doom.models import Player
+
+
+def make_player():
+    return Player(skill=10, stamina=20, luck=9, backpack={'gold': 10, 'map': 1}, potion='skill')
+
+
+def test_first_render_draws_full_panel_and_sets_scroll_region():
+    buf = io.StringIO()
+    panel = ui.StatusPanel(stream=buf, ansi=True, width=80)
+    panel.render(make_player())
+    out = buf.getvalue()
+    # room is made by scrolling and inserting rows, never by clearing what was printed
+    assert '\x1b[2J' not in out and '\x1b[J' not in out
+    assert '\x1b[H\x1b[5L' in out
+    assert 'Status: Skill: 10, Stamina: 20, Luck: 9' in out
+    assert out.endswith('\x1b[6;r\x1b8')
+
+
+def test_unchanged_state_writes_nothing():
+    buf = io.StringIO()
+    panel = ui.StatusPanel(stream=buf, ansi=True, width=80)
+    p = make_player()
+    panel.render(p)
+    assert panel.render(p) == 0
+
+
+def test_gold_change_emits_only_changed_cells():
+    buf = io.StringIO()
+    panel = ui.StatusPanel(stream=buf, ansi=True, width=80)
+    p = make_player()
+    panel.render(p)
+    buf.seek(0)
+    buf.truncate()
+    p.backpack['gold'] = 7
+    n = panel.render(p)
+    out = buf.getvalue()
+    # row 2 (backpack), column just after the common "Backpack: gold: " prefix
+    assert out == '\x1b7\x1b[2;17H7, map: 1\x1b[K\x1b8'
+    assert n == len(out.encode('utf-8'))
+
+
+def test_inventory_change_is_reflected():
+    buf = io.StringIO()
+    panel = ui.StatusPanel(stream=buf, ansi=True, width=80)
+    p = make_player()
+    panel.render(p)
+    p.inventory.append({'name': 'Holy Water', 'price': 3})
+    panel.render(p)
+    assert '0. Holy Water' in buf.getvalue().split('\x1b7')[-1]
+
+
+def test_plain_fallback_prints_block_only_when_changed():
+    buf = io.StringIO()
+    panel = ui.StatusPanel(stream=buf, ansi=False)
+    p = make_player()
+    panel.render(p)
+    first = buf.getvalue()
+    assert '\x1b' not in first
+    assert 'Backpack: gold: 10, map: 1' in first
+    panel.render(p)
+    assert buf.getvalue() == first
+
+
+def test_panel_sends_fewer_status_bytes_than_reprinting():
+    import sys
+    from pathlib import Path
+
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'benchmarks'))
+    import status_bytes
+
+    assert status_bytes.status_only(use_panel=True) < status_bytes.status_only(use_panel=False)
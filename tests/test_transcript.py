@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from forest_of_doom import game, main, transcript
+from forest_of_doom.models import Player
+
+
+def record_session(monkeypatch, path, answers, load_callback=None, seed=3):
+    answers = iter(answers)
+    monkeypatch.setattr('builtins.input', lambda prompt='': next(answers))
+    monkeypatch.setattr(game, 'slow_print', lambda *a, **k: None)
+    return game.run_game(fast=False, seed=seed, load_callback=load_callback,
+                         transcript=transcript.Recorder(path))
+
+
+SHOP_SESSION = ['yes', 'ready', 'fortune', 'follow', 'list', 'buy 1', 'yes', 'load', 'buy 2', 'yes',
+                'use 1', 'exit']
+
+
+def test_recorded_shop_session_replays_to_the_same_player(monkeypatch, tmp_path):
+    path = tmp_path / 'shop.transcript'
+    loaded = Player(skill=11, stamina=18, luck=9, backpack={'gold': 20, 'map': 1})
+    player = record_session(monkeypatch, path, SHOP_SESSION, load_callback=lambda slot=None: loaded)
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert records[0]['state']['seed'] == 3 and records[1:5] == ['yes', 'ready', 'fortune', 'follow']
+    assert {'load': records[9]['load']} == records[9] and records[-1]['end'] == transcript.player_hash(player)
+
+    # the replay never touches the input or a load store
+    monkeypatch.setattr('builtins.input', lambda prompt='': pytest.fail('replay read input'))
+    result = transcript.replay(path)
+    assert result.ok and result.steps == len(SHOP_SESSION) and result.actual == records[-1]['end']
+
+
+def test_tampered_transcript_fails(monkeypatch, tmp_path):
+    path = tmp_path / 'a.transcript'
+    record_session(monkeypatch, path, SHOP_SESSION[:4] + ['buy 1', 'yes', 'exit'])
+    text = path.read_text().replace('"buy 1"', '"buy 2"')
+    (tmp_path / 'b.transcript').write_text(text)
+    result = transcript.replay(tmp_path / 'b.transcript')
+    assert not result.ok and result.error == 'final state differs'
+
+
+def test_replay_directory_in_bulk(monkeypatch, tmp_path, capsys):
+    for seed in range(5):
+        record_session(monkeypatch, tmp_path / f's{seed}.transcript', ['yes', 'ready', 'skill', 'attack'], seed=seed)
+    assert transcript.replay_all([tmp_path])
+    assert 'Replayed 5 transcripts' in capsys.readouterr().out
+    (tmp_path / 'broken.transcript').write_text('{"transcript": 1, "state": {}}\n"yes"\n')
+    monkeypatch.setattr('sys.argv', ['forest_of_doom', '--replay', str(tmp_path)])
+    with pytest.raises(SystemExit) as exit:
+        main.main()
+    assert exit.value.code == 1
+    assert 'FAIL' in capsys.readouterr().out
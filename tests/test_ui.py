@@ -30,3 +30,138 @@ def test_slow_print_no_delay(monkeypatch, capsys):
     ui.slow_print('World', delay=0.001, pause=False)
     captured = capsys.readouterr()
     assert 'World' in captured.out
+
+
+class FakeTTY(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+
+    def isatty(self):
+        return True
+
+    def write(self, s):
+        self.writes.append(s)
+        return super().write(s)
+
+
+class FakeClock:
+    def __init__(self, overshoot=0.0):
+        self.now = 0.0
+        self.overshoot = overshoot
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, s):
+        self.now += s + self.overshoot
+
+
+def test_typewriter_batches_due_chars_per_frame():
+    stream = FakeTTY()
+    clock = FakeClock()
+    r = ui.TypewriterRenderer(cps=100, fps=10, stream=stream, clock=clock, sleep=clock.sleep)
+    r.render('x' * 50)
+    assert stream.getvalue() == 'x' * 50
+    # 10 chars per frame at 100 cps / 10 fps -> a handful of writes, not 50
+    assert len(stream.writes) <= 7
+    assert clock.now == pytest.approx(0.5, abs=0.11)
+
+
+def test_typewriter_does_not_drift_with_sleep_overshoot():
+    stream = FakeTTY()
+    clock = FakeClock(overshoot=0.02)
+    r = ui.TypewriterRenderer(cps=100, fps=30, stream=stream, clock=clock, sleep=clock.sleep)
+    r.render('y' * 200)
+    assert stream.getvalue() == 'y' * 200
+    # total time tracks 200/100 = 2s; per-char sleeping would take 200 * 0.02 longer
+    assert clock.now < 2.1
+
+
+def test_typewriter_non_tty_single_write():
+    stream = io.StringIO()
+    r = ui.TypewriterRenderer(cps=10, stream=stream, sleep=lambda s: pytest.fail('slept'))
+    r.render('hello world')
+    assert stream.getvalue() == 'hello world'
+
+
+def test_typewriter_skip_flushes_remaining_text():
+    stream = FakeTTY()
+    clock = FakeClock()
+    polls = iter([False, False, True])
+    r = ui.TypewriterRenderer(cps=10, fps=10, stream=stream, clock=clock, sleep=clock.sleep)
+    r.render('abcdefghijklmnop', skip=lambda: next(polls, True))
+    assert stream.getvalue() == 'abcdefghijklmnop'
+    assert clock.now < 1.0
+
+
+def test_read_input_uses_typeahead_line(monkeypatch, capsys):
+    monkeypatch.setattr('builtins.input', lambda prompt='': pytest.fail('should not block'))
+    monkeypatch.setattr(ui, '_typeahead', ['ye', 's\nfol'])
+    assert ui.read_input('> ') == 'yes'
+    assert ui._typeahead == ['fol']
+    monkeypatch.setattr('builtins.input', lambda prompt='': 'low')
+    assert ui.read_input('> ') == 'follow'
+    assert ui._typeahead == []
+
+
+def test_read_input_applies_backspace(monkeypatch):
+    monkeypatch.setattr(ui, '_typeahead', ['nx\x7fo\n'])
+    assert ui.read_input() == 'no'
+
+
+def test_skip_key_enter_is_dropped_other_keys_kept(monkeypatch):
+    monkeypatch.setattr(ui, '_typeahead', ['\nabc'])
+    ui._drop_skip_key()
+    assert ui._typeahead == ['abc']
+    monkeypatch.setattr(ui, '_typeahead', ['y'])
+    ui._drop_skip_key()
+    assert ui._typeahead == ['y']
+
+
+def test_skipped_animation_leaves_typeahead_for_the_next_prompt(monkeypatch, capsys):
+    class TypedYes:
+        """KeyReader stand-in: 'yes' and Enter were typed during the animation."""
+        skipped = True
+
+        def __enter__(self):
+            ui._typeahead.append('yes\n')
+            return self
+
+        def __exit__(self, *exc):
+            pass
+
+        def pressed(self):
+            return True
+
+    def no_input(prompt=''):
+        raise AssertionError(f"blocked on {prompt!r}")
+
+    monkeypatch.setattr(ui, '_typeahead', [])
+    monkeypatch.setattr(ui, 'KeyReader', TypedYes)
+    monkeypatch.setattr('builtins.input', no_input)
+    ui.slow_print('You stand at the edge of the forest.')
+    assert ui.get_valid_input('Enter? (yes/no): ', ['yes', 'no']) == 'yes'
+    assert 'Press Enter' not in capsys.readouterr().out
+
+
+@pytest.mark.skipif(ui.termios is None, reason='POSIX terminals only')
+def test_key_reader_detects_keypress_on_pty(monkeypatch):
+    import os
+
+    master, slave = os.openpty()
+    monkeypatch.setattr(ui, '_typeahead', [])
+    try:
+        with open(slave, 'r', closefd=False) as stream:
+            with ui.KeyReader(stream) as keys:
+                assert keys.fd is not None
+                assert keys.pressed() is False
+                os.write(master, b'y')
+                deadline = time.monotonic() + 2
+                while not keys.pressed() and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            assert keys.skipped
+        assert ui._typeahead == ['y']
+    finally:
+        os.close(master)
+        os.close(slave)
@@ -1,6 +1,7 @@
 import builtins
 import io
 import sys
+from collections.abc import Sequence
 
 import pytest
 
@@ -21,7 +22,8 @@ def test_yaztromo_populates_slate(monkeypatch, capsys):
 
     # Slate should be populated with the expected items and prices
     assert hasattr(player, 'slate')
-    assert isinstance(player.slate, list)
+    # the slate is a read-only view over the shared item catalog
+    assert isinstance(player.slate, Sequence)
     assert len(player.slate) >= 1
 
     # Check a few items and their prices per the pricing rules